@@ -0,0 +1,80 @@
+"""
+Analytics API Routes - Cross-evaluation time series and cohort comparisons
+"""
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import get_professor_user, get_student_user
+from app.core.exceptions import BadRequestException
+from app.services import get_analytics_store
+
+router = APIRouter()
+
+
+@router.get("/students/{student_name}/timeseries")
+async def get_student_timeseries(
+    student_name: str,
+    matiere: Optional[str] = None,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get the grades (out of 20) of a student across evaluations (professors only)
+    """
+    return get_analytics_store().student_timeseries(student_name, matiere)
+
+
+@router.get("/me/timeseries")
+async def get_my_timeseries(
+    matiere: Optional[str] = None,
+    current_user: dict = Depends(get_student_user)
+):
+    """
+    Get the grades (out of 20) of the current student across evaluations
+    """
+    nom = current_user.get("nom", "")
+    prenom = current_user.get("prenom", "")
+
+    if not nom or not prenom:
+        raise BadRequestException("Informations etudiant manquantes")
+
+    student_name = f"{nom}_{prenom}".replace(" ", "_")
+    return get_analytics_store().student_timeseries(student_name, matiere)
+
+
+@router.get("/timeseries")
+async def get_evaluation_timeseries(
+    classe: Optional[str] = None,
+    matiere: Optional[str] = None,
+    terme: Optional[str] = Query(None, description="School term, e.g. '2024-2025 T2'"),
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get the mean grade of each matching evaluation, ordered by date (professors only)
+    """
+    return get_analytics_store().evaluation_timeseries(classe, matiere, terme)
+
+
+@router.get("/cohorts")
+async def compare_cohorts(
+    group_by: str = Query("classe", enum=["classe", "matiere", "terme"]),
+    classe: Optional[str] = None,
+    matiere: Optional[str] = None,
+    terme: Optional[str] = None,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Compare mean grades between classes, subjects or terms (professors only)
+    """
+    return get_analytics_store().cohort_comparison(group_by, classe, matiere, terme)
+
+
+@router.post("/rebuild")
+async def rebuild_aggregates(
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Recompute all aggregates from the result files (professors only)
+    """
+    counts = await asyncio.get_running_loop().run_in_executor(None, get_analytics_store().rebuild)
+    return {"message": "Agregats recalcules", **counts}
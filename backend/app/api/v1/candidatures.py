@@ -7,7 +7,7 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Query, UploadFile, File, Form, BackgroundTasks
 
 from app.api.deps import get_admin_user, get_current_user
 from app.core.exceptions import NotFoundException, BadRequestException
@@ -17,6 +17,7 @@ from app.models.candidature import (
     PersonalInfo, Grade
 )
 from app.config import settings
+from app.services import OCRProcessor
 
 router = APIRouter()
 
@@ -269,16 +270,53 @@ async def validate_candidature(
     }
 
 
+def run_ocr_verification(candidature_id: str, folder_path: Path):
+    """Background task: transcribe bulletin documents with the bulletin OCR engine"""
+    documents = []
+    try:
+        processor = OCRProcessor(
+            engine_mode=settings.OCR_ENGINE_BULLETINS,
+            cache_namespace=f"candidature_{candidature_id}"
+        )
+    except Exception as e:
+        processor, error = None, str(e)
+
+    candidature = load_candidature(candidature_id) or {}
+    for document in candidature.get("documents", []):
+        if processor is None:
+            documents.append({"filename": document.get("filename"), "error": error})
+            continue
+
+        result = processor.transcribe_file(str(folder_path / document["filename"]), "general", detailed=False)
+        documents.append({
+            "filename": document.get("filename"),
+            "transcription": result.get("transcribed_text", ""),
+            "confidence": result.get("confidence", 0),
+            "pages": result.get("page_count", 1),
+            "pages_moteur_local": result.get("local_pages", 0),
+            "pages_escaladees": result.get("escalated_pages", 0),
+            "error": result.get("error")
+        })
+
+    candidature["verification_ocr"] = {
+        "moteur": settings.OCR_ENGINE_BULLETINS,
+        "documents": documents,
+        "date_verification": datetime.now().isoformat()
+    }
+    save_candidature(folder_path, candidature)
+
+
 @router.post("/{candidature_id}/verify")
 async def verify_candidature(
     candidature_id: str,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_admin_user)
 ):
     """
     Launch OCR verification for a candidature (admin only)
 
-    This is a placeholder - the actual OCR verification service
-    would be implemented in the services layer.
+    Bulletins are transcribed in the background with OCR_ENGINE_BULLETINS
+    (local engine first, vision only for low-confidence pages).
     """
     candidature = load_candidature(candidature_id)
 
@@ -290,6 +328,8 @@ async def verify_candidature(
     folder_path = Path(candidature["dossier_path"])
     save_candidature(folder_path, candidature)
 
+    background_tasks.add_task(run_ocr_verification, candidature["id"], folder_path)
+
     return {
         "message": f"Verification OCR lancee pour {candidature_id}",
         "statut": "en_cours"
@@ -14,7 +14,12 @@ from app.models.correction import (
     CorrectionProgress, CorrectionProfile
 )
 from app.config import settings
-from app.services import process_copies_with_ai, transcribe_manuscript
+from app.services import (
+    process_copies_with_ai, get_ocr_cache, load_transcription, transcribe_and_store, ensure_student_feedback,
+    public_result, class_statistics, get_analytics_store, ensure_item_analysis,
+    load_running_statistics, save_result_with_statistics, rank_evaluation, update_student_rank,
+    load_snapshot, refresh_snapshot, snapshot_scores
+)
 
 router = APIRouter()
 
@@ -33,14 +38,18 @@ def load_correction_result(eval_id: str, student_name: str) -> Optional[dict]:
         return json.load(f)
 
 
-def save_correction_result(eval_id: str, student_name: str, data: dict):
-    """Save correction result"""
-    result_dir = EVALUATIONS_PATH / eval_id / "resultats" / student_name
-    result_dir.mkdir(parents=True, exist_ok=True)
+def load_note_totale(eval_id: str) -> float:
+    """Grading scale of an evaluation (note_totale, 20 by default)"""
+    eval_file = EVALUATIONS_PATH / eval_id / "infos_evaluation.json"
+    if eval_file.exists():
+        with open(eval_file, "r", encoding="utf-8") as f:
+            return float(json.load(f).get("note_totale") or 20)
+    return 20.0
 
-    result_file = result_dir / "correction_detaillee.json"
-    with open(result_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+def save_correction_result(eval_id: str, student_name: str, data: dict):
+    """Save correction result and update the running statistics of the evaluation"""
+    save_result_with_statistics(EVALUATIONS_PATH / eval_id, student_name, data, load_note_totale(eval_id))
 
 
 def list_all_corrections(eval_id: str) -> List[dict]:
@@ -60,52 +69,6 @@ def list_all_corrections(eval_id: str) -> List[dict]:
     return corrections
 
 
-def calculate_class_statistics(corrections: List[dict], eval_id: str) -> dict:
-    """Calculate statistics for all corrections"""
-    if not corrections:
-        return {}
-
-    notes = [c.get("note_globale", 0) for c in corrections]
-    note_max = corrections[0].get("note_max", 20) if corrections else 20
-
-    # Calculate statistics
-    moyenne = sum(notes) / len(notes) if notes else 0
-    notes_sorted = sorted(notes)
-    mediane = notes_sorted[len(notes_sorted) // 2] if notes_sorted else 0
-
-    # Standard deviation
-    variance = sum((n - moyenne) ** 2 for n in notes) / len(notes) if notes else 0
-    ecart_type = variance ** 0.5
-
-    # Passing rate (>= 10/20)
-    passing_threshold = note_max / 2
-    taux_reussite = len([n for n in notes if n >= passing_threshold]) / len(notes) * 100 if notes else 0
-
-    # Distribution
-    distribution = {
-        "0-5": len([n for n in notes if n < 5]),
-        "5-10": len([n for n in notes if 5 <= n < 10]),
-        "10-12": len([n for n in notes if 10 <= n < 12]),
-        "12-14": len([n for n in notes if 12 <= n < 14]),
-        "14-16": len([n for n in notes if 14 <= n < 16]),
-        "16-20": len([n for n in notes if n >= 16])
-    }
-
-    return {
-        "evaluation_id": eval_id,
-        "nombre_copies": len(corrections),
-        "nombre_corriges": len(corrections),
-        "moyenne_generale": round(moyenne, 2),
-        "mediane": round(mediane, 2),
-        "ecart_type": round(ecart_type, 2),
-        "note_min": min(notes) if notes else 0,
-        "note_max": max(notes) if notes else 0,
-        "taux_reussite": round(taux_reussite, 1),
-        "distribution_notes": distribution,
-        "date_calcul": datetime.now().isoformat()
-    }
-
-
 async def run_ai_correction(eval_id: str, eval_data: dict, profile: str):
     """Background task to run AI correction"""
     eval_dir = EVALUATIONS_PATH / eval_id
@@ -115,9 +78,30 @@ async def run_ai_correction(eval_id: str, eval_data: dict, profile: str):
         return
 
     copies_data = []
-    for copy_file in copies_dir.glob("*.pdf"):
-        # Transcribe the copy
-        transcription = transcribe_manuscript(str(copy_file), eval_data.get('matiere', 'general'))
+    ocr_stats = {"copies": 0, "pages": 0, "pages_blanches_ignorees": 0,
+                 "pages_texte_integre": 0, "pages_cache": 0, "pages_reprises_haute_resolution": 0,
+                 "transcriptions_reutilisees": 0}
+    matiere = eval_data.get('matiere', 'general')
+    copy_files = sorted(copies_dir.glob("*.pdf"))
+
+    # Reuse transcriptions made in the background at submission time
+    transcriptions = [load_transcription(copy_file, matiere) for copy_file in copy_files]
+    ocr_stats["transcriptions_reutilisees"] = sum(1 for t in transcriptions if t is not None)
+
+    # Transcribe the remaining copies (rendering in worker processes, OCR in threads)
+    missing = [i for i, t in enumerate(transcriptions) if t is None]
+    if missing:
+        fresh = await transcribe_and_store(eval_id, [copy_files[i] for i in missing], matiere)
+        for i, transcription in zip(missing, fresh):
+            transcriptions[i] = transcription
+
+    for copy_file, transcription in zip(copy_files, transcriptions):
+        ocr_stats["copies"] += 1
+        ocr_stats["pages"] += transcription.get('page_count', 0)
+        ocr_stats["pages_blanches_ignorees"] += transcription.get('blank_pages', 0)
+        ocr_stats["pages_texte_integre"] += transcription.get('text_layer_pages', 0)
+        ocr_stats["pages_cache"] += transcription.get('cache_hits', 0)
+        ocr_stats["pages_reprises_haute_resolution"] += transcription.get('retried_pages', 0)
 
         # Extract student name from filename
         filename = copy_file.stem
@@ -139,9 +123,14 @@ async def run_ai_correction(eval_id: str, eval_data: dict, profile: str):
     for result in results:
         student_name = f"{result.get('etudiant_nom', 'Unknown')}_{result.get('etudiant_prenom', '')}".replace(" ", "_")
         save_correction_result(eval_id, student_name, result)
+    # One aggregates write for the whole run, off the event loop
+    await get_analytics_store().record_results_async(eval_id, eval_data, results)
+    rank_evaluation(eval_dir, load_note_totale(eval_id))
+    refresh_snapshot(eval_dir)
 
     # Update evaluation with correction count
     eval_data['nombre_corriges'] = len(results)
+    eval_data['statistiques_ocr'] = {**ocr_stats, "date_calcul": datetime.now().isoformat()}
     eval_file = eval_dir / "infos_evaluation.json"
     with open(eval_file, "w", encoding="utf-8") as f:
         json.dump(eval_data, f, ensure_ascii=False, indent=2, default=str)
@@ -210,6 +199,7 @@ async def get_evaluation_results(
 
     if user_role == "student":
         # Load evaluation to check publication status
+        eval_data = {}
         eval_file = EVALUATIONS_PATH / eval_id / "infos_evaluation.json"
         if eval_file.exists():
             with open(eval_file, "r", encoding="utf-8") as f:
@@ -227,21 +217,85 @@ async def get_evaluation_results(
             if c.get("etudiant_nom") == student_nom and c.get("etudiant_prenom") == student_prenom
         ]
 
-    return corrections
+        # Students see their detailed result: generate pending feedback
+        student_name = f"{student_nom}_{student_prenom}".replace(" ", "_")
+        if corrections:
+            detailed = await ensure_student_feedback(EVALUATIONS_PATH / eval_id, student_name, eval_data)
+            if detailed:
+                corrections = [detailed]
+
+    return [public_result(c) for c in corrections]
 
 
 @router.get("/evaluation/{eval_id}/statistics")
 async def get_evaluation_statistics(
     eval_id: str,
+    exact: bool = Query(False, description="Recompute from every result file (per-criterion stats included)"),
     current_user: dict = Depends(get_professor_user)
 ):
     """
     Get class statistics for an evaluation (professors only)
+
+    Served from the running statistics kept up to date on each saved result;
+    exact=true recomputes them from the columnar snapshot of the results
+    (only changed results are re-read).
     """
-    corrections = list_all_corrections(eval_id)
-    stats = calculate_class_statistics(corrections, eval_id)
+    # Scale of the evaluation (note_totale), results are rescaled to it
+    note_max = load_note_totale(eval_id)
+
+    if not (EVALUATIONS_PATH / eval_id / "resultats").exists():
+        return {}
+
+    if exact:
+        snapshot = load_snapshot(EVALUATIONS_PATH / eval_id)
+        return class_statistics(snapshot_scores(snapshot, note_max), eval_id, note_max)
+
+    return load_running_statistics(EVALUATIONS_PATH / eval_id, note_max).summary(eval_id)
+
+
+@router.get("/evaluation/{eval_id}/item-analysis")
+async def get_item_analysis(
+    eval_id: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get per-question difficulty and discrimination for an evaluation (professors only)
+
+    Cached until one of the results changes.
+    """
+    eval_dir = EVALUATIONS_PATH / eval_id
+    eval_file = eval_dir / "infos_evaluation.json"
+    if not eval_file.exists():
+        raise NotFoundException("Evaluation", eval_id)
+
+    with open(eval_file, "r", encoding="utf-8") as f:
+        eval_data = json.load(f)
 
-    return stats
+    analysis = await ensure_item_analysis(eval_dir, eval_data)
+    return {"evaluation_id": eval_id, **analysis}
+
+
+@router.get("/evaluation/{eval_id}/ocr-cache")
+async def get_ocr_cache_statistics(
+    eval_id: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get OCR transcription cache statistics for an evaluation (professors only)
+    """
+    return get_ocr_cache().get_stats(eval_id)
+
+
+@router.delete("/evaluation/{eval_id}/ocr-cache")
+async def clear_ocr_cache(
+    eval_id: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Clear cached OCR transcriptions for an evaluation (forces re-transcription)
+    """
+    get_ocr_cache().clear(eval_id)
+    return {"message": f"Cache OCR de l'evaluation {eval_id} vide"}
 
 
 @router.get("/student/{eval_id}")
@@ -255,6 +309,7 @@ async def get_student_result(
     Get individual student result
     """
     # Check publication status
+    eval_data = {}
     eval_file = EVALUATIONS_PATH / eval_id / "infos_evaluation.json"
     if eval_file.exists():
         with open(eval_file, "r", encoding="utf-8") as f:
@@ -264,12 +319,37 @@ async def get_student_result(
             raise BadRequestException("Les resultats ne sont pas encore publies")
 
     student_name = f"{nom}_{prenom}".replace(" ", "_")
-    result = load_correction_result(eval_id, student_name)
+    result = await ensure_student_feedback(EVALUATIONS_PATH / eval_id, student_name, eval_data)
 
     if not result:
         raise NotFoundException("Resultat", f"{nom} {prenom}")
 
-    return result
+    return public_result(result)
+
+
+@router.get("/evaluation/{eval_id}/result/{student_name}")
+async def get_detailed_result(
+    eval_id: str,
+    student_name: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get the detailed correction of one student (professors only)
+
+    With lazy feedback, comments are generated on the first request.
+    """
+    eval_file = EVALUATIONS_PATH / eval_id / "infos_evaluation.json"
+    if not eval_file.exists():
+        raise NotFoundException("Evaluation", eval_id)
+
+    with open(eval_file, "r", encoding="utf-8") as f:
+        eval_data = json.load(f)
+
+    result = await ensure_student_feedback(EVALUATIONS_PATH / eval_id, student_name, eval_data)
+    if not result:
+        raise NotFoundException("Resultat", student_name)
+
+    return public_result(result)
 
 
 @router.post("/evaluation/{eval_id}/result")
@@ -285,5 +365,12 @@ async def save_correction(
 
     result["date_correction"] = datetime.now().isoformat()
     save_correction_result(eval_id, student_name, result)
+    update_student_rank(EVALUATIONS_PATH / eval_id, student_name, result, load_note_totale(eval_id))
+
+    eval_file = EVALUATIONS_PATH / eval_id / "infos_evaluation.json"
+    if eval_file.exists():
+        with open(eval_file, "r", encoding="utf-8") as f:
+            eval_data = json.load(f)
+        await get_analytics_store().record_results_async(eval_id, eval_data, [result])
 
     return {"message": f"Resultat enregistre pour {student_name}"}
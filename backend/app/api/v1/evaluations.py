@@ -1,6 +1,7 @@
 """
 Evaluations API Routes
 """
+import asyncio
 import uuid
 import json
 from pathlib import Path
@@ -16,6 +17,7 @@ from app.models.evaluation import (
     EvaluationPublishRequest
 )
 from app.config import settings
+from app.services import get_analytics_store
 
 router = APIRouter()
 
@@ -212,6 +214,7 @@ async def update_evaluation(
             eval_data[key] = value
 
     save_evaluation(eval_id, eval_data)
+    await asyncio.get_running_loop().run_in_executor(None, get_analytics_store().update_evaluation, eval_id, eval_data)
 
     return eval_data
 
@@ -321,5 +324,6 @@ async def delete_evaluation(
     eval_data["deleted_by"] = current_user.get("sub")
 
     save_evaluation(eval_id, eval_data)
+    await asyncio.get_running_loop().run_in_executor(None, get_analytics_store().update_evaluation, eval_id, eval_data)
 
     return {"message": f"Evaluation {eval_id} supprimee"}
@@ -2,16 +2,19 @@
 Files API Routes
 """
 import uuid
+import json
 import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, Query, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
 
 from app.api.deps import get_current_user, get_professor_user
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.config import settings
+from app.services import prefetch_transcriptions
+from app.services.transcription_store import delete_transcription
 
 router = APIRouter()
 
@@ -208,6 +211,7 @@ async def delete_copy(
         raise NotFoundException("Copie", filename)
 
     file_path.unlink()
+    delete_transcription(file_path)
 
     return {"message": f"Copie {filename} supprimee"}
 
@@ -215,6 +219,7 @@ async def delete_copy(
 @router.post("/evaluation/{eval_id}/copies")
 async def upload_copies(
     eval_id: str,
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     current_user: dict = Depends(get_professor_user)
 ):
@@ -230,6 +235,7 @@ async def upload_copies(
     copies_dir.mkdir(exist_ok=True)
 
     uploaded = []
+    copy_files = []
     for file in files:
         if file.filename:
             content = await file.read()
@@ -237,12 +243,21 @@ async def upload_copies(
 
             with open(file_path, "wb") as f:
                 f.write(content)
+            copy_files.append(file_path)
 
             uploaded.append({
                 "filename": file.filename,
                 "size": len(content)
             })
 
+    # Transcribe the copies now so that correction only has to grade
+    eval_file = eval_dir / "infos_evaluation.json"
+    matiere = "general"
+    if eval_file.exists():
+        with open(eval_file, "r", encoding="utf-8") as f:
+            matiere = json.load(f).get("matiere", "general")
+    background_tasks.add_task(prefetch_transcriptions, eval_id, copy_files, matiere)
+
     return {
         "uploaded": len(uploaded),
         "files": uploaded
@@ -4,21 +4,44 @@ Reports API Routes
 import json
 from pathlib import Path
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from urllib.parse import quote
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request
 from fastapi.responses import FileResponse, StreamingResponse, Response
 import io
 
 from app.api.deps import get_professor_user, get_student_user, get_current_user
 from app.core.exceptions import NotFoundException, BadRequestException
 from app.config import settings
-from app.services import generate_student_pdf_report
+from app.services import (
+    ensure_class_report,
+    ensure_student_report,
+    generate_evaluation_reports,
+    is_generation_running,
+    list_result_files,
+    load_generation_status,
+    public_result,
+    start_generation,
+    stream_reports_zip,
+    stream_results_csv,
+    stream_results_xlsx,
+    total_score,
+)
 
 router = APIRouter()
 
 EVALUATIONS_PATH = Path(settings.DATA_DIR) / "evaluations"
 
 
+def _attachment_headers(filename: str) -> dict:
+    """Content-Disposition for a download (RFC 5987 for non-ASCII evaluation ids)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
 @router.get("/evaluation/{eval_id}")
 async def list_evaluation_reports(
     eval_id: str,
@@ -45,6 +68,83 @@ async def list_evaluation_reports(
     return reports
 
 
+@router.get("/evaluation/{eval_id}/zip")
+async def download_reports_zip(
+    eval_id: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Download every student report of an evaluation as a ZIP (professors only)
+
+    The archive is streamed: up-to-date PDFs are sent immediately while
+    missing or stale ones are rebuilt in the report process pool.
+    """
+    eval_dir = EVALUATIONS_PATH / eval_id
+    eval_file = eval_dir / "infos_evaluation.json"
+
+    if not eval_file.exists():
+        raise NotFoundException("Evaluation", eval_id)
+
+    with open(eval_file, "r", encoding="utf-8") as f:
+        eval_data = json.load(f)
+
+    results_dir = eval_dir / "resultats"
+    if not results_dir.exists() or not list(results_dir.iterdir()):
+        raise BadRequestException("Aucune correction disponible pour generer des rapports")
+
+    return StreamingResponse(
+        stream_reports_zip(eval_dir, eval_data),
+        media_type="application/zip",
+        headers=_attachment_headers(f"rapports_{eval_id}.zip")
+    )
+
+
+@router.get("/evaluation/{eval_id}/class-report")
+async def download_class_report(
+    eval_id: str,
+    request: Request,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Download the class summary PDF of an evaluation (professors only)
+
+    Grade distribution, percentiles, pass rates, per-question results and
+    ranking of the whole class. The PDF is cached on disk until any result
+    changes. Supports conditional requests (ETag / Last-Modified -> 304).
+    """
+    eval_dir = EVALUATIONS_PATH / eval_id
+    eval_file = eval_dir / "infos_evaluation.json"
+
+    if not eval_file.exists():
+        raise NotFoundException("Evaluation", eval_id)
+
+    with open(eval_file, "r", encoding="utf-8") as f:
+        eval_data = json.load(f)
+
+    results_dir = eval_dir / "resultats"
+    if not results_dir.exists() or not list(results_dir.iterdir()):
+        raise BadRequestException("Aucune correction disponible pour generer des rapports")
+
+    # Cached PDF, rebuilt in the report process pool only if a result changed
+    pdf_path, report_key = await ensure_class_report(eval_dir, eval_data)
+    mtime = pdf_path.stat().st_mtime
+    headers = {
+        "ETag": f'"{report_key}"',
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": "private, no-cache"
+    }
+
+    if _is_not_modified(request, headers["ETag"], mtime):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"synthese_classe_{eval_id}.pdf",
+        headers=headers
+    )
+
+
 @router.get("/evaluation/{eval_id}/student/{student_name}")
 async def get_student_report(
     eval_id: str,
@@ -98,11 +198,15 @@ async def get_student_report(
 @router.post("/evaluation/{eval_id}/generate")
 async def generate_reports(
     eval_id: str,
+    background_tasks: BackgroundTasks,
     format: str = Query("pdf", enum=["pdf", "xlsx", "json"]),
     current_user: dict = Depends(get_professor_user)
 ):
     """
     Generate reports for an evaluation (professors only)
+
+    PDF reports are built in the background by a process pool; follow the
+    progress with GET /evaluation/{eval_id}/generate/status.
     """
     eval_dir = EVALUATIONS_PATH / eval_id
     eval_file = eval_dir / "infos_evaluation.json"
@@ -122,48 +226,63 @@ async def generate_reports(
     reports_dir = eval_dir / "rapports"
     reports_dir.mkdir(exist_ok=True)
 
-    generated_count = 0
-
-    # Generate PDF reports for each student
+    # Generate PDF reports for each student in the background
     if format == "pdf":
-        for student_dir in results_dir.iterdir():
-            if student_dir.is_dir():
-                result_file = student_dir / "correction_detaillee.json"
-                if result_file.exists():
-                    with open(result_file, "r", encoding="utf-8") as f:
-                        result_data = json.load(f)
-
-                    student_info = {
-                        "nom": result_data.get("etudiant_nom", ""),
-                        "prenom": result_data.get("etudiant_prenom", "")
-                    }
-
-                    try:
-                        pdf_bytes = generate_student_pdf_report(result_data, eval_data, student_info)
-                        pdf_path = reports_dir / f"{student_dir.name}_rapport.pdf"
-                        with open(pdf_path, "wb") as pdf_file:
-                            pdf_file.write(pdf_bytes)
-                        generated_count += 1
-                    except Exception as e:
-                        print(f"Erreur generation PDF pour {student_dir.name}: {e}")
+        if is_generation_running(eval_id):
+            raise BadRequestException("Une generation des rapports est deja en cours")
+
+        status = start_generation(eval_id, eval_dir)
+        background_tasks.add_task(generate_evaluation_reports, eval_id, eval_dir, eval_data, status)
+
+        return {
+            "message": "Generation des rapports pdf lancee",
+            "evaluation_id": eval_id,
+            "format": format,
+            "total": status["total"],
+            "rapports_generes": 0,
+            "statut": status["statut"]
+        }
 
     return {
         "message": f"Generation des rapports {format} terminee",
         "evaluation_id": eval_id,
         "format": format,
-        "rapports_generes": generated_count,
+        "rapports_generes": 0,
         "statut": "termine"
     }
 
 
+@router.get("/evaluation/{eval_id}/generate/status")
+async def get_generation_status(
+    eval_id: str,
+    current_user: dict = Depends(get_professor_user)
+):
+    """
+    Get the progress of the PDF report generation (professors only)
+    """
+    eval_dir = EVALUATIONS_PATH / eval_id
+    if not (eval_dir / "infos_evaluation.json").exists():
+        raise NotFoundException("Evaluation", eval_id)
+
+    status = load_generation_status(eval_dir)
+    if status is None:
+        return {"evaluation_id": eval_id, "statut": "aucune"}
+    return status
+
+
 @router.get("/evaluation/{eval_id}/student/{student_name}/pdf")
 async def generate_single_student_report(
     eval_id: str,
     student_name: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Generate and download a single student report PDF
+    Download a single student report PDF
+
+    The PDF is cached on disk and only rebuilt when the result, the displayed
+    evaluation details or the report generator change. Supports conditional
+    requests (ETag / Last-Modified -> 304).
     """
     eval_dir = EVALUATIONS_PATH / eval_id
     eval_file = eval_dir / "infos_evaluation.json"
@@ -187,29 +306,47 @@ async def generate_single_student_report(
         if student_name != expected_name:
             raise BadRequestException("Vous ne pouvez acceder qu'a votre propre rapport")
 
-    # Load student result
+    # Check student result
     result_file = eval_dir / "resultats" / student_name / "correction_detaillee.json"
     if not result_file.exists():
         raise NotFoundException("Resultat", student_name)
 
-    with open(result_file, "r", encoding="utf-8") as f:
-        result_data = json.load(f)
-
-    student_info = {
-        "nom": result_data.get("etudiant_nom", ""),
-        "prenom": result_data.get("etudiant_prenom", "")
+    # Cached PDF, rebuilt in the report process pool only if stale
+    pdf_path, report_key = await ensure_student_report(eval_dir, student_name, eval_data)
+    mtime = pdf_path.stat().st_mtime
+    headers = {
+        "ETag": f'"{report_key}"',
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": "private, no-cache"
     }
 
-    # Generate PDF
-    pdf_bytes = generate_student_pdf_report(result_data, eval_data, student_info)
+    if _is_not_modified(request, headers["ETag"], mtime):
+        return Response(status_code=304, headers=headers)
 
-    return Response(
-        content=pdf_bytes,
+    return FileResponse(
+        pdf_path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=rapport_{student_name}.pdf"}
+        filename=f"rapport_{student_name}.pdf",
+        headers=headers
     )
 
 
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Conditional GET: If-None-Match takes precedence over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
 @router.get("/evaluation/{eval_id}/export")
 async def export_results(
     eval_id: str,
@@ -217,42 +354,45 @@ async def export_results(
     current_user: dict = Depends(get_professor_user)
 ):
     """
-    Export all results for an evaluation
+    Export all results for an evaluation (professors only)
+
+    CSV is streamed row by row while the result files are read; XLSX is
+    written by openpyxl in write-only mode. Both have one column per question.
     """
-    results_dir = EVALUATIONS_PATH / eval_id / "resultats"
+    eval_dir = EVALUATIONS_PATH / eval_id
+    results_dir = eval_dir / "resultats"
 
     if not results_dir.exists():
         raise NotFoundException("Resultats", eval_id)
 
-    # Collect all results
-    all_results = []
-    for student_dir in results_dir.iterdir():
-        if student_dir.is_dir():
-            result_file = student_dir / "correction_detaillee.json"
-            if result_file.exists():
-                with open(result_file, "r", encoding="utf-8") as f:
-                    all_results.append(json.load(f))
-
-    if not all_results:
+    if not any(results_dir.iterdir()):
         raise BadRequestException("Aucun resultat a exporter")
 
+    eval_data = {}
+    eval_file = eval_dir / "infos_evaluation.json"
+    if eval_file.exists():
+        with open(eval_file, "r", encoding="utf-8") as f:
+            eval_data = json.load(f)
+
     if format == "json":
+        all_results = []
+        for _, result_file in list_result_files(eval_dir):
+            with open(result_file, "r", encoding="utf-8") as f:
+                all_results.append(public_result(json.load(f)))
         return all_results
 
-    # For xlsx/csv, return simple format
-    export_data = []
-    for result in all_results:
-        export_data.append({
-            "Nom": result.get("etudiant_nom", ""),
-            "Prenom": result.get("etudiant_prenom", ""),
-            "Note": result.get("note_globale", 0),
-            "Note Max": result.get("note_max", 20),
-            "Pourcentage": result.get("pourcentage", 0),
-            "Performance": result.get("performance", ""),
-            "Date Correction": result.get("date_correction", "")
-        })
-
-    return export_data
+    if format == "csv":
+        return StreamingResponse(
+            stream_results_csv(eval_dir, eval_data),
+            media_type="text/csv",
+            headers=_attachment_headers(f"resultats_{eval_id}.csv")
+        )
+
+    return StreamingResponse(
+        stream_results_xlsx(eval_dir, eval_data),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=_attachment_headers(f"resultats_{eval_id}.xlsx")
+    )
 
 
 @router.get("/student/my-reports")
@@ -296,8 +436,8 @@ async def get_my_reports(
                                 "evaluation_id": eval_dir.name,
                                 "evaluation_titre": eval_data.get("titre", ""),
                                 "matiere": eval_data.get("matiere", ""),
-                                "note": result_data.get("note_globale", 0),
-                                "note_max": result_data.get("note_max", 20),
+                                "note": total_score(result_data),
+                                "note_max": result_data.get("note_maximale") or result_data.get("note_max", 20),
                                 "date_correction": result_data.get("date_correction", ""),
                                 "has_pdf": (eval_dir / "rapports" / f"{student_name}_rapport.pdf").exists()
                             })
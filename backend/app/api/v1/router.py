@@ -3,7 +3,7 @@ Main API Router - Combines all endpoint routers
 """
 from fastapi import APIRouter
 
-from app.api.v1 import auth, users, evaluations, submissions, corrections, candidatures, reports, files
+from app.api.v1 import auth, users, evaluations, submissions, corrections, candidatures, reports, files, analytics
 
 api_router = APIRouter()
 
@@ -16,3 +16,4 @@ api_router.include_router(corrections.router, prefix="/corrections", tags=["Corr
 api_router.include_router(candidatures.router, prefix="/candidatures", tags=["Candidatures"])
 api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
 api_router.include_router(files.router, prefix="/files", tags=["Files"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
@@ -7,7 +7,7 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, Query, UploadFile, File, Form, HTTPException, BackgroundTasks
 
 from app.api.deps import get_student_user, get_professor_user, get_current_user
 from app.core.exceptions import NotFoundException, BadRequestException
@@ -16,6 +16,7 @@ from app.models.submission import (
     SubmissionType, SubmissionStatus, StudentSubmissionCheck
 )
 from app.config import settings
+from app.services import prefetch_transcriptions
 
 router = APIRouter()
 
@@ -72,6 +73,7 @@ def list_submissions_for_evaluation(eval_id: str) -> List[dict]:
 
 @router.post("/")
 async def create_submission(
+    background_tasks: BackgroundTasks,
     evaluation_id: str = Form(...),
     nom: str = Form(...),
     prenom: str = Form(...),
@@ -110,6 +112,7 @@ async def create_submission(
 
     # Save uploaded files
     saved_files = []
+    copy_files = []
     total_size = 0
 
     for i, file in enumerate(files):
@@ -138,7 +141,9 @@ async def create_submission(
             # Also copy to copies_soumises for teacher view
             copies_dir = eval_dir / "copies_soumises"
             copies_dir.mkdir(exist_ok=True)
-            shutil.copy(file_path, copies_dir / f"{student_name}_{safe_name}")
+            copy_file = copies_dir / f"{student_name}_{safe_name}"
+            shutil.copy(file_path, copy_file)
+            copy_files.append(copy_file)
 
     # Save digital response if provided
     if reponse_numerique and type_soumission == SubmissionType.DIGITAL:
@@ -165,6 +170,12 @@ async def create_submission(
 
     save_submission(evaluation_id, student_name, submission_data)
 
+    # Transcribe the copies now so that correction only has to grade
+    if copy_files:
+        background_tasks.add_task(
+            prefetch_transcriptions, evaluation_id, copy_files, eval_data.get("matiere", "general")
+        )
+
     # Update evaluation copy count
     eval_data["nombre_copies"] = eval_data.get("nombre_copies", 0) + 1
     with open(eval_file, "w", encoding="utf-8") as f:
@@ -22,6 +22,57 @@ class Settings(BaseSettings):
 
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: str = ""  # Empty = official API
+
+    # OCR
+    OCR_MAX_CONCURRENT_PAGES: int = 4  # Pages transcrites en parallele par document
+    OCR_MAX_CONCURRENT_REQUESTS: int = 8  # Appels vision simultanes (tout le processus)
+    OCR_PREPROCESSING: bool = True  # Niveaux de gris, redressement, rognage, compression
+    OCR_TARGET_SHORT_SIDE: int = 768  # Petit cote utile pour gpt-4o (detail high)
+    OCR_IMAGE_FORMAT: str = "jpeg"  # jpeg, webp, png
+    OCR_IMAGE_QUALITY: int = 80
+    OCR_IMAGE_DETAIL: str = "high"
+    OCR_TEXT_LAYER_FAST_PATH: bool = True  # Texte integre des PDF numeriques sans appel vision
+    OCR_TEXT_LAYER_MIN_CHARS: int = 40
+    OCR_CACHE_ENABLED: bool = True  # Cache disque des transcriptions par page
+    OCR_CACHE_MAX_MB: float = 512.0
+    OCR_TILING_MAX_PAGES: int = 1  # Pages peu denses regroupees par appel vision (1 = desactive)
+    OCR_TILING_MAX_INK_DENSITY: float = 0.03  # Densite d'encre maximale d'une page regroupable
+    OCR_SKIP_BLANK_PAGES: bool = True  # Pages blanches detectees sans appel vision
+    OCR_BLANK_MAX_INK_DENSITY: float = 0.00002  # ~2 pixels d'encre sur la vignette 400 px
+    OCR_BLANK_MAX_STD: float = 25.0  # Fond trop irregulier au-dela : page conservee
+    OCR_RENDER_WORKERS: int = 0  # Processus de rendu des copies (0 = un par coeur)
+    OCR_RENDER_PAGE_BATCH: int = 2  # Pages rendues par tache du pool de rendu
+    OCR_CONCURRENT_DOCUMENTS: int = 4  # Copies transcrites simultanement
+    OCR_EAGER_TRANSCRIPTION: bool = True  # Transcription en tache de fond des le depot des copies
+    OCR_ENGINE: str = "vision"  # Copies : vision, local, local_first
+    OCR_ENGINE_BULLETINS: str = "local_first"  # Bulletins imprimes des candidatures
+    OCR_LOCAL_MIN_CONFIDENCE: float = 0.8  # En dessous : escalade vers le moteur vision
+    OCR_LOCAL_DPI: int = 300
+    OCR_DRAFT_PASS: bool = False  # Premiere passe vision economique, reprise en haute resolution si besoin
+    OCR_DRAFT_SHORT_SIDE: int = 512  # Petit cote de l'image de premiere passe
+    OCR_DRAFT_DETAIL: str = "low"  # low : 85 tokens par page quelle que soit la taille
+    OCR_DRAFT_MIN_CONFIDENCE: float = 0.85  # En dessous : page retranscrite en pleine resolution
+    TESSERACT_CMD: str = "tesseract"
+    TESSERACT_LANG: str = "fra"
+
+    # Correction
+    CORRECTION_LAZY_FEEDBACK: bool = False  # Notes seules a la correction, commentaires generes a la premiere consultation
+    CORRECTION_SCORING_MAX_TOKENS: int = 300  # Sortie de la passe de notation (notes par question uniquement)
+    CORRECTION_RANKING_METHOD: str = "competition"  # Rang des ex aequo : competition (1, 2, 2, 4) ou dense (1, 2, 2, 3)
+
+    # Reports
+    REPORT_WORKERS: int = 0  # Processus de generation des rapports PDF (0 = un par coeur)
+
+    # Mock LLM (offline benchmarks / CI, no API key required)
+    LLM_MOCK: bool = False
+    LLM_MOCK_SEED: int = 42
+    LLM_MOCK_LATENCY_DISTRIBUTION: str = "constant"  # constant, uniform, normal, lognormal
+    LLM_MOCK_LATENCY_MS: float = 0.0
+    LLM_MOCK_LATENCY_JITTER_MS: float = 0.0
+    LLM_MOCK_MS_PER_COMPLETION_TOKEN: float = 0.0  # Latence ajoutee par token genere
+    LLM_MOCK_ERROR_RATE: float = 0.0
+    LLM_MOCK_RATE_LIMIT_RATE: float = 0.0
 
     # CORS
     CORS_ORIGINS: str = '["http://localhost:5173","http://localhost:3000"]'
@@ -8,6 +8,8 @@ from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.api.v1.router import api_router
+from app.services.ocr_pipeline import shutdown_render_pool
+from app.services.report_generation import shutdown_report_pool
 
 
 @asynccontextmanager
@@ -18,6 +20,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print(f"Shutting down {settings.APP_NAME}...")
+    shutdown_render_pool()
+    shutdown_report_pool()
 
 
 # Create FastAPI application
@@ -100,9 +100,13 @@ class ClassStatistics(BaseModel):
     ecart_type: float
     note_min: float
     note_max: float
+    bareme: float = 20  # note_totale of the evaluation, notes are rescaled to it
+    quantiles: Dict[str, float] = {}  # {"p10": 6.5, "p25": 9.0, ...}
     taux_reussite: float  # % of students above passing grade
     distribution_notes: Dict[str, int] = {}  # {"0-5": 2, "5-10": 5, ...}
+    questions: List[Dict[str, Any]] = []
     notes_par_critere: Dict[str, float] = {}
+    criteres: List[Dict[str, Any]] = []
     difficultes_communes: List[Dict[str, Any]] = []
     points_forts_classe: List[str] = []
     recommandations_pedagogiques: List[str] = []
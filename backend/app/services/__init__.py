@@ -13,11 +13,110 @@ from .ai_ocr_service import (
     transcribe_manuscript_bytes,
 )
 
+from .ocr_engines import (
+    OCREngine,
+    OCREngineRouter,
+    TesseractOCREngine,
+    VisionOCREngine,
+)
+
+from .ocr_pipeline import (
+    OCRPipeline,
+    transcribe_manuscripts_async,
+)
+
+from .transcription_store import (
+    load_transcription,
+    prefetch_transcriptions,
+    transcribe_and_store,
+)
+
+from .ocr_cache import (
+    OCRTranscriptionCache,
+    get_ocr_cache,
+)
+
+from .llm_mock import (
+    MockLLMResponder,
+    MockLLMTransport,
+    create_mock_openai_client,
+)
+
+from .feedback_service import (
+    ensure_student_feedback,
+    is_feedback_pending,
+    public_result,
+)
+
+from .statistics_service import (
+    class_statistics,
+    compute_class_statistics,
+    extract_scores,
+    scaled_score,
+    total_score,
+)
+
+from .results_snapshot import (
+    load_snapshot,
+    refresh_snapshot,
+    snapshot_scores,
+)
+
+from .result_locks import evaluation_lock
+
+from .running_statistics import (
+    RunningStatistics,
+    load_running_statistics,
+    save_result_with_statistics,
+)
+
+from .ranking_service import (
+    compute_ranks,
+    is_ranked,
+    rank_evaluation,
+    ranking_method,
+    update_student_rank,
+)
+
+from .analytics_service import (
+    AnalyticsStore,
+    get_analytics_store,
+    school_term,
+)
+
+from .item_analysis_service import (
+    analyze_results,
+    compute_item_analysis,
+)
+
 from .pdf_report_service import (
     StudentReportGenerator,
     generate_student_pdf_report,
 )
 
+from .class_report_service import (
+    ClassReportGenerator,
+    compute_class_summary,
+    generate_class_pdf_report,
+)
+
+from .report_generation import (
+    ensure_class_report,
+    ensure_item_analysis,
+    ensure_student_report,
+    generate_evaluation_reports,
+    is_generation_running,
+    list_result_files,
+    load_generation_status,
+    start_generation,
+    stream_reports_zip,
+)
+
+from .export_service import (
+    stream_results_csv,
+    stream_results_xlsx,
+)
+
 __all__ = [
     # AI Correction
     "AICorrectionEngine",
@@ -27,7 +126,76 @@ __all__ = [
     "OCRProcessor",
     "transcribe_manuscript",
     "transcribe_manuscript_bytes",
+    # OCR engines
+    "OCREngine",
+    "OCREngineRouter",
+    "TesseractOCREngine",
+    "VisionOCREngine",
+    # OCR pipeline
+    "OCRPipeline",
+    "transcribe_manuscripts_async",
+    # Stored transcriptions
+    "load_transcription",
+    "prefetch_transcriptions",
+    "transcribe_and_store",
+    # OCR cache
+    "OCRTranscriptionCache",
+    "get_ocr_cache",
+    # Mock LLM
+    "MockLLMResponder",
+    "MockLLMTransport",
+    "create_mock_openai_client",
+    # Lazy correction feedback
+    "ensure_student_feedback",
+    "is_feedback_pending",
+    "public_result",
+    # Class statistics
+    "class_statistics",
+    "compute_class_statistics",
+    "extract_scores",
+    "scaled_score",
+    "total_score",
+    # Columnar results snapshot
+    "load_snapshot",
+    "refresh_snapshot",
+    "snapshot_scores",
+    # Result file lock
+    "evaluation_lock",
+    # Running statistics
+    "RunningStatistics",
+    "load_running_statistics",
+    "save_result_with_statistics",
+    # Class ranking
+    "compute_ranks",
+    "is_ranked",
+    "rank_evaluation",
+    "ranking_method",
+    "update_student_rank",
+    # Cross-evaluation analytics
+    "AnalyticsStore",
+    "get_analytics_store",
+    "school_term",
+    # Item analysis
+    "analyze_results",
+    "compute_item_analysis",
     # PDF Reports
     "StudentReportGenerator",
     "generate_student_pdf_report",
+    # Class summary report
+    "ClassReportGenerator",
+    "compute_class_summary",
+    "generate_class_pdf_report",
+    # Bulk report generation and report cache
+    "ensure_class_report",
+    "ensure_item_analysis",
+    "ensure_student_report",
+    "generate_evaluation_reports",
+    "is_generation_running",
+    "list_result_files",
+    "load_generation_status",
+    "start_generation",
+    "stream_reports_zip",
+    # Results export
+    "stream_results_csv",
+    "stream_results_xlsx",
 ]
\ No newline at end of file
@@ -3,6 +3,11 @@ services/ai_correction_service.py
 =================================
 Moteur de correction IA integre avec commentaires intelligents par question
 Compatible avec la structure FastAPI
+
+En mode commentaires differes (CORRECTION_LAZY_FEEDBACK), la correction ne
+demande que les notes (sortie courte) ; les commentaires, conseils et le
+diagnostic sont generes par generate_feedback a la premiere consultation
+du resultat (voir services/feedback_service.py).
 """
 
 import os
@@ -13,6 +18,7 @@ from pathlib import Path
 from openai import OpenAI
 
 from ..config import settings
+from .llm_mock import create_mock_openai_client
 
 
 class SpecializedPromptBuilder:
@@ -173,9 +179,9 @@ class SpecializedPromptBuilder:
 class AICorrectionEngine:
     """Moteur de correction IA integre"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[OpenAI] = None):
         """Initialise le moteur IA"""
-        self.client = self._init_openai_client()
+        self.client = client or self._init_openai_client()
         self.prompt_builder = SpecializedPromptBuilder()
         self.correction_profiles = {
             "excellence": {
@@ -197,16 +203,19 @@ class AICorrectionEngine:
 
     def _init_openai_client(self) -> OpenAI:
         """Initialise le client OpenAI"""
+        if settings.LLM_MOCK:
+            return create_mock_openai_client()
         api_key = settings.OPENAI_API_KEY
         if not api_key:
             raise ValueError("Cle API OpenAI manquante. Configurez OPENAI_API_KEY")
-        return OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, base_url=settings.OPENAI_BASE_URL or None)
 
     def process_evaluation_copies(
         self,
         evaluation_info: Dict,
         copies_data: List[Dict],
-        profile: str = "equilibre"
+        profile: str = "equilibre",
+        lazy_feedback: Optional[bool] = None
     ) -> List[Dict]:
         """
         Traite toutes les copies d'une evaluation avec l'IA specialisee
@@ -215,12 +224,16 @@ class AICorrectionEngine:
             evaluation_info: Informations de l'evaluation
             copies_data: Liste des copies avec leurs transcriptions
             profile: Profil de correction ("excellence", "equilibre", "rapide")
+            lazy_feedback: Notes seules, commentaires differes
+                (CORRECTION_LAZY_FEEDBACK par defaut)
 
         Returns:
             Liste des resultats de correction
         """
         if profile not in self.correction_profiles:
             profile = "equilibre"
+        if lazy_feedback is None:
+            lazy_feedback = settings.CORRECTION_LAZY_FEEDBACK
 
         config = self.correction_profiles[profile]
         results = []
@@ -237,7 +250,8 @@ class AICorrectionEngine:
                     bareme,
                     evaluation_info,
                     config,
-                    specialized_expertise
+                    specialized_expertise,
+                    with_feedback=not lazy_feedback
                 )
 
                 # Formatage du resultat
@@ -245,11 +259,12 @@ class AICorrectionEngine:
                     correction,
                     copy_data.get('etudiant_nom', f'Etudiant{i+1}'),
                     copy_data.get('etudiant_prenom', f'Prenom{i+1}'),
-                    i + 1,
                     profile,
                     bareme,
                     specialized_expertise
                 )
+                if lazy_feedback:
+                    self._mark_feedback_pending(result, copy_data.get('transcription', ''))
 
                 results.append(result)
 
@@ -257,8 +272,7 @@ class AICorrectionEngine:
                 error_result = self._create_error_result(
                     copy_data.get('etudiant_nom', f'Etudiant{i+1}'),
                     copy_data.get('etudiant_prenom', f'Prenom{i+1}'),
-                    str(e),
-                    i + 1
+                    str(e)
                 )
                 results.append(error_result)
 
@@ -270,12 +284,15 @@ class AICorrectionEngine:
         evaluation_info: Dict,
         student_name: str,
         student_firstname: str,
-        profile: str = "equilibre"
+        profile: str = "equilibre",
+        lazy_feedback: Optional[bool] = None
     ) -> Dict:
         """Corrige une seule copie"""
 
         if profile not in self.correction_profiles:
             profile = "equilibre"
+        if lazy_feedback is None:
+            lazy_feedback = settings.CORRECTION_LAZY_FEEDBACK
 
         config = self.correction_profiles[profile]
         matiere = evaluation_info.get('matiere', 'General')
@@ -288,20 +305,23 @@ class AICorrectionEngine:
                 bareme,
                 evaluation_info,
                 config,
-                specialized_expertise
+                specialized_expertise,
+                with_feedback=not lazy_feedback
             )
 
-            return self._format_result(
+            result = self._format_result(
                 correction,
                 student_name,
                 student_firstname,
-                1,
                 profile,
                 bareme,
                 specialized_expertise
             )
+            if lazy_feedback:
+                self._mark_feedback_pending(result, transcription)
+            return result
         except Exception as e:
-            return self._create_error_result(student_name, student_firstname, str(e), 1)
+            return self._create_error_result(student_name, student_firstname, str(e))
 
     def _correct_with_ai_expert(
         self,
@@ -309,11 +329,18 @@ class AICorrectionEngine:
         bareme: Dict,
         evaluation_info: Dict,
         config: Dict,
-        specialized_expertise: Dict
+        specialized_expertise: Dict,
+        with_feedback: bool = True
     ) -> Dict:
-        """Correction par expert IA (GPT-4)"""
+        """
+        Correction par expert IA (GPT-4)
+
+        with_feedback=False : passe de notation seule (notes par question,
+        sortie limitee a CORRECTION_SCORING_MAX_TOKENS)
+        """
 
-        prompt = self._build_expert_prompt(bareme, evaluation_info, specialized_expertise)
+        prompt = self._build_expert_prompt(bareme, evaluation_info, specialized_expertise, with_feedback)
+        max_tokens = config["max_tokens"] if with_feedback else settings.CORRECTION_SCORING_MAX_TOKENS
 
         try:
             response = self.client.chat.completions.create(
@@ -323,7 +350,7 @@ class AICorrectionEngine:
                     {"role": "user", "content": f"Voici la copie a corriger :\n\n{transcription}"}
                 ],
                 temperature=config["temperature"],
-                max_tokens=config["max_tokens"]
+                max_tokens=max_tokens
             )
 
             correction_text = response.choices[0].message.content
@@ -340,9 +367,10 @@ class AICorrectionEngine:
         self,
         bareme: Dict,
         evaluation_info: Dict,
-        specialized_expertise: Dict
+        specialized_expertise: Dict,
+        with_feedback: bool = True
     ) -> str:
-        """Construit le prompt pour l'expert correcteur"""
+        """Construit le prompt pour l'expert correcteur (notes seules si with_feedback=False)"""
 
         matiere = evaluation_info.get('matiere', 'General')
         classe = evaluation_info.get('classe', 'Inconnue')
@@ -370,6 +398,11 @@ Question {question.get('numero', 1)}: {question.get('intitule', 'Question')}
 - Type: {question.get('type', 'ouverte')}
 """
 
+        if not with_feedback:
+            prompt += """
+
+**NOTATION SEULE :** donne uniquement les notes, sans commentaire ni justification."""
+
         prompt += f"""
 
 **FORMAT DE REPONSE OBLIGATOIRE :**
@@ -380,10 +413,18 @@ DETAIL_PAR_QUESTION:"""
 
         for i, question in enumerate(bareme.get('questions', []), 1):
             prompt += f"""
-Q{i}: X.X/{question.get('points_total', 5)} - [POURCENTAGE: XX%]
+Q{i}: X.X/{question.get('points_total', 5)} - [POURCENTAGE: XX%]"""
+            if with_feedback:
+                prompt += f"""
 COMMENTAIRE_Q{i}: [Commentaire personnalise]
 CONSEIL_Q{i}: [Conseil specifique]"""
 
+        if not with_feedback:
+            return prompt + """
+```
+
+Analyse maintenant cette copie :"""
+
         prompt += """
 
 POINTS_FORTS:
@@ -409,6 +450,122 @@ Analyse maintenant cette copie :"""
 
         return prompt
 
+    def generate_feedback(self, result: Dict, evaluation_info: Dict) -> Dict:
+        """
+        Passe de commentaires d'une copie deja notee (mode commentaires differes)
+
+        Les notes du resultat sont conservees ; le modele ne redige que les
+        commentaires et conseils par question, les points forts et a ameliorer
+        et le diagnostic. Retourne le resultat complete (feedback_statut
+        "genere") ; leve une exception si l'appel echoue.
+        """
+        profile = result.get('qualite_correction', {}).get('profil_utilise', '').lower()
+        config = self.correction_profiles.get(profile, self.correction_profiles["equilibre"])
+        matiere = evaluation_info.get('matiere', 'General')
+        specialized_expertise = self.prompt_builder.get_specialized_expertise(matiere)
+
+        prompt = self._build_feedback_prompt(result, evaluation_info, specialized_expertise)
+        response = self.client.chat.completions.create(
+            model=config["model"],
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": f"Voici la copie corrigee :\n\n{result.get('transcription_copie', '')}"}
+            ],
+            temperature=config["temperature"],
+            max_tokens=config["max_tokens"]
+        )
+        feedback = self._parse_expert_response(response.choices[0].message.content)
+        return self._apply_feedback(result, feedback)
+
+    def _build_feedback_prompt(
+        self,
+        result: Dict,
+        evaluation_info: Dict,
+        specialized_expertise: Dict
+    ) -> str:
+        """Prompt de la passe de commentaires : notes deja attribuees, format des commentaires"""
+
+        classe = evaluation_info.get('classe', 'Inconnue')
+        note_max = result.get('note_maximale', 20)
+
+        prompt = f"""Tu es un {specialized_expertise['titre_expert']} pour la classe {classe}.
+
+{specialized_expertise['expertise_specifique']}
+
+**MISSION : COMMENTAIRES PERSONNALISES**
+Cette copie a deja ete notee {result.get('note_totale', 0)}/{note_max}. Ne modifie pas les notes :
+redige les commentaires et conseils qui les expliquent.
+
+{specialized_expertise['criteres_specialises']}
+
+**NOTES ATTRIBUEES :**"""
+
+        questions = result.get('questions', [])
+        for i, question in enumerate(questions, 1):
+            prompt += f"""
+Question {i}: {question.get('intitule', 'Question')} - {question.get('note', 0)}/{question.get('note_max', 5)}"""
+
+        prompt += """
+
+**FORMAT DE REPONSE OBLIGATOIRE :**
+```"""
+
+        for i in range(1, len(questions) + 1):
+            prompt += f"""
+COMMENTAIRE_Q{i}: [Commentaire personnalise]
+CONSEIL_Q{i}: [Conseil specifique]"""
+
+        prompt += """
+
+POINTS_FORTS:
+- [Point fort 1]
+- [Point fort 2]
+
+POINTS_AMELIORATION:
+- [Point amelioration 1]
+- [Point amelioration 2]
+
+COMMENTAIRE_GENERAL:
+[Commentaire global]
+
+CONSEILS_PERSONNALISES:
+- [Conseil 1]
+- [Conseil 2]
+
+DIAGNOSTIC_PERFORMANCE:
+[Diagnostic global]
+```"""
+
+        return prompt
+
+    def _apply_feedback(self, result: Dict, feedback: Dict) -> Dict:
+        """Reporte les commentaires generes dans le resultat (notes inchangees)"""
+        completed = dict(result)
+        completed["questions"] = [
+            {
+                **question,
+                "commentaire_intelligent": feedback.get("commentaires_par_question", {}).get(f"Q{i}", ""),
+                "conseil_personnalise": feedback.get("conseils_par_question", {}).get(f"Q{i}", "")
+            }
+            for i, question in enumerate(result.get("questions", []), 1)
+        ]
+        completed.update({
+            "commentaires_generaux": feedback.get("commentaires", ""),
+            "points_forts": feedback.get("points_forts", [])[:3],
+            "points_amelioration": feedback.get("points_amelioration", [])[:3],
+            "conseils_personnalises": feedback.get("conseils", [])[:3],
+            "diagnostic_performance": feedback.get("diagnostic_performance", ""),
+            "feedback_statut": "genere",
+            "date_feedback": datetime.now().isoformat()
+        })
+        completed.pop("transcription_copie", None)
+        return completed
+
+    def _mark_feedback_pending(self, result: Dict, transcription: str):
+        """Resultat note sans commentaires : la transcription est gardee pour la passe differee"""
+        result["feedback_statut"] = "en_attente"
+        result["transcription_copie"] = transcription
+
     def _parse_expert_response(self, response_text: str) -> Dict:
         """Parse la reponse de l'expert IA"""
 
@@ -508,12 +665,11 @@ Analyse maintenant cette copie :"""
         correction: Dict,
         student_name: str,
         student_firstname: str,
-        rank: int,
         profile: str,
         bareme: Dict,
         specialized_expertise: Dict
     ) -> Dict:
-        """Formate le resultat"""
+        """Formate le resultat (rang_classe est ecrit par ranking_service sur toute la classe)"""
 
         note_totale = correction.get("note_totale", 0.0)
         note_max = bareme.get('note_totale', 20.0)
@@ -545,7 +701,6 @@ Analyse maintenant cette copie :"""
             "note_totale": round(note_totale, 1),
             "note_maximale": note_max,
             "pourcentage": round((note_totale / note_max) * 100, 1) if note_max > 0 else 0.0,
-            "rang_classe": rank,
             "timestamp": datetime.now().isoformat(),
             "commentaires_generaux": correction.get("commentaires", ""),
             "points_forts": correction.get("points_forts", [])[:3],
@@ -578,8 +733,7 @@ Analyse maintenant cette copie :"""
         self,
         student_name: str,
         student_firstname: str,
-        error_msg: str,
-        rank: int
+        error_msg: str
     ) -> Dict:
         """Cree un resultat d'erreur"""
         return {
@@ -588,7 +742,6 @@ Analyse maintenant cette copie :"""
             "note_totale": 0.0,
             "note_maximale": 20.0,
             "pourcentage": 0.0,
-            "rang_classe": rank,
             "timestamp": datetime.now().isoformat(),
             "commentaires_generaux": f"Erreur lors de la correction: {error_msg}",
             "points_forts": [],
@@ -608,11 +761,12 @@ Analyse maintenant cette copie :"""
 def process_copies_with_ai(
     evaluation_info: Dict,
     copies_data: List[Dict],
-    profile: str = "equilibre"
+    profile: str = "equilibre",
+    lazy_feedback: Optional[bool] = None
 ) -> List[Dict]:
     """Interface simple pour traiter les copies avec l'IA"""
     engine = AICorrectionEngine()
-    return engine.process_evaluation_copies(evaluation_info, copies_data, profile)
+    return engine.process_evaluation_copies(evaluation_info, copies_data, profile, lazy_feedback)
 
 
 def correct_single_copy_with_ai(
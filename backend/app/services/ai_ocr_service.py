@@ -5,36 +5,279 @@ Service OCR pour transcrire les copies manuscrites avec OpenAI Vision
 """
 
 import base64
+import hashlib
 import io
+import mimetypes
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
 from openai import OpenAI
 import fitz  # PyMuPDF
+import numpy as np
 
 from ..config import settings
+from .llm_mock import create_mock_openai_client
+from .ocr_preprocessing import ImagePreprocessor, is_blank_page, page_ink_metrics
+from .ocr_cache import OCRTranscriptionCache, build_cache_key, get_ocr_cache
+from .ocr_engines import OCREngine, OCREngineRouter, VisionOCREngine
+
+OCR_MODEL = "gpt-4o"
+
+PDFSource = Union[str, Path, bytes, bytearray, memoryview]
+
+# Limite globale des appels vision simultanes (tous documents confondus)
+_vision_slots = threading.BoundedSemaphore(max(1, settings.OCR_MAX_CONCURRENT_REQUESTS))
+
+# Marqueur de page des requetes vision groupees
+PAGE_MARKER = "=== PAGE {numero} ==="
+_PAGE_MARKER_RE = re.compile(r"^[ \t]*=+[ \t]*PAGE[ \t]+(\d+)[ \t]*=+[ \t]*$", re.MULTILINE)
+
+
+def _image_mime_type(filename: str) -> str:
+    """Type MIME d'une image d'apres son extension (PNG par defaut)"""
+    mime_type, _ = mimetypes.guess_type(filename)
+    return mime_type if mime_type and mime_type.startswith("image/") else "image/png"
+
+
+class _VisionBatch:
+    """Pages peu denses en attente d'un envoi groupe"""
+
+    def __init__(self):
+        self.images: List[Dict] = []
+        self.future: Future = Future()
+
+    def add(self, image: Dict) -> Tuple[Future, int]:
+        self.images.append(image)
+        return self.future, len(self.images) - 1
+
+
+def _relay_future(source: Future, target: Future):
+    """Recopie le resultat d'un appel groupe dans le futur partage par ses pages"""
+    error = source.exception()
+    if error is not None:
+        target.set_exception(error)
+    else:
+        target.set_result(source.result())
+
+
+class PageRenderer:
+    """
+    Preparation des pages PDF avant l'OCR, sans appel reseau : couche texte
+    integree, rendu de l'image, detection des pages blanches
+
+    Ne depend que de PyMuPDF et du pretraitement : utilisable dans un
+    processus de rendu separe (voir services/ocr_pipeline.py).
+    """
+
+    def __init__(
+        self,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        skip_blank_pages: Optional[bool] = None,
+        local_dpi: Optional[int] = None,
+        draft_short_side: Optional[int] = None
+    ):
+        self.preprocessor = preprocessor
+        if self.preprocessor is None and settings.OCR_PREPROCESSING:
+            self.preprocessor = ImagePreprocessor()
+        self.skip_blank_pages = settings.OCR_SKIP_BLANK_PAGES if skip_blank_pages is None else skip_blank_pages
+        # Resolution du rendu supplementaire destine au moteur OCR local (None = pas de rendu)
+        self.local_dpi = local_dpi
+        # Petit cote de l'image de premiere passe vision (None = une seule passe)
+        self.draft_short_side = draft_short_side
+
+    def options(self) -> Dict:
+        """
+        Parametres du rendu, transmis aux processus de rendu (le
+        pretraitement, eventuellement personnalise, est transmis tel quel)
+        """
+        return {
+            "preprocessor": self.preprocessor,
+            "skip_blank_pages": self.skip_blank_pages,
+            "local_dpi": self.local_dpi,
+            "draft_short_side": self.draft_short_side
+        }
+
+    def iter_pages(self, source: PDFSource, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Genere les pages preparees d'un PDF (pages start a stop exclue), une a une
+
+        Un chemin est lu a la demande par MuPDF, des bytes ne sont pas
+        recopies, et chaque pixmap est liberee des l'encodage.
+        """
+        doc = self.open_pdf(source)
+        try:
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            for number in range(start, stop):
+                page = doc[number]
+                prepared = self.prepare_page(page)
+                del page
+                # Vider le cache de ressources MuPDF (images decodees)
+                fitz.TOOLS.store_shrink(100)
+                yield prepared
+        finally:
+            doc.close()
+
+    @staticmethod
+    def open_pdf(source: PDFSource) -> "fitz.Document":
+        """Ouvre un PDF depuis un chemin ou un buffer"""
+        if isinstance(source, (str, Path)):
+            return fitz.open(str(source))
+        if not isinstance(source, bytes):
+            source = bytes(source)
+        return fitz.open(stream=source, filetype="pdf")
+
+    def prepare_page(self, page: "fitz.Page") -> Dict:
+        """
+        Prepare une page : {"page", "source", "text"} pour le texte integre et
+        les pages blanches, {"page", "source": "vision", "image"} sinon
+        """
+        page_num = page.number + 1
+
+        # Couche texte exploitable (copie tapee) : pas d'appel vision
+        text_layer = self.extract_text_layer(page)
+        if text_layer is not None:
+            return {"page": page_num, "source": "texte_integre", "text": text_layer}
+
+        # Convertir la page en image
+        image = self.render_page(page)
+
+        # Page blanche (verso vide, page de reponse inutilisee) : pas d'appel vision
+        if self.skip_blank_pages and is_blank_page(image):
+            return {"page": page_num, "source": "page_blanche", "text": ""}
+
+        if self.local_dpi:
+            image["local_image_bytes"] = self.render_local_image(page)
+
+        return {"page": page_num, "source": "vision", "image": image}
+
+    def extract_text_layer(self, page: "fitz.Page") -> Optional[str]:
+        """
+        Retourne le texte integre d'une page s'il est exploitable, sinon None
+
+        Heuristique : assez de caracteres, majorite de caracteres lisibles,
+        longueur moyenne des mots plausible, et page qui n'est pas un scan
+        (une image couvrant la page porte souvent une couche OCR de mauvaise
+        qualite ajoutee par le scanner).
+        """
+        if not settings.OCR_TEXT_LAYER_FAST_PATH:
+            return None
+
+        text = page.get_text("text").strip()
+        visible = [c for c in text if not c.isspace()]
+        if len(visible) < settings.OCR_TEXT_LAYER_MIN_CHARS:
+            return None
+
+        readable = sum(1 for c in visible if c.isalnum() or c in ".,;:!?'\"()[]{}-+=*/%<>")
+        if readable / len(visible) < 0.8 or text.count("\ufffd") > len(visible) * 0.01:
+            return None
+
+        words = text.split()
+        average_word = sum(len(w) for w in words) / len(words)
+        if not 2 <= average_word <= 15:
+            return None
+
+        page_area = abs(page.rect) or 1
+        image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+        if image_area / page_area > 0.6:
+            return None
+
+        return text
+
+    def render_page(self, page: "fitz.Page") -> Dict:
+        """Rend une page en image prete pour l'OCR (pretraitee si active)"""
+        if self.preprocessor:
+            return self.preprocessor.render_page(page, draft_short_side=self.draft_short_side)
+
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
+        img_bytes = pix.tobytes("png")
+        gray = fitz.Pixmap(fitz.csGRAY, pix)
+        metrics = page_ink_metrics(
+            np.frombuffer(gray.samples, dtype=np.uint8).reshape(gray.height, gray.width)
+        )
+        pix = gray = None  # liberer les pixmaps immediatement
+        return {"image_bytes": img_bytes, "mime_type": "image/png", **metrics}
+
+    def render_local_image(self, page: "fitz.Page") -> bytes:
+        """Rendu PNG en niveaux de gris a local_dpi pour le moteur OCR local"""
+        pix = page.get_pixmap(dpi=self.local_dpi, colorspace=fitz.csGRAY, alpha=False)
+        img_bytes = pix.tobytes("png")
+        pix = None
+        return img_bytes
 
 
 class OCRProcessor:
     """Processeur OCR utilisant GPT-4 Vision pour les copies manuscrites"""
 
-    def __init__(self):
-        self.client = self._init_openai_client()
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        max_concurrent_pages: Optional[int] = None,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        cache: Optional[OCRTranscriptionCache] = None,
+        cache_namespace: Optional[str] = None,
+        tiling_max_pages: Optional[int] = None,
+        tiling_max_ink_density: Optional[float] = None,
+        skip_blank_pages: Optional[bool] = None,
+        engine_mode: Optional[str] = None,
+        local_engine: Optional[OCREngine] = None,
+        draft_pass: Optional[bool] = None
+    ):
+        # Client OpenAI cree au premier appel vision : le mode local
+        # fonctionne sans cle API
+        self._client = client
+        self._client_lock = threading.Lock()
         self.supported_formats = ['.pdf', '.png', '.jpg', '.jpeg', '.webp', '.gif']
+        self.max_concurrent_pages = max(1, max_concurrent_pages or settings.OCR_MAX_CONCURRENT_PAGES)
+        self.engine_router = OCREngineRouter(VisionOCREngine(self), local_engine, engine_mode)
+        draft_pass = settings.OCR_DRAFT_PASS if draft_pass is None else draft_pass
+        self.draft_detail = settings.OCR_DRAFT_DETAIL
+        self.draft_min_confidence = settings.OCR_DRAFT_MIN_CONFIDENCE
+        self.renderer = PageRenderer(
+            preprocessor, skip_blank_pages,
+            local_dpi=settings.OCR_LOCAL_DPI if self.engine_router.uses_local else None,
+            draft_short_side=(
+                settings.OCR_DRAFT_SHORT_SIDE if draft_pass and self.engine_router.mode != "local" else None
+            )
+        )
+        self.preprocessor = self.renderer.preprocessor
+        self.cache = cache
+        if self.cache is None and settings.OCR_CACHE_ENABLED:
+            self.cache = get_ocr_cache()
+        self.cache_namespace = cache_namespace
+        self.tiling_max_pages = max(1, tiling_max_pages or settings.OCR_TILING_MAX_PAGES)
+        self.tiling_max_ink_density = (
+            settings.OCR_TILING_MAX_INK_DENSITY if tiling_max_ink_density is None else tiling_max_ink_density
+        )
+
+    @property
+    def client(self) -> OpenAI:
+        """Client OpenAI, initialise a la premiere transcription par le moteur vision"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._init_openai_client()
+        return self._client
 
     def _init_openai_client(self) -> OpenAI:
         """Initialise le client OpenAI"""
+        if settings.LLM_MOCK:
+            return create_mock_openai_client()
         api_key = settings.OPENAI_API_KEY
         if not api_key:
             raise ValueError("Cle API OpenAI manquante")
-        return OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, base_url=settings.OPENAI_BASE_URL or None)
 
     def transcribe_file(
         self,
         file_path: str,
         matiere: str = "general",
-        detailed: bool = True
+        detailed: bool = True,
+        on_page: Optional[Callable[[Dict], None]] = None
     ) -> Dict:
         """
         Transcrit un fichier (PDF ou image) en texte
@@ -43,6 +286,7 @@ class OCRProcessor:
             file_path: Chemin vers le fichier
             matiere: Matiere pour adapter la transcription
             detailed: Si True, retourne une analyse detaillee
+            on_page: Appele avec chaque resultat de page PDF des qu'il est pret
 
         Returns:
             Dict avec transcription et metadonnees
@@ -57,7 +301,7 @@ class OCRProcessor:
 
         try:
             if path.suffix.lower() == '.pdf':
-                return self._transcribe_pdf(path, matiere, detailed)
+                return self._transcribe_pdf(path, matiere, detailed, on_page)
             else:
                 return self._transcribe_image(path, matiere, detailed)
         except Exception as e:
@@ -68,7 +312,8 @@ class OCRProcessor:
         file_bytes: bytes,
         filename: str,
         matiere: str = "general",
-        detailed: bool = True
+        detailed: bool = True,
+        on_page: Optional[Callable[[Dict], None]] = None
     ) -> Dict:
         """
         Transcrit des bytes (upload direct) en texte
@@ -78,6 +323,7 @@ class OCRProcessor:
             filename: Nom du fichier pour determiner le format
             matiere: Matiere pour adapter la transcription
             detailed: Si True, retourne une analyse detaillee
+            on_page: Appele avec chaque resultat de page PDF des qu'il est pret
 
         Returns:
             Dict avec transcription et metadonnees
@@ -89,134 +335,411 @@ class OCRProcessor:
 
         try:
             if suffix == '.pdf':
-                return self._transcribe_pdf_bytes(file_bytes, matiere, detailed)
+                return self._transcribe_pdf(file_bytes, matiere, detailed, on_page)
             else:
-                return self._transcribe_image_bytes(file_bytes, matiere, detailed)
+                return self._transcribe_uploaded_image(file_bytes, matiere, detailed, _image_mime_type(filename))
         except Exception as e:
             return self._error_result(str(e))
 
-    def _transcribe_pdf(self, path: Path, matiere: str, detailed: bool) -> Dict:
-        """Transcrit un PDF page par page"""
-        doc = fitz.open(str(path))
-        all_text = []
+    def _transcribe_pdf(
+        self,
+        source: PDFSource,
+        matiere: str,
+        detailed: bool,
+        on_page: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Transcrit un PDF (chemin ou bytes) page par page"""
+        return self.transcribe_prepared(self.renderer.iter_pages(source), matiere, detailed, on_page)
+
+    def transcribe_prepared(
+        self,
+        pages: Iterable[Dict],
+        matiere: str = "general",
+        detailed: bool = True,
+        on_page: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Transcrit un document deja prepare par PageRenderer (rendu hors processus)"""
         page_results = []
+        for page_result in self.iter_prepared_pages(pages, matiere, detailed):
+            page_results.append(page_result)
+            if on_page:
+                on_page(page_result)
 
-        for page_num, page in enumerate(doc):
-            # Convertir la page en image
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-            img_bytes = pix.tobytes("png")
+        return self._build_document_result(page_results, matiere)
 
-            # Transcrire l'image
-            page_result = self._transcribe_image_bytes(img_bytes, matiere, detailed)
-            page_results.append({
-                "page": page_num + 1,
-                "text": page_result.get("transcribed_text", ""),
-                "confidence": page_result.get("confidence", 0)
-            })
-            all_text.append(page_result.get("transcribed_text", ""))
+    def iter_pdf_pages(
+        self,
+        source: PDFSource,
+        matiere: str = "general",
+        detailed: bool = True
+    ) -> Iterator[Dict]:
+        """Genere les resultats de page d'un PDF, dans l'ordre, au fil de l'eau"""
+        return self.iter_prepared_pages(self.renderer.iter_pages(source), matiere, detailed)
 
-        doc.close()
+    def iter_prepared_pages(
+        self,
+        pages: Iterable[Dict],
+        matiere: str = "general",
+        detailed: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Genere les resultats de page, dans l'ordre, a partir des pages preparees
+
+        Les pages sont consommees une a une : le rendu reste sequentiel
+        (PyMuPDF n'est pas thread-safe), les appels vision sont repartis sur
+        max_concurrent_pages threads et bornes globalement par _vision_slots.
+        Au plus 2 x max_concurrent_pages pages rendues sont en attente : la
+        memoire reste constante quel que soit le nombre de pages.
+
+        Si tiling_max_pages > 1 (moteur vision seul), les pages peu denses
+        (densite d'encre sous tiling_max_ink_density) sont regroupees par
+        tiling_max_pages dans une seule requete vision, puis la reponse est
+        redecoupee par page.
+        """
+        max_in_flight = max(self.max_concurrent_pages * 2, self.tiling_max_pages)
+        tiling = self.tiling_max_pages > 1 and self.engine_router.mode == "vision"
 
-        full_text = "\n\n--- Page suivante ---\n\n".join(all_text)
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_pages) as executor:
+            pending = deque()
+            batch = _VisionBatch() if tiling else None
+            for prepared in pages:
+                pending.append(self._submit_page(executor, prepared, matiere, detailed, batch))
 
-        return {
-            "transcribed_text": full_text,
-            "confidence": sum(p["confidence"] for p in page_results) / len(page_results) if page_results else 0,
-            "page_count": len(page_results),
-            "pages": page_results,
-            "matiere": matiere,
-            "processing_time": datetime.now().isoformat(),
-            "word_count": len(full_text.split()),
-            "character_count": len(full_text)
-        }
-
-    def _transcribe_pdf_bytes(self, pdf_bytes: bytes, matiere: str, detailed: bool) -> Dict:
-        """Transcrit un PDF depuis des bytes"""
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        all_text = []
-        page_results = []
+                if tiling and len(batch.images) >= self.tiling_max_pages:
+                    batch = self._flush_batch(executor, batch, matiere, detailed)
 
-        for page_num, page in enumerate(doc):
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img_bytes = pix.tobytes("png")
+                while pending and (len(pending) >= max_in_flight or self._is_ready(pending[0])):
+                    if tiling and pending[0][2] is batch.future:
+                        batch = self._flush_batch(executor, batch, matiere, detailed)
+                    yield self._collect_page(pending.popleft())
 
-            page_result = self._transcribe_image_bytes(img_bytes, matiere, detailed)
-            page_results.append({
-                "page": page_num + 1,
-                "text": page_result.get("transcribed_text", ""),
-                "confidence": page_result.get("confidence", 0)
-            })
-            all_text.append(page_result.get("transcribed_text", ""))
+            if tiling:
+                self._flush_batch(executor, batch, matiere, detailed)
+            while pending:
+                yield self._collect_page(pending.popleft())
 
-        doc.close()
+    def _submit_page(
+        self,
+        executor: ThreadPoolExecutor,
+        prepared: Dict,
+        matiere: str,
+        detailed: bool,
+        batch: Optional[_VisionBatch] = None
+    ) -> Tuple[int, str, Union[str, Future], Optional[int]]:
+        """Page preparee : resultat immediat, page a regrouper ou envoi au pool vision"""
+        page_num, source = prepared["page"], prepared["source"]
+        if source != "vision":
+            return page_num, source, prepared["text"], None
+
+        image = prepared["image"]
+        if batch is not None and self._is_tileable(image):
+            future, index = batch.add(image)
+            return page_num, source, future, index
+
+        future = executor.submit(self._transcribe_page_image, image, matiere, detailed)
+        return page_num, source, future, None
+
+    def _is_tileable(self, image: Dict) -> bool:
+        """Page assez peu dense pour partager une requete vision"""
+        density = image.get("ink_density")
+        return density is not None and density <= self.tiling_max_ink_density
+
+    def _flush_batch(
+        self,
+        executor: ThreadPoolExecutor,
+        batch: _VisionBatch,
+        matiere: str,
+        detailed: bool
+    ) -> _VisionBatch:
+        """Envoie les pages regroupees et retourne un nouveau lot vide"""
+        if batch.images:
+            future = executor.submit(self._transcribe_image_batch, batch.images, matiere, detailed)
+            future.add_done_callback(lambda done, target=batch.future: _relay_future(done, target))
+        return _VisionBatch()
+
+    def _is_ready(self, entry: Tuple[int, str, Union[str, Future], Optional[int]]) -> bool:
+        item = entry[2]
+        return not isinstance(item, Future) or item.done()
+
+    def _collect_page(self, entry: Tuple[int, str, Union[str, Future], Optional[int]]) -> Dict:
+        """Construit le resultat d'une page (attend la transcription si besoin)"""
+        page_num, source, item, batch_index = entry
+
+        if source == "texte_integre":
+            return {
+                "page": page_num,
+                "text": item,
+                "confidence": 1.0,
+                "source": source
+            }
 
-        full_text = "\n\n--- Page suivante ---\n\n".join(all_text)
+        if source == "page_blanche":
+            return {
+                "page": page_num,
+                "text": "",
+                "confidence": 1.0,
+                "source": source,
+                "blank": True
+            }
 
-        return {
+        page_result = item.result()
+        if batch_index is not None:
+            page_result = page_result[batch_index]
+        page = {
+            "page": page_num,
+            "text": page_result.get("transcribed_text", ""),
+            "confidence": page_result.get("confidence", 0),
+            "source": source,
+            "cache_hit": page_result.get("cache_hit", False),
+            "tiled": page_result.get("tiled", False),
+            "engine": page_result.get("engine", "vision"),
+            "escalated": page_result.get("escalated", False),
+            "resolution": page_result.get("resolution", "pleine"),
+            "retried": page_result.get("retried", False),
+            "attempts": page_result.get("attempts", [])
+        }
+        if page_result.get("error"):
+            page["error"] = page_result["error"]
+        return page
+
+    def _build_document_result(self, page_results: List[Dict], matiere: str) -> Dict:
+        """Assemble le resultat d'un document a partir des resultats par page"""
+        # Les pages blanches ne comptent ni dans le texte ni dans la confiance
+        written_pages = [p for p in page_results if not p.get("blank")]
+        full_text = "\n\n--- Page suivante ---\n\n".join(p["text"] for p in written_pages)
+        failed_pages = [p for p in page_results if p.get("error")]
+
+        result = {
             "transcribed_text": full_text,
-            "confidence": sum(p["confidence"] for p in page_results) / len(page_results) if page_results else 0,
+            "confidence": sum(p["confidence"] for p in written_pages) / len(written_pages) if written_pages else 0,
             "page_count": len(page_results),
+            "blank_pages": len(page_results) - len(written_pages),
+            "text_layer_pages": sum(1 for p in page_results if p.get("source") == "texte_integre"),
+            "cache_hits": sum(1 for p in page_results if p.get("cache_hit")),
+            "tiled_pages": sum(1 for p in page_results if p.get("tiled")),
+            "local_pages": sum(1 for p in page_results if p.get("engine", "vision") != "vision"),
+            "escalated_pages": sum(1 for p in page_results if p.get("escalated")),
+            "draft_pages": sum(1 for p in page_results if p.get("resolution") == "brouillon"),
+            "retried_pages": sum(1 for p in page_results if p.get("retried")),
+            "failed_pages": len(failed_pages),
             "pages": page_results,
             "matiere": matiere,
             "processing_time": datetime.now().isoformat(),
             "word_count": len(full_text.split()),
             "character_count": len(full_text)
         }
+        # Une page en echec rend la transcription incomplete : le document
+        # porte l'erreur pour ne pas etre enregistre ni reutilise tel quel
+        if failed_pages:
+            result["error"] = "; ".join(f"page {p['page']}: {p['error']}" for p in failed_pages)
+        return result
 
     def _transcribe_image(self, path: Path, matiere: str, detailed: bool) -> Dict:
         """Transcrit une image"""
         with open(path, "rb") as f:
             img_bytes = f.read()
-        return self._transcribe_image_bytes(img_bytes, matiere, detailed)
+        return self._transcribe_uploaded_image(img_bytes, matiere, detailed, _image_mime_type(path.name))
+
+    def _transcribe_uploaded_image(
+        self,
+        img_bytes: bytes,
+        matiere: str,
+        detailed: bool,
+        mime_type: str = "image/png"
+    ) -> Dict:
+        """
+        Transcrit une image fournie telle quelle (pretraitee si possible)
 
-    def _transcribe_image_bytes(self, img_bytes: bytes, matiere: str, detailed: bool) -> Dict:
+        Si le pretraitement echoue, l'image d'origine est envoyee avec son
+        type MIME reel (celui de l'upload).
+        """
+        image = {"image_bytes": img_bytes, "mime_type": mime_type}
+        if self.preprocessor:
+            try:
+                image = self.preprocessor.preprocess_bytes(
+                    img_bytes, draft_short_side=self.renderer.draft_short_side
+                )
+            except Exception as e:
+                print(f"Pretraitement impossible, image d'origine envoyee ({mime_type}): {e}")
+        # Le moteur local lit l'image d'origine (resolution native)
+        image["local_image_bytes"] = img_bytes
+        return self._transcribe_page_image(image, matiere, detailed)
+
+    def _transcribe_page_image(self, image: Dict, matiere: str, detailed: bool) -> Dict:
+        """Transcrit une image de page avec le moteur choisi par le routeur"""
+        try:
+            return self.engine_router.transcribe(image, matiere, detailed)
+        except Exception as e:
+            return self._error_result(str(e))
+
+    def _transcribe_image_bytes(
+        self,
+        img_bytes: bytes,
+        matiere: str,
+        detailed: bool,
+        mime_type: str = "image/png",
+        detail: Optional[str] = None
+    ) -> Dict:
         """Transcrit une image depuis des bytes avec GPT-4 Vision"""
 
-        base64_image = base64.b64encode(img_bytes).decode('utf-8')
         prompt = self._build_ocr_prompt(matiere, detailed)
 
+        cache_key, cached = self._cache_lookup(img_bytes, matiere, prompt, detail)
+        if cached:
+            return cached
+
         try:
+            transcription = self._request_transcription(
+                [{"type": "text", "text": prompt}, self._image_part(img_bytes, mime_type, detail)]
+            )
+            return self._store_transcription(cache_key, transcription, matiere)
+
+        except Exception as e:
+            return self._error_result(str(e))
+
+    def _transcribe_image_batch(self, images: List[Dict], matiere: str, detailed: bool) -> List[Dict]:
+        """
+        Transcrit plusieurs pages peu denses en un seul appel vision
+
+        Chaque image est precedee d'un marqueur de page que le modele recopie
+        en tete de sa transcription ; la reponse est redecoupee sur ces
+        marqueurs. Les pages deja en cache ne sont pas renvoyees. Si le
+        decoupage echoue (marqueurs manquants ou desordonnes), les pages sont
+        retranscrites une par une.
+        """
+        prompt = self._build_ocr_prompt(matiere, detailed)
+        results: List[Optional[Dict]] = [None] * len(images)
+        cache_keys: List[Optional[str]] = []
+
+        for index, image in enumerate(images):
+            cache_key, cached = self._cache_lookup(image["image_bytes"], matiere, prompt)
+            cache_keys.append(cache_key)
+            results[index] = cached
+
+        to_send = [index for index, result in enumerate(results) if result is None]
+        sections = None
+        if len(to_send) > 1:
+            content = [{"type": "text", "text": self._build_batch_prompt(prompt, len(to_send))}]
+            for position, index in enumerate(to_send, start=1):
+                content.append({"type": "text", "text": PAGE_MARKER.format(numero=position)})
+                content.append(self._image_part(images[index]["image_bytes"], images[index]["mime_type"]))
+            try:
+                sections = self._split_batch_response(self._request_transcription(content), len(to_send))
+            except Exception as e:
+                for index in to_send:
+                    results[index] = self._error_result(str(e))
+                return results
+
+        if sections is None:
+            for index in to_send:
+                image = images[index]
+                try:
+                    transcription = self._request_transcription(
+                        [{"type": "text", "text": prompt}, self._image_part(image["image_bytes"], image["mime_type"])]
+                    )
+                    results[index] = self._store_transcription(cache_keys[index], transcription, matiere)
+                except Exception as e:
+                    results[index] = self._error_result(str(e))
+            return results
+
+        for index, section in zip(to_send, sections):
+            results[index] = self._store_transcription(cache_keys[index], section, matiere)
+            results[index]["tiled"] = True
+        return results
+
+    def _split_batch_response(self, transcription: str, page_count: int) -> Optional[List[str]]:
+        """Decoupe une reponse groupee par marqueur de page (None si incoherente)"""
+        markers = list(_PAGE_MARKER_RE.finditer(transcription))
+        if [int(m.group(1)) for m in markers] != list(range(1, page_count + 1)):
+            return None
+
+        sections = []
+        for position, marker in enumerate(markers):
+            end = markers[position + 1].start() if position + 1 < len(markers) else len(transcription)
+            sections.append(transcription[marker.end():end].strip())
+        return sections
+
+    def _request_transcription(self, content: List[Dict]) -> str:
+        """Appel vision borne par la limite globale de requetes simultanees"""
+        with _vision_slots:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=OCR_MODEL,
                 messages=[
                     {
                         "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
+                        "content": content
                     }
                 ],
                 max_tokens=4096,
                 temperature=0.1
             )
+        return response.choices[0].message.content
 
-            transcription = response.choices[0].message.content
-
-            # Analyser la qualite de la transcription
-            confidence = self._estimate_confidence(transcription)
+    def _image_part(self, img_bytes: bytes, mime_type: str, detail: Optional[str] = None) -> Dict:
+        base64_image = base64.b64encode(img_bytes).decode('utf-8')
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{mime_type};base64,{base64_image}",
+                "detail": detail or settings.OCR_IMAGE_DETAIL
+            }
+        }
 
-            return {
+    def _cache_lookup(
+        self,
+        img_bytes: bytes,
+        matiere: str,
+        prompt: str,
+        detail: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[Dict]]:
+        """Cle de cache de la page et resultat deja transcrit s'il existe"""
+        if not self.cache:
+            return None, None
+        cache_key = build_cache_key(img_bytes, matiere, self._prompt_version(prompt, detail), OCR_MODEL)
+        cached = self.cache.get(cache_key, self.cache_namespace)
+        if not cached:
+            return cache_key, None
+        return cache_key, self._transcription_result(
+            cached["transcribed_text"], cached["confidence"], matiere, cache_hit=True
+        )
+
+    def _store_transcription(self, cache_key: Optional[str], transcription: str, matiere: str) -> Dict:
+        """Estime la confiance, met en cache et construit le resultat"""
+        confidence = self._estimate_confidence(transcription)
+
+        if cache_key:
+            self.cache.put(cache_key, {
                 "transcribed_text": transcription,
                 "confidence": confidence,
                 "matiere": matiere,
-                "processing_time": datetime.now().isoformat(),
-                "word_count": len(transcription.split()),
-                "character_count": len(transcription),
-                "model_used": "gpt-4o"
-            }
+                "model_used": OCR_MODEL
+            }, self.cache_namespace)
 
-        except Exception as e:
-            return self._error_result(str(e))
+        return self._transcription_result(transcription, confidence, matiere)
+
+    def _transcription_result(
+        self,
+        transcription: str,
+        confidence: float,
+        matiere: str,
+        cache_hit: bool = False
+    ) -> Dict:
+        """Resultat standard d'une transcription d'image"""
+        return {
+            "transcribed_text": transcription,
+            "confidence": confidence,
+            "matiere": matiere,
+            "processing_time": datetime.now().isoformat(),
+            "word_count": len(transcription.split()),
+            "character_count": len(transcription),
+            "model_used": OCR_MODEL,
+            "cache_hit": cache_hit
+        }
+
+    def _prompt_version(self, prompt: str, detail: Optional[str] = None) -> str:
+        """Version du prompt : toute modification du texte invalide le cache"""
+        detail = detail or settings.OCR_IMAGE_DETAIL
+        return hashlib.sha256(f"{prompt}|{detail}".encode("utf-8")).hexdigest()[:16]
 
     def _build_ocr_prompt(self, matiere: str, detailed: bool) -> str:
         """Construit le prompt OCR adapte a la matiere"""
@@ -279,6 +802,17 @@ ANALYSE:
 
         return prompt
 
+    def _build_batch_prompt(self, prompt: str, page_count: int) -> str:
+        """Adapte le prompt OCR a une requete contenant plusieurs pages"""
+        return prompt + f"""
+
+ATTENTION : cette requete contient {page_count} pages distinctes, chacune precedee
+de son marqueur ({PAGE_MARKER.format(numero="<numero>")}).
+- Transcris les pages dans l'ordre, sans jamais melanger leur contenu
+- Commence chaque transcription par une ligne contenant uniquement le marqueur de la page
+- La section ANALYSE eventuelle se place a la fin de chaque page, avant le marqueur suivant
+"""
+
     def _estimate_confidence(self, transcription: str) -> float:
         """Estime la confiance de la transcription"""
 
@@ -309,18 +843,20 @@ ANALYSE:
 # Interface simple
 def transcribe_manuscript(
     file_path: str,
-    matiere: str = "general"
+    matiere: str = "general",
+    evaluation_id: Optional[str] = None
 ) -> Dict:
     """Interface simple pour transcrire un fichier"""
-    processor = OCRProcessor()
+    processor = OCRProcessor(cache_namespace=evaluation_id)
     return processor.transcribe_file(file_path, matiere)
 
 
 def transcribe_manuscript_bytes(
     file_bytes: bytes,
     filename: str,
-    matiere: str = "general"
+    matiere: str = "general",
+    evaluation_id: Optional[str] = None
 ) -> Dict:
     """Interface simple pour transcrire des bytes"""
-    processor = OCRProcessor()
+    processor = OCRProcessor(cache_namespace=evaluation_id)
     return processor.transcribe_bytes(file_bytes, filename, matiere)
\ No newline at end of file
@@ -0,0 +1,349 @@
+"""
+services/analytics_service.py
+=============================
+Agregats multi-evaluations (suivi longitudinal)
+
+Les agregats sont materialises dans DATA_DIR/analytics/aggregats.json et
+mis a jour de facon incrementale a chaque enregistrement de resultats :
+
+- etudiants : note (ramenee sur 20) de chaque etudiant a chaque evaluation ;
+- evaluations : effectif, somme et somme des carres des notes, avec la
+  classe, la matiere, le trimestre et la date de l'evaluation ;
+- groupes : memes sommes par (classe, matiere, trimestre).
+
+Remplacer le resultat d'un etudiant retire son ancienne note des sommes
+avant d'ajouter la nouvelle : aucune mise a jour ne relit les resultats.
+Les requetes (series temporelles, comparaison de cohortes) ne lisent que
+ces agregats en memoire. rebuild() recalcule tout depuis les fichiers de
+resultats (initialisation ou verification).
+
+L'ecriture du fichier se fait hors du verrou des donnees : les mises a jour
+arrivees pendant une ecriture sont enregistrees ensemble par la suivante.
+Depuis une route async, passer par record_results_async (thread du pool
+par defaut) pour ne pas bloquer la boucle d'evenements.
+"""
+
+import asyncio
+import json
+import math
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..config import settings
+from ..utils.helpers import write_atomic
+from .statistics_service import total_score
+
+AGGREGATES_FILENAME = "aggregats.json"
+
+# Dimensions des cohortes (cles des groupes)
+COHORT_DIMENSIONS = ("classe", "matiere", "terme")
+
+UNKNOWN = "inconnu"
+
+
+def school_term(date_value: Optional[str]) -> str:
+    """Trimestre scolaire d'une date : '2024-2025 T1' (sept-dec), T2 (jan-mars), T3 (avr-aout)"""
+    try:
+        date = datetime.fromisoformat(str(date_value)[:10])
+    except (TypeError, ValueError):
+        return UNKNOWN
+    if date.month >= 9:
+        return f"{date.year}-{date.year + 1} T1"
+    term = "T2" if date.month <= 3 else "T3"
+    return f"{date.year - 1}-{date.year} {term}"
+
+
+def evaluation_dimensions(eval_data: Dict) -> Dict:
+    """Classe, matiere, trimestre et date d'une evaluation (infos_evaluation.json)"""
+    date = eval_data.get("date_examen") or eval_data.get("date") or eval_data.get("created_at") or ""
+    return {
+        "titre": eval_data.get("titre", ""),
+        "classe": eval_data.get("classe") or eval_data.get("promotion") or UNKNOWN,
+        "matiere": eval_data.get("matiere") or UNKNOWN,
+        "terme": school_term(date),
+        "date": str(date)[:10],
+    }
+
+
+def student_key(result: Dict) -> str:
+    """Identifiant d'un etudiant (nom du dossier de resultats)"""
+    return f"{result.get('etudiant_nom', 'Unknown')}_{result.get('etudiant_prenom', '')}".replace(" ", "_")
+
+
+def note_sur_20(result: Dict, eval_data: Dict) -> float:
+    """Note totale d'un resultat ramenee sur 20 (comparable entre evaluations)"""
+    maximum = float(result.get("note_maximale") or result.get("note_max") or eval_data.get("note_totale") or 20)
+    return round(20 * total_score(result) / maximum, 2) if maximum > 0 else 0.0
+
+
+def _empty_sums() -> Dict:
+    return {"copies": 0, "somme": 0.0, "somme_carres": 0.0}
+
+
+def _add(sums: Dict, note: float, sign: int = 1):
+    sums["copies"] += sign
+    sums["somme"] += sign * note
+    sums["somme_carres"] += sign * note * note
+
+
+def _summary(sums: Dict) -> Dict:
+    """Moyenne et ecart type a partir des sommes"""
+    count = sums["copies"]
+    if count <= 0:
+        return {"copies": 0, "moyenne": None, "ecart_type": None}
+    moyenne = sums["somme"] / count
+    variance = max(sums["somme_carres"] / count - moyenne * moyenne, 0.0)
+    return {"copies": count, "moyenne": round(moyenne, 2), "ecart_type": round(math.sqrt(variance), 2)}
+
+
+def _group_key(dimensions: Dict) -> str:
+    return "|".join(dimensions[d] for d in COHORT_DIMENSIONS)
+
+
+class AnalyticsStore:
+    """Agregats materialises par etudiant, evaluation et (classe, matiere, trimestre)"""
+
+    def __init__(self, root: Optional[Path] = None, evaluations_path: Optional[Path] = None):
+        self.root = Path(root or Path(settings.DATA_DIR) / "analytics")
+        self.evaluations_path = Path(evaluations_path or Path(settings.DATA_DIR) / "evaluations")
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._data: Optional[Dict] = None
+        self._dirty = False
+
+    # ---- mises a jour ----
+
+    def record_results(self, eval_id: str, eval_data: Dict, results: Iterable[Dict]):
+        """Ajoute ou remplace les notes d'une evaluation (une seule ecriture disque)"""
+        with self._lock:
+            self._load()
+            self._update_evaluation(eval_id, eval_data)
+            for result in results:
+                self._record(eval_id, result, note_sur_20(result, eval_data))
+            self._dirty = True
+        self.flush()
+
+    async def record_results_async(self, eval_id: str, eval_data: Dict, results: Iterable[Dict]):
+        """record_results hors de la boucle d'evenements (une ecriture par appel au plus)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.record_results, eval_id, eval_data, list(results))
+
+    def update_evaluation(self, eval_id: str, eval_data: Dict):
+        """
+        Reporte la modification des infos d'une evaluation (classe, matiere,
+        date) ; une evaluation supprimee est retiree des agregats
+        """
+        with self._lock:
+            self._load()
+            if eval_data.get("deleted"):
+                self._remove_evaluation(eval_id)
+            elif eval_id in self._data["evaluations"]:
+                self._update_evaluation(eval_id, eval_data)
+            else:
+                return
+            self._dirty = True
+        self.flush()
+
+    def rebuild(self) -> Dict:
+        """Recalcule tous les agregats depuis les correction_detaillee.json"""
+        with self._lock:
+            self._data = self._compute_from_disk()
+            self._dirty = True
+            counts = {
+                "evaluations": len(self._data["evaluations"]),
+                "etudiants": len(self._data["etudiants"]),
+                "groupes": len(self._data["groupes"]),
+            }
+        self.flush()
+        return counts
+
+    def flush(self):
+        """
+        Ecrit les agregats s'ils ont change depuis la derniere ecriture
+
+        Le verrou d'ecriture garde l'ordre des ecritures ; le verrou des
+        donnees n'est tenu que le temps de la serialisation.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps({**self._data, "date_maj": datetime.now().isoformat()}, ensure_ascii=False)
+                self._dirty = False
+            self.root.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.root / AGGREGATES_FILENAME, payload.encode("utf-8"))
+
+    # ---- requetes ----
+
+    def student_timeseries(self, student: str, matiere: Optional[str] = None) -> List[Dict]:
+        """Notes d'un etudiant par date d'evaluation, avec la moyenne de l'evaluation"""
+        with self._lock:
+            self._load()
+            evaluations = self._data["evaluations"]
+            series = []
+            for eval_id, note in self._data["etudiants"].get(student, {}).items():
+                evaluation = evaluations.get(eval_id)
+                if not evaluation or (matiere and evaluation["matiere"] != matiere):
+                    continue
+                series.append({
+                    "evaluation_id": eval_id,
+                    **{k: evaluation[k] for k in ("titre", "date", "classe", "matiere", "terme")},
+                    "note": note,
+                    "moyenne_evaluation": _summary(evaluation)["moyenne"],
+                })
+        return sorted(series, key=lambda point: point["date"])
+
+    def evaluation_timeseries(self, classe: Optional[str] = None, matiere: Optional[str] = None,
+                              terme: Optional[str] = None) -> List[Dict]:
+        """Moyenne et ecart type de chaque evaluation correspondant aux filtres, par date"""
+        filters = {"classe": classe, "matiere": matiere, "terme": terme}
+        with self._lock:
+            self._load()
+            series = [
+                {
+                    "evaluation_id": eval_id,
+                    **{k: evaluation[k] for k in ("titre", "date", "classe", "matiere", "terme")},
+                    **_summary(evaluation),
+                }
+                for eval_id, evaluation in self._data["evaluations"].items()
+                if all(value is None or evaluation[k] == value for k, value in filters.items())
+            ]
+        return sorted(series, key=lambda point: point["date"])
+
+    def cohort_comparison(self, group_by: str = "classe", classe: Optional[str] = None,
+                          matiere: Optional[str] = None, terme: Optional[str] = None) -> List[Dict]:
+        """Moyennes des cohortes (par classe, matiere ou trimestre) correspondant aux filtres"""
+        if group_by not in COHORT_DIMENSIONS:
+            raise ValueError(f"Dimension inconnue : {group_by}")
+        filters = {"classe": classe, "matiere": matiere, "terme": terme}
+
+        cohorts: Dict[str, Dict] = {}
+        with self._lock:
+            self._load()
+            for group in self._data["groupes"].values():
+                if not all(value is None or group[k] == value for k, value in filters.items()):
+                    continue
+                cohort = cohorts.setdefault(group[group_by], {**_empty_sums(), "evaluations": 0})
+                for field in ("copies", "somme", "somme_carres", "evaluations"):
+                    cohort[field] += group[field]
+
+        return sorted(
+            ({group_by: name, "evaluations": sums["evaluations"], **_summary(sums)} for name, sums in cohorts.items()),
+            key=lambda cohort: cohort[group_by]
+        )
+
+    # ---- interne (verrou detenu) ----
+
+    def _record(self, eval_id: str, result: Dict, note: float):
+        evaluation = self._data["evaluations"][eval_id]
+        group = self._data["groupes"][evaluation["groupe"]]
+        notes = self._data["etudiants"].setdefault(student_key(result), {})
+
+        previous = notes.get(eval_id)
+        if previous is not None:
+            _add(evaluation, previous, -1)
+            _add(group, previous, -1)
+        notes[eval_id] = note
+        _add(evaluation, note)
+        _add(group, note)
+
+    def _update_evaluation(self, eval_id: str, eval_data: Dict):
+        """Cree l'entree de l'evaluation ou deplace ses sommes si son groupe a change"""
+        dimensions = evaluation_dimensions(eval_data)
+        key = _group_key(dimensions)
+        evaluation = self._data["evaluations"].get(eval_id)
+
+        if evaluation is None:
+            evaluation = {**_empty_sums(), "groupe": key}
+            self._data["evaluations"][eval_id] = evaluation
+            self._group(key, dimensions)["evaluations"] += 1
+        elif evaluation["groupe"] != key:
+            self._detach(evaluation)
+            group = self._group(key, dimensions)
+            for field in ("copies", "somme", "somme_carres"):
+                group[field] += evaluation[field]
+            group["evaluations"] += 1
+            evaluation["groupe"] = key
+        evaluation.update(dimensions)
+
+    def _remove_evaluation(self, eval_id: str):
+        evaluation = self._data["evaluations"].pop(eval_id, None)
+        if evaluation is None:
+            return
+        self._detach(evaluation)
+        for notes in self._data["etudiants"].values():
+            notes.pop(eval_id, None)
+        self._data["etudiants"] = {name: notes for name, notes in self._data["etudiants"].items() if notes}
+
+    def _detach(self, evaluation: Dict):
+        """Retire les sommes d'une evaluation de son groupe (supprime s'il devient vide)"""
+        group = self._data["groupes"][evaluation["groupe"]]
+        for field in ("copies", "somme", "somme_carres"):
+            group[field] -= evaluation[field]
+        group["evaluations"] -= 1
+        if group["evaluations"] <= 0:
+            del self._data["groupes"][evaluation["groupe"]]
+
+    def _group(self, key: str, dimensions: Dict) -> Dict:
+        return self._data["groupes"].setdefault(key, {
+            **{d: dimensions[d] for d in COHORT_DIMENSIONS}, **_empty_sums(), "evaluations": 0
+        })
+
+    def _compute_from_disk(self) -> Dict:
+        self._data = {"evaluations": {}, "groupes": {}, "etudiants": {}}
+        if not self.evaluations_path.exists():
+            return self._data
+
+        for eval_dir in sorted(self.evaluations_path.iterdir()):
+            eval_file = eval_dir / "infos_evaluation.json"
+            results_dir = eval_dir / "resultats"
+            if not eval_file.exists() or not results_dir.exists():
+                continue
+            try:
+                with open(eval_file, "r", encoding="utf-8") as f:
+                    eval_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if eval_data.get("deleted"):
+                continue
+
+            self._update_evaluation(eval_dir.name, eval_data)
+            for result_file in sorted(results_dir.glob("*/correction_detaillee.json")):
+                try:
+                    with open(result_file, "r", encoding="utf-8") as f:
+                        result = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                self._record(eval_dir.name, result, note_sur_20(result, eval_data))
+        return self._data
+
+    def _load(self):
+        if self._data is not None:
+            return
+        path = self.root / AGGREGATES_FILENAME
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+                return
+            except (OSError, json.JSONDecodeError):
+                pass
+        # Premiere utilisation (ou fichier illisible) : calcul depuis les resultats,
+        # ecrit par la prochaine mise a jour
+        self._compute_from_disk()
+        self._dirty = True
+
+
+_analytics_store: Optional[AnalyticsStore] = None
+_analytics_store_lock = threading.Lock()
+
+
+def get_analytics_store() -> AnalyticsStore:
+    """Instance partagee des agregats"""
+    global _analytics_store
+    with _analytics_store_lock:
+        if _analytics_store is None:
+            _analytics_store = AnalyticsStore()
+        return _analytics_store
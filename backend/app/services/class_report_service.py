@@ -0,0 +1,393 @@
+"""
+services/class_report_service.py
+================================
+Rapport de synthese PDF d'une classe pour l'enseignant
+
+Les indicateurs (repartition des notes, percentiles, taux de reussite,
+moyennes par question, classement) sont calcules en une passe vectorisee
+NumPy sur tous les resultats de l'evaluation (statistics_service) ; seule
+l'extraction des champs des JSON est faite en Python. Les graphiques sont dessines avec
+reportlab.graphics, le classement est un tableau pagine.
+"""
+
+from datetime import datetime
+import io
+from typing import Dict, List, Optional
+
+import numpy as np
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak
+
+from .pdf_report_service import ReportTemplate, get_report_template
+from .item_analysis_service import compute_item_analysis
+from .ranking_service import compute_ranks, is_ranked, ranking_method
+from .statistics_service import extract_scores, question_statistics
+
+# A incrementer a chaque modification du contenu ou de la mise en page du
+# rapport de classe : invalide les rapports deja generes
+CLASS_REPORT_VERSION = "3"
+
+# Champs de l'evaluation utilises par le rapport de classe (note_totale : bareme)
+CLASS_REPORT_EVAL_FIELDS = ("classe", "matiere", "titre", "date", "enseignant", "note_totale")
+
+PERCENTILES = (10, 25, 50, 75, 90)
+DISTRIBUTION_BINS = 10
+
+# Le classement est decoupe en un tableau par page : reportlab remesure
+# toutes les lignes restantes a chaque coupure de page (cout quadratique sur
+# un seul grand tableau)
+RANKING_ROWS_PER_PAGE = 36
+
+# Seuils des niveaux de performance (memes libelles que le rapport etudiant)
+PERFORMANCE_LEVELS = (
+    (90, "Excellent"),
+    (75, "Tres bien"),
+    (60, "Bien"),
+    (40, "Moyen"),
+)
+
+
+def compute_class_summary(results: List[Dict], eval_info: Dict) -> Dict:
+    """
+    Indicateurs de la classe a partir des correction_detaillee.json
+
+    Les notes sont ramenees au bareme de l'evaluation (note_totale, 20 par
+    defaut) ; une copie est reussie a partir de 50 %. Les copies en erreur
+    (necessite_revision_humaine) sont hors classement, comme dans
+    ranking_service : elles figurent en fin de tableau, sans rang.
+    """
+    note_max = float(eval_info.get("note_totale") or 20)
+    count = len(results)
+
+    scores = extract_scores(results, note_max)
+    notes, pourcentages = scores["notes"], scores["pourcentages"]
+
+    summary = {
+        "nombre_copies": count,
+        "note_max": note_max,
+        "moyenne": 0.0, "mediane": 0.0, "ecart_type": 0.0,
+        "note_min": 0.0, "note_max_obtenue": 0.0, "taux_reussite": 0.0,
+        "percentiles": {f"p{p}": 0.0 for p in PERCENTILES},
+        "distribution": _distribution(notes, note_max),
+        "questions": question_statistics(scores),
+        "items": compute_item_analysis(scores),
+        "classement": [],
+        "copies_a_reviser": sum(1 for r in results if not is_ranked(r)),
+    }
+    if count == 0:
+        return summary
+
+    quantiles = np.percentile(notes, PERCENTILES)
+    summary.update({
+        "moyenne": round(float(notes.mean()), 2),
+        "mediane": round(float(np.median(notes)), 2),
+        "ecart_type": round(float(notes.std()), 2),
+        "note_min": round(float(notes.min()), 2),
+        "note_max_obtenue": round(float(notes.max()), 2),
+        "taux_reussite": round(float((pourcentages >= 50).mean() * 100), 1),
+        "percentiles": {f"p{p}": round(float(q), 2) for p, q in zip(PERCENTILES, quantiles)},
+        "classement": _ranking(results, notes, pourcentages),
+    })
+    return summary
+
+
+def _distribution(notes: np.ndarray, note_max: float) -> List[Dict]:
+    """Effectifs par tranche de note_max / DISTRIBUTION_BINS (derniere tranche fermee)"""
+    edges = np.linspace(0, note_max, DISTRIBUTION_BINS + 1)
+    counts, _ = np.histogram(np.clip(notes, 0, note_max), bins=edges)
+    return [
+        {"tranche": f"{low:g}-{high:g}", "min": float(low), "max": float(high), "effectif": int(n)}
+        for low, high, n in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+def _ranking(results: List[Dict], notes: np.ndarray, pourcentages: np.ndarray) -> List[Dict]:
+    """
+    Classement par note decroissante, ex aequo selon ranking_method() (memes
+    rangs que rang_classe) ; les copies hors classement suivent, sans rang
+    """
+    names = np.array([
+        f"{r.get('etudiant_nom', '')} {r.get('etudiant_prenom', '')}".strip() for r in results
+    ])
+    ranked = np.array([is_ranked(r) for r in results], dtype=bool)
+    order = np.lexsort((names, -notes, ~ranked))
+    ranks = np.zeros(len(results), dtype=int)
+    ranks[ranked] = compute_ranks(notes[ranked])[ranking_method()]
+    levels = np.select(
+        [pourcentages >= threshold for threshold, _ in PERFORMANCE_LEVELS],
+        [label for _, label in PERFORMANCE_LEVELS],
+        default="A ameliorer"
+    )
+    return [
+        {
+            "rang": int(ranks[i]) if ranked[i] else None,
+            "etudiant": str(names[i]),
+            "note": round(float(notes[i]), 2),
+            "pourcentage": round(float(pourcentages[i]), 1),
+            "performance": str(levels[i]) if ranked[i] else "A reviser",
+        }
+        for i in order
+    ]
+
+
+class ClassReportGenerator:
+    """Generateur du rapport PDF de synthese d'une classe"""
+
+    def __init__(self, template: Optional[ReportTemplate] = None):
+        self.template = template or get_report_template()
+        self.styles = self.template.styles
+
+    def generate_class_report(self, summary: Dict, eval_info: Dict) -> bytes:
+        """
+        Genere le rapport de classe
+
+        Args:
+            summary: Indicateurs calcules par compute_class_summary
+            eval_info: Informations de l'evaluation
+
+        Returns:
+            bytes: Contenu du PDF genere
+        """
+        buffer = io.BytesIO()
+
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=2*cm,
+            leftMargin=2*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm
+        )
+
+        story = []
+        story.extend(self._create_overview(summary, eval_info))
+        story.append(PageBreak())
+        story.extend(self._create_question_section(summary))
+        story.append(PageBreak())
+        story.extend(self._create_ranking(summary))
+
+        doc.build(story)
+
+        pdf_data = buffer.getvalue()
+        buffer.close()
+
+        return pdf_data
+
+    def _create_overview(self, summary: Dict, eval_info: Dict) -> List:
+        """Informations de l'evaluation, indicateurs cles et repartition des notes"""
+        elements = []
+
+        elements.append(self.template.paragraph("RAPPORT DE SYNTHESE DE LA CLASSE", 'CustomTitle'))
+
+        info_data = [
+            ['Classe', eval_info.get('classe', 'Non specifiee')],
+            ['Matiere', eval_info.get('matiere', '')],
+            ['Evaluation', eval_info.get('titre', '')],
+            ['Date', eval_info.get('date', datetime.now().strftime('%d/%m/%Y'))],
+            ['Professeur', eval_info.get('enseignant', 'Non specifie')],
+            ['Copies corrigees', str(summary['nombre_copies'])]
+        ]
+        if summary.get('copies_a_reviser'):
+            info_data.append(['Copies a reviser', str(summary['copies_a_reviser'])])
+        info_table = Table(info_data, colWidths=[4*cm, 8*cm])
+        info_table.setStyle(self.template.table_styles['etudiant'])
+        elements.append(info_table)
+        elements.append(Spacer(1, 20))
+
+        elements.append(self.template.paragraph("INDICATEURS CLES", 'Subtitle'))
+        note_max = summary['note_max']
+        percentiles = summary['percentiles']
+        indicators = [
+            ['Moyenne', 'Mediane', 'Ecart type', 'Min', 'Max', 'Reussite'],
+            [
+                f"{summary['moyenne']:.2f}/{note_max:g}",
+                f"{summary['mediane']:.2f}",
+                f"{summary['ecart_type']:.2f}",
+                f"{summary['note_min']:.2f}",
+                f"{summary['note_max_obtenue']:.2f}",
+                f"{summary['taux_reussite']:.1f}%"
+            ],
+            [f"P{p}" for p in PERCENTILES] + [''],
+            [f"{percentiles[f'p{p}']:.2f}" for p in PERCENTILES] + ['']
+        ]
+        indicators_table = Table(indicators, colWidths=[2.8*cm] * 6)
+        indicators_table.setStyle(self.template.table_styles['scores'])
+        indicators_table.setStyle([
+            ('BACKGROUND', (0, 2), (-1, 2), colors.HexColor('#2E86AB')),
+            ('TEXTCOLOR', (0, 2), (-1, 2), colors.white),
+            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+        ])
+        elements.append(indicators_table)
+        elements.append(Spacer(1, 20))
+
+        elements.append(self.template.paragraph("REPARTITION DES NOTES", 'Subtitle'))
+        elements.append(self._distribution_chart(summary))
+
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph(
+            f"Rapport genere le {datetime.now().strftime('%d/%m/%Y a %H:%M')}",
+            self.styles['Normal']
+        ))
+
+        return elements
+
+    def _distribution_chart(self, summary: Dict) -> Drawing:
+        """Histogramme des notes ; les tranches sous la moyenne du bareme en rouge"""
+        distribution = summary['distribution']
+        drawing = Drawing(17*cm, 7*cm)
+
+        chart = VerticalBarChart()
+        chart.x, chart.y = 1.2*cm, 1*cm
+        chart.width, chart.height = 15.5*cm, 5.5*cm
+        chart.data = [[d['effectif'] for d in distribution]]
+        chart.categoryAxis.categoryNames = [d['tranche'] for d in distribution]
+        chart.categoryAxis.labels.fontSize = 8
+        chart.categoryAxis.labels.fontName = 'Helvetica'
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.labels.fontSize = 8
+        chart.valueAxis.labels.fontName = 'Helvetica'
+        chart.bars[0].fillColor = colors.HexColor('#4CAF50')
+        for index, d in enumerate(distribution):
+            if d['max'] <= summary['note_max'] / 2:
+                chart.bars[(0, index)].fillColor = colors.HexColor('#F44336')
+
+        drawing.add(chart)
+        return drawing
+
+    def _create_question_section(self, summary: Dict) -> List:
+        """Graphique et tableau des resultats par question"""
+        elements = []
+        questions = summary['questions']
+
+        elements.append(self.template.paragraph("RESULTATS PAR QUESTION", 'Subtitle'))
+        if not questions:
+            elements.append(self.template.paragraph("Aucune question detaillee dans les resultats.", 'Normal'))
+            return elements
+
+        elements.append(self._question_chart(questions))
+        elements.append(Spacer(1, 15))
+
+        question_data = [['Question', 'Moyenne', 'Ecart type', '% moyen', 'Reussite']]
+        for q in questions:
+            question_data.append([
+                f"Q{q['numero']}",
+                f"{q['moyenne']:.2f}/{q['note_max']:g}",
+                f"{q['ecart_type']:.2f}",
+                f"{q['pourcentage_moyen']:.1f}%",
+                f"{q['taux_reussite']:.1f}%"
+            ])
+        question_table = Table(question_data, colWidths=[3*cm, 3.5*cm, 3*cm, 3*cm, 3*cm], repeatRows=1)
+        question_table.setStyle(self.template.table_styles['scores'])
+        elements.append(question_table)
+
+        elements.extend(self._create_item_analysis(summary.get('items', [])))
+
+        return elements
+
+    def _create_item_analysis(self, items: List[Dict]) -> List:
+        """Tableau de l'analyse des items (difficulte, discrimination)"""
+        if not items:
+            return []
+
+        elements = [Spacer(1, 20), self.template.paragraph("ANALYSE DES ITEMS", 'Subtitle')]
+        item_data = [['Question', 'Difficulte', 'Discrimination', 'Indice 27 %', 'Variance', 'Zero', 'Max']]
+        for item in items:
+            discrimination = item['discrimination']
+            item_data.append([
+                f"Q{item['numero']}",
+                f"{item['difficulte']:.2f} ({item['niveau_difficulte']})",
+                "-" if discrimination is None else f"{discrimination:.2f} ({item['niveau_discrimination']})",
+                f"{item['indice_27']:.2f}",
+                f"{item['variance']:.2f}",
+                f"{item['part_zero']:.0f}%",
+                f"{item['part_max']:.0f}%"
+            ])
+        item_table = Table(
+            item_data, colWidths=[2*cm, 3.3*cm, 3.7*cm, 2.2*cm, 1.8*cm, 1.5*cm, 1.5*cm], repeatRows=1
+        )
+        item_table.setStyle(self.template.table_styles['scores'])
+        elements.append(item_table)
+        elements.append(Spacer(1, 8))
+        elements.append(self.template.paragraph(
+            "Difficulte : part moyenne des points obtenus. Discrimination : correlation entre la "
+            "question et le reste de l'evaluation ; une valeur inferieure a 0,2 signale une "
+            "question a revoir.", 'Normal'
+        ))
+        return elements
+
+    def _question_chart(self, questions: List[Dict]) -> Drawing:
+        """Pourcentage moyen et taux de reussite par question"""
+        drawing = Drawing(17*cm, 7.5*cm)
+        series_colors = (colors.HexColor('#2E86AB'), colors.HexColor('#A23B72'))
+
+        chart = VerticalBarChart()
+        chart.x, chart.y = 1.2*cm, 1.5*cm
+        chart.width, chart.height = 15.5*cm, 5.5*cm
+        chart.data = [
+            [q['pourcentage_moyen'] for q in questions],
+            [q['taux_reussite'] for q in questions]
+        ]
+        chart.categoryAxis.categoryNames = [f"Q{q['numero']}" for q in questions]
+        chart.categoryAxis.labels.fontSize = 8
+        chart.categoryAxis.labels.fontName = 'Helvetica'
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.valueMax = 100
+        chart.valueAxis.valueStep = 20
+        chart.valueAxis.labels.fontSize = 8
+        chart.valueAxis.labels.fontName = 'Helvetica'
+        for index, color in enumerate(series_colors):
+            chart.bars[index].fillColor = color
+        drawing.add(chart)
+
+        legend = Legend()
+        legend.x, legend.y = 1.2*cm, 0.4*cm
+        legend.alignment = 'right'
+        legend.columnMaximum = 1
+        legend.fontSize = 8
+        legend.fontName = 'Helvetica'
+        legend.colorNamePairs = list(zip(series_colors, ['% moyen', 'Taux de reussite']))
+        drawing.add(legend)
+
+        return drawing
+
+    def _create_ranking(self, summary: Dict) -> List:
+        """Classement de la classe (un tableau avec en-tete par page)"""
+        elements = [self.template.paragraph("CLASSEMENT", 'Subtitle')]
+
+        header = ['Rang', 'Etudiant', 'Note', '%', 'Performance']
+        note_max = summary['note_max']
+        rows = [
+            [
+                str(entry['rang']) if entry['rang'] is not None else '-',
+                entry['etudiant'],
+                f"{entry['note']:.2f}/{note_max:g}",
+                f"{entry['pourcentage']:.1f}%",
+                entry['performance']
+            ]
+            for entry in summary['classement']
+        ]
+
+        for start in range(0, len(rows), RANKING_ROWS_PER_PAGE):
+            if start:
+                elements.append(PageBreak())
+            ranking_table = Table(
+                [header] + rows[start:start + RANKING_ROWS_PER_PAGE],
+                colWidths=[1.5*cm, 7*cm, 2.8*cm, 2.2*cm, 3*cm],
+                repeatRows=1
+            )
+            ranking_table.setStyle(self.template.table_styles['classement'])
+            elements.append(ranking_table)
+
+        return elements
+
+
+# Interface simple
+def generate_class_pdf_report(results: List[Dict], eval_info: Dict) -> bytes:
+    """Calcule les indicateurs de la classe et genere le rapport PDF"""
+    summary = compute_class_summary(results, eval_info)
+    return ClassReportGenerator().generate_class_report(summary, eval_info)
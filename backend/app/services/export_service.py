@@ -0,0 +1,141 @@
+"""
+services/export_service.py
+==========================
+Export des resultats d'une evaluation en CSV et XLSX
+
+Une ligne par etudiant, avec une colonne par question du bareme
+(bareme_evaluation.json, ou a defaut les questions du premier resultat).
+Les lignes sont lues dans l'instantane en colonnes des resultats
+(results_snapshot, seuls les resultats modifies sont relus) : le CSV est
+envoye ligne par ligne, le XLSX est ecrit par openpyxl en mode write-only
+dans un fichier temporaire puis envoye par blocs.
+"""
+
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+from openpyxl import Workbook
+
+from .class_report_service import PERFORMANCE_LEVELS
+from .report_generation import list_result_files
+from .results_snapshot import load_snapshot
+
+# Separateur des CSV (Excel en francais attend le point-virgule) ; le BOM
+# UTF-8 permet a Excel de reconnaitre l'encodage des accents
+CSV_DELIMITER = ";"
+CSV_ENCODING = "utf-8-sig"
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+BASE_COLUMNS = ("Nom", "Prenom", "Note", "Note Max", "Pourcentage", "Performance")
+TRAILING_COLUMNS = ("Date Correction",)
+
+
+def export_questions(eval_dir: Path) -> List[Dict]:
+    """Questions exportees (numero, points) : bareme de l'evaluation ou premier resultat"""
+    eval_dir = Path(eval_dir)
+    questions = []
+    bareme_file = eval_dir / "bareme_evaluation.json"
+    if bareme_file.exists():
+        with open(bareme_file, "r", encoding="utf-8") as f:
+            questions = [
+                {"numero": q.get("numero", index + 1), "note_max": q.get("points_total")}
+                for index, q in enumerate(json.load(f).get("questions", []))
+            ]
+
+    if not questions:
+        result_files = list_result_files(eval_dir)
+        if result_files:
+            with open(result_files[0][1], "r", encoding="utf-8") as f:
+                questions = [
+                    {"numero": q.get("numero", index + 1), "note_max": q.get("note_max")}
+                    for index, q in enumerate(json.load(f).get("questions", []))
+                ]
+    return questions
+
+
+def _performance_level(pourcentage: float) -> str:
+    for threshold, label in PERFORMANCE_LEVELS:
+        if pourcentage >= threshold:
+            return label
+    return "A ameliorer"
+
+
+def iter_export_rows(eval_dir: Path, eval_data: Dict) -> Iterator[List]:
+    """En-tete puis une ligne par resultat, lus dans l'instantane en colonnes"""
+    questions = export_questions(eval_dir)
+    note_max = float(eval_data.get("note_totale") or 20)
+
+    yield [
+        *BASE_COLUMNS,
+        *(f"Q{q['numero']} (/{q['note_max']:g})" if q["note_max"] else f"Q{q['numero']}" for q in questions),
+        *TRAILING_COLUMNS,
+    ]
+
+    snapshot = load_snapshot(eval_dir)
+    exported = [str(q["numero"]) for q in questions]
+    # Lignes question triees par etudiant : chaque copie lit sa tranche, sans
+    # matrice etudiants x questions
+    question_index = snapshot["question_etudiant"]
+    end = 0
+
+    for i in range(len(snapshot["etudiant"])):
+        start, end = end, int(np.searchsorted(question_index, i, side="right"))
+        notes = dict(zip(
+            (str(numero) for numero in snapshot["question_numero"][start:end]),
+            (float(note) for note in snapshot["question_note"][start:end]),
+        ))
+        note = float(snapshot["note_totale"][i])
+        maximum = float(snapshot["note_maximale"][i])
+        if np.isnan(maximum):
+            maximum = note_max
+        pourcentage = round(100 * note / maximum, 1) if maximum > 0 else 0.0
+        yield [
+            str(snapshot["nom"][i]),
+            str(snapshot["prenom"][i]),
+            note,
+            maximum,
+            pourcentage,
+            str(snapshot["performance"][i]) or _performance_level(pourcentage),
+            *(notes.get(numero, "") for numero in exported),
+            str(snapshot["date_correction"][i]),
+        ]
+
+
+def stream_results_csv(eval_dir: Path, eval_data: Dict) -> Iterator[bytes]:
+    """CSV des resultats, produit ligne par ligne"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=CSV_DELIMITER)
+    encoding = CSV_ENCODING
+    for row in iter_export_rows(eval_dir, eval_data):
+        writer.writerow(row)
+        yield buffer.getvalue().encode(encoding)
+        buffer.seek(0)
+        buffer.truncate()
+        # Le BOM n'est ecrit qu'en tete de fichier
+        encoding = "utf-8"
+
+
+def stream_results_xlsx(eval_dir: Path, eval_data: Dict) -> Iterator[bytes]:
+    """
+    Classeur XLSX des resultats (openpyxl write-only)
+
+    Le format ZIP du XLSX ne peut etre envoye qu'une fois complet : le
+    classeur est ecrit ligne par ligne dans un fichier temporaire, puis
+    recopie par blocs.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Resultats")
+        for row in iter_export_rows(eval_dir, eval_data):
+            sheet.append(row)
+        workbook.save(tmp)
+
+        tmp.seek(0)
+        while chunk := tmp.read(EXPORT_CHUNK_SIZE):
+            yield chunk
@@ -0,0 +1,130 @@
+"""
+services/feedback_service.py
+============================
+Commentaires differes des corrections (CORRECTION_LAZY_FEEDBACK)
+
+La correction n'attribue que les notes ; un resultat dont le feedback_statut
+est "en_attente" garde la transcription de la copie (retiree des reponses
+de l'API par public_result). A la premiere consultation du resultat detaille
+ou du rapport PDF, les commentaires sont generes
+(AICorrectionEngine.generate_feedback) puis enregistres dans
+correction_detaillee.json : les consultations suivantes n'appellent plus le
+modele. Les demandes simultanees pour un meme etudiant partagent un seul
+appel.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.helpers import write_atomic
+from .ai_correction_service import AICorrectionEngine
+from .result_locks import evaluation_lock
+
+FEEDBACK_PENDING = "en_attente"
+
+# Transcription gardee dans le resultat en attente, jamais retournee par l'API
+TRANSCRIPTION_FIELD = "transcription_copie"
+
+# Champs ecrits par la passe de commentaires (AICorrectionEngine._apply_feedback)
+FEEDBACK_FIELDS = (
+    "commentaires_generaux", "points_forts", "points_amelioration", "conseils_personnalises",
+    "diagnostic_performance", "feedback_statut", "date_feedback",
+)
+QUESTION_FEEDBACK_FIELDS = ("commentaire_intelligent", "conseil_personnalise")
+
+_pending_feedback: Dict[str, "asyncio.Future"] = {}
+
+
+def is_feedback_pending(result: Dict) -> bool:
+    return result.get("feedback_statut") == FEEDBACK_PENDING
+
+
+def public_result(result: Dict) -> Dict:
+    """Resultat tel que retourne par l'API : sans la transcription gardee pour la passe differee"""
+    return {field: value for field, value in result.items() if field != TRANSCRIPTION_FIELD}
+
+
+def _grades(result: Dict):
+    """Notes d'un resultat (les commentaires generes ne valent que pour ces notes)"""
+    return result.get("note_totale"), [
+        (question.get("numero"), question.get("note")) for question in result.get("questions", [])
+    ]
+
+
+def _merge_feedback(current: Dict, completed: Dict) -> Dict:
+    """Reporte les commentaires generes dans la version enregistree du resultat"""
+    merged = {**current, **{field: completed.get(field) for field in FEEDBACK_FIELDS}}
+    merged["questions"] = [
+        {**question, **{field: generated.get(field, "") for field in QUESTION_FEEDBACK_FIELDS}}
+        for question, generated in zip(current.get("questions", []), completed.get("questions", []))
+    ]
+    merged.pop(TRANSCRIPTION_FIELD, None)
+    return merged
+
+
+def complete_feedback(result_file: Path, eval_data: Dict) -> Dict:
+    """
+    Genere et enregistre les commentaires d'un resultat en attente
+    (execute dans un thread) ; retourne le resultat a jour
+
+    Si le fichier a change pendant la generation, il est relu : les
+    commentaires sont reportes dans la version enregistree tant que ses notes
+    sont inchangees (rang mis a jour par exemple) ; apres une correction
+    manuelle des notes, la version enregistree est conservee telle quelle.
+    """
+    result_file = Path(result_file)
+    with open(result_file, "rb") as f:
+        original = f.read()
+    result = json.loads(original)
+    if not is_feedback_pending(result):
+        return result
+
+    completed = AICorrectionEngine().generate_feedback(result, eval_data)
+
+    # Relecture et ecriture sous le verrou des resultats de l'evaluation
+    # (evaluations/<id>/resultats/<etudiant>/correction_detaillee.json)
+    with evaluation_lock(result_file.parent.parent.parent):
+        with open(result_file, "rb") as f:
+            current_bytes = f.read()
+        if current_bytes != original:
+            current = json.loads(current_bytes)
+            if not is_feedback_pending(current) or _grades(current) != _grades(result):
+                return current
+            completed = _merge_feedback(current, completed)
+
+        write_atomic(result_file, json.dumps(completed, ensure_ascii=False, indent=2, default=str).encode("utf-8"))
+    return completed
+
+
+async def ensure_student_feedback(eval_dir: Path, student_name: str, eval_data: Dict) -> Optional[Dict]:
+    """
+    Resultat d'un etudiant avec ses commentaires, generes s'ils sont en
+    attente (None si le resultat n'existe pas)
+
+    En cas d'echec de la generation, le resultat note est retourne tel quel
+    (toujours en attente) : la prochaine consultation reessaiera.
+    """
+    result_file = Path(eval_dir) / "resultats" / student_name / "correction_detaillee.json"
+    if not result_file.exists():
+        return None
+
+    with open(result_file, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    if not is_feedback_pending(result):
+        return result
+
+    key = str(result_file)
+    pending = _pending_feedback.get(key)
+    if pending is None:
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(None, complete_feedback, result_file, eval_data)
+        _pending_feedback[key] = pending
+        pending.add_done_callback(lambda _, path=key: _pending_feedback.pop(path, None))
+
+    try:
+        return await asyncio.shield(pending)
+    except Exception as e:
+        print(f"Erreur generation des commentaires pour {student_name}: {e}")
+        return result
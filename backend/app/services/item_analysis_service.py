@@ -0,0 +1,100 @@
+"""
+services/item_analysis_service.py
+=================================
+Analyse des items (questions) d'une evaluation, theorie classique des tests
+
+Pour chaque question du bareme, en une passe vectorisee sur la matrice
+etudiants x questions (statistics_service.extract_scores) :
+
+- difficulte : moyenne des taux de reussite note / points (0 = personne
+  n'a les points, 1 = tout le monde) ;
+- discrimination : correlation entre la note a la question et la note au
+  reste de l'evaluation (point-biseriale pour une question notee 0/1) ;
+- indice 27 % : ecart de difficulte entre les 27 % meilleures copies et les
+  27 % moins bonnes ;
+- variance des notes, part des copies a zero et a la note maximale.
+
+Une question absente d'une copie compte zero. Le cache par evaluation est
+gere par report_generation.load_item_analysis.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .statistics_service import extract_scores
+
+# A incrementer a chaque modification des indicateurs : invalide les caches
+ITEM_ANALYSIS_VERSION = "1"
+
+# Part des copies des groupes fort et faible de l'indice de discrimination
+GROUP_FRACTION = 0.27
+
+# Seuils usuels d'interpretation
+DIFFICULTY_LEVELS = ((0.75, "facile"), (0.35, "moyenne"))
+DISCRIMINATION_LEVELS = ((0.4, "tres bonne"), (0.3, "bonne"), (0.2, "acceptable"))
+
+
+def _level(value: Optional[float], levels, default: str) -> str:
+    if value is None:
+        return "indeterminee"
+    for threshold, label in levels:
+        if value >= threshold:
+            return label
+    return default
+
+
+def _correlations(items: np.ndarray, rest: np.ndarray) -> np.ndarray:
+    """Correlation de Pearson colonne par colonne (NaN si une variance est nulle)"""
+    items = items - items.mean(axis=0)
+    rest = rest - rest.mean(axis=0)
+    numerator = (items * rest).sum(axis=0)
+    denominator = np.sqrt((items ** 2).sum(axis=0) * (rest ** 2).sum(axis=0))
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+
+
+def compute_item_analysis(scores: Dict) -> List[Dict]:
+    """Indicateurs par question a partir des tableaux de extract_scores (ou snapshot_scores)"""
+    questions = scores["questions"]
+    count = scores["question_notes"].shape[0]
+    if not questions or count == 0:
+        return []
+
+    notes = np.nan_to_num(scores["question_notes"])
+    points = np.nan_to_num(np.nanmax(scores["question_max"], axis=0))
+    ratios = np.divide(notes, points, out=np.zeros(notes.shape), where=points > 0)
+
+    totals = notes.sum(axis=1)
+    discrimination = _correlations(notes, totals[:, None] - notes)
+
+    group_size = max(1, int(round(GROUP_FRACTION * count)))
+    order = np.argsort(totals, kind="stable")
+    index_27 = ratios[order[-group_size:]].mean(axis=0) - ratios[order[:group_size]].mean(axis=0)
+
+    difficulte = ratios.mean(axis=0)
+    variance = notes.var(axis=0)
+    part_zero = (notes <= 0).mean(axis=0)
+    part_max = ((notes >= points) & (points > 0)).mean(axis=0)
+
+    items = []
+    for j, numero in enumerate(questions):
+        correlation = None if np.isnan(discrimination[j]) else round(float(discrimination[j]), 3)
+        items.append({
+            "numero": numero,
+            "note_max": float(points[j]),
+            "copies": count,
+            "difficulte": round(float(difficulte[j]), 3),
+            "niveau_difficulte": _level(float(difficulte[j]), DIFFICULTY_LEVELS, "difficile"),
+            "discrimination": correlation,
+            "niveau_discrimination": _level(correlation, DISCRIMINATION_LEVELS, "faible"),
+            "indice_27": round(float(index_27[j]), 3),
+            "variance": round(float(variance[j]), 3),
+            "part_zero": round(100 * float(part_zero[j]), 1),
+            "part_max": round(100 * float(part_max[j]), 1),
+        })
+    return items
+
+
+def analyze_results(results: List[Dict], note_max: float = 20) -> List[Dict]:
+    """Analyse des items d'une liste de correction_detaillee.json"""
+    return compute_item_analysis(extract_scores(results, note_max))
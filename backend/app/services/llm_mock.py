@@ -0,0 +1,466 @@
+"""
+services/llm_mock.py
+====================
+Serveur LLM simule compatible OpenAI pour les benchmarks et la CI
+
+Deux modes d'utilisation :
+- transport httpx injectable dans le client OpenAI (aucun reseau)
+- serveur HTTP autonome : python -m app.services.llm_mock --port 8001
+  puis OPENAI_BASE_URL=http://localhost:8001/v1
+
+Les reponses sont deterministes (graine + contenu de la requete) et
+respectent les formats attendus par le moteur de correction (NOTE_FINALE,
+Qn, COMMENTAIRE_Qn...), par la passe de commentaires differee et par l'OCR.
+La latence peut dependre de la longueur de la reponse (ms par token genere).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from openai import OpenAI
+
+from ..config import settings
+
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+# Dernieres latences gardees pour les percentiles (memoire bornee pour le
+# serveur autonome) ; effectif et somme couvrent toutes les requetes
+LATENCY_SAMPLE_SIZE = 10000
+
+MOCK_TRANSCRIPTION_LINES = [
+    "Question 1 :",
+    "On isole x : 2x + 5 = 13 donc 2x = 8 et x = 4.",
+    "Question 2 :",
+    "f(3) = 2 x 9 - 5 x 3 + 1 = 18 - 15 + 1 = 4.",
+    "Question 3 :",
+    "x^2 - 9 = (x - 3)(x + 3) d'apres l'identite remarquable.",
+    "Question 4 :",
+    "Le perimetre vaut 2(2x + 3) + 2x = 6x + 6 = 26 donc x = 10/3.",
+    "L'auteur utilise une metaphore pour souligner le contraste.",
+    "En conclusion, le texte montre que la liberte a un prix.",
+]
+
+
+class MockLLMResponder:
+    """Genere des reponses chat completions deterministes"""
+
+    def __init__(
+        self,
+        seed: int = 42,
+        latency_distribution: str = "constant",
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        ms_per_completion_token: float = 0.0
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribution de latence inconnue: {latency_distribution}")
+
+        self.seed = seed
+        self.latency_distribution = latency_distribution
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.ms_per_completion_token = ms_per_completion_token
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "chat_requests": 0,
+            "vision_requests": 0,
+            "images": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "request_bytes": 0,
+            "latencies_ms": deque(maxlen=LATENCY_SAMPLE_SIZE),
+            "latency_count": 0,
+            "latency_total_ms": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "MockLLMResponder":
+        """Construit un responder depuis la configuration"""
+        return cls(
+            seed=settings.LLM_MOCK_SEED,
+            latency_distribution=settings.LLM_MOCK_LATENCY_DISTRIBUTION,
+            latency_ms=settings.LLM_MOCK_LATENCY_MS,
+            latency_jitter_ms=settings.LLM_MOCK_LATENCY_JITTER_MS,
+            error_rate=settings.LLM_MOCK_ERROR_RATE,
+            rate_limit_rate=settings.LLM_MOCK_RATE_LIMIT_RATE,
+            ms_per_completion_token=settings.LLM_MOCK_MS_PER_COMPLETION_TOKEN
+        )
+
+    def reset_stats(self):
+        """Remet les compteurs a zero"""
+        with self._lock:
+            for key, value in self.stats.items():
+                if isinstance(value, deque):
+                    value.clear()
+                else:
+                    self.stats[key] = type(value)()
+
+    def respond(self, payload: Dict, request_bytes: int = 0) -> Tuple[int, Dict, Dict, float]:
+        """
+        Produit la reponse a une requete chat completions
+
+        Returns:
+            (status_code, body, headers, latence en secondes)
+        """
+        with self._lock:
+            latency_ms = self._sample_latency()
+            draw = self._rng.random()
+            self.stats["requests"] += 1
+            self.stats["request_bytes"] += request_bytes
+
+            if draw < self.rate_limit_rate:
+                self._record_latency(latency_ms)
+                self.stats["rate_limited"] += 1
+                return 429, self._error_body(
+                    "Rate limit reached (mock)", "rate_limit_exceeded"
+                ), {"retry-after": "0"}, latency_ms / 1000
+
+            if draw < self.rate_limit_rate + self.error_rate:
+                self._record_latency(latency_ms)
+                self.stats["errors"] += 1
+                return 500, self._error_body(
+                    "Internal server error (mock)", "server_error"
+                ), {}, latency_ms / 1000
+
+        messages = payload.get("messages", [])
+        images = self._count_images(messages)
+        prompt_text = self._messages_text(messages)
+        content_rng = random.Random(self._content_seed(prompt_text, images))
+
+        if "NOTE_FINALE" in prompt_text:
+            content = self._correction_response(prompt_text, content_rng)
+        elif "COMMENTAIRE_Q" in prompt_text:
+            content = self._feedback_response(prompt_text)
+        elif images:
+            content = self._transcription_response(prompt_text, images, content_rng)
+        else:
+            content = "Reponse simulee."
+
+        prompt_tokens = self._estimate_tokens(prompt_text) + images * 765
+        completion_tokens = self._estimate_tokens(content)
+        latency_ms += completion_tokens * self.ms_per_completion_token
+
+        with self._lock:
+            self._record_latency(latency_ms)
+            self.stats["chat_requests"] += 1
+            if images:
+                self.stats["vision_requests"] += 1
+                self.stats["images"] += images
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+        body = {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+        return 200, body, {}, latency_ms / 1000
+
+    def _record_latency(self, latency_ms: float):
+        """Enregistre une latence (appele sous self._lock)"""
+        self.stats["latencies_ms"].append(latency_ms)
+        self.stats["latency_count"] += 1
+        self.stats["latency_total_ms"] += latency_ms
+
+    def _sample_latency(self) -> float:
+        """Tire une latence (ms) selon la distribution configuree"""
+        mean = self.latency_ms
+        jitter = self.latency_jitter_ms
+
+        if mean <= 0:
+            return 0.0
+        if self.latency_distribution == "uniform":
+            return max(0.0, self._rng.uniform(mean - jitter, mean + jitter))
+        if self.latency_distribution == "normal":
+            return max(0.0, self._rng.gauss(mean, jitter))
+        if self.latency_distribution == "lognormal":
+            sigma = jitter / mean if jitter > 0 else 0.0
+            return self._rng.lognormvariate(math.log(mean), sigma)
+        return mean
+
+    def _content_seed(self, prompt_text: str, images: int) -> int:
+        """Graine derivee du contenu : meme requete = meme reponse"""
+        digest = hashlib.sha256(f"{self.seed}|{images}|{prompt_text}".encode("utf-8")).hexdigest()
+        return int(digest[:16], 16)
+
+    def _count_images(self, messages: List[Dict]) -> int:
+        """Compte les images d'une requete vision"""
+        count = 0
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, list):
+                count += sum(1 for part in content if part.get("type") == "image_url")
+        return count
+
+    def _messages_text(self, messages: List[Dict]) -> str:
+        """Concatene la partie texte des messages"""
+        texts = []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                texts.append(content)
+            elif isinstance(content, list):
+                texts.extend(part.get("text", "") for part in content if part.get("type") == "text")
+        return "\n".join(texts)
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimation grossiere (4 caracteres par token)"""
+        return max(1, len(text) // 4)
+
+    def _correction_response(self, prompt_text: str, rng: random.Random) -> str:
+        """Reponse au format NOTE_FINALE / Qn attendu par le moteur"""
+        note_totale = 20.0
+        match = re.search(r"NOTE_FINALE: X\.X/([\d.]+)", prompt_text)
+        if match:
+            note_totale = float(match.group(1))
+
+        question_max = [
+            (int(num), float(points))
+            for num, points in re.findall(r"^Q(\d+): X\.X/([\d.]+)", prompt_text, re.MULTILINE)
+        ]
+        if not question_max:
+            question_max = [(1, note_totale)]
+
+        detailed = "COMMENTAIRE_Q" in prompt_text
+        lines = []
+        total = 0.0
+        for num, points in question_max:
+            note = round(rng.uniform(0, points) * 2) / 2
+            total += note
+            pct = round(note / points * 100) if points > 0 else 0
+            lines.append(f"Q{num}: {note}/{points} - [POURCENTAGE: {pct}%]")
+            if detailed:
+                lines.append(f"COMMENTAIRE_Q{num}: Reponse {'complete' if pct >= 50 else 'incomplete'} a la question {num}.")
+                lines.append(f"CONSEIL_Q{num}: Revoir la methode utilisee a la question {num}.")
+
+        response = [
+            "```",
+            f"NOTE_FINALE: {min(total, note_totale)}/{note_totale}",
+            "",
+            "DETAIL_PAR_QUESTION:",
+            *lines,
+        ]
+        if detailed or "POINTS_FORTS:" in prompt_text:
+            response += ["", *self._general_feedback_lines()]
+        response.append("```")
+        return "\n".join(response)
+
+    def _feedback_response(self, prompt_text: str) -> str:
+        """Commentaires d'une copie deja notee (passe de commentaires differee)"""
+        lines = ["```"]
+        for num in re.findall(r"^COMMENTAIRE_Q(\d+):", prompt_text, re.MULTILINE):
+            lines.append(f"COMMENTAIRE_Q{num}: Reponse argumentee a la question {num}, a completer par des exemples.")
+            lines.append(f"CONSEIL_Q{num}: Revoir la methode utilisee a la question {num}.")
+        lines += ["", *self._general_feedback_lines(), "```"]
+        return "\n".join(lines)
+
+    def _general_feedback_lines(self) -> List[str]:
+        return [
+            "POINTS_FORTS:",
+            "- Raisonnement structure",
+            "- Bonne presentation",
+            "",
+            "POINTS_AMELIORATION:",
+            "- Justifier chaque etape",
+            "- Verifier les calculs",
+            "",
+            "COMMENTAIRE_GENERAL:",
+            "Copie serieuse qui montre une comprehension correcte des notions.",
+            "",
+            "CONSEILS_PERSONNALISES:",
+            "- Refaire les exercices du chapitre",
+            "- Relire sa copie avant de rendre",
+            "",
+            "DIAGNOSTIC_PERFORMANCE: Niveau conforme aux attentes.",
+        ]
+
+    def _transcription_response(self, prompt_text: str, images: int, rng: random.Random) -> str:
+        """
+        Transcription simulee (une section par image)
+
+        Si la requete contient des marqueurs de page (OCR groupe), chaque
+        section est precedee de son marqueur et porte sa propre analyse.
+        """
+        markers = re.findall(r"^=== PAGE \d+ ===$", prompt_text, re.MULTILINE)
+        analysis = "\n---\nANALYSE:\n- Qualite d'ecriture: BONNE\n- Mots incertains: []\n- Observations: copie simulee"
+        pages = []
+        for page in range(images):
+            count = rng.randint(3, 6)
+            start = rng.randrange(len(MOCK_TRANSCRIPTION_LINES))
+            lines = [
+                MOCK_TRANSCRIPTION_LINES[(start + i) % len(MOCK_TRANSCRIPTION_LINES)]
+                for i in range(count)
+            ]
+            if rng.random() < 0.3:
+                lines.append("Donc le resultat est [mot?] correct.")
+            if rng.random() < 0.1:
+                lines.append("[illisible] [illisible]")
+            if page < len(markers):
+                lines.insert(0, markers[page])
+                if "ANALYSE:" in prompt_text:
+                    lines.append(analysis)
+            pages.append("\n".join(lines))
+
+        text = "\n\n".join(pages)
+        if "ANALYSE:" in prompt_text and not markers:
+            text += analysis
+        return text
+
+    def _error_body(self, message: str, code: str) -> Dict:
+        return {"error": {"message": message, "type": code, "param": None, "code": code}}
+
+
+class MockLLMTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Transport httpx qui repond localement aux appels /chat/completions"""
+
+    def __init__(self, responder: Optional[MockLLMResponder] = None, sleep: bool = True):
+        self.responder = responder or MockLLMResponder.from_settings()
+        self.sleep = sleep
+
+    def _dispatch(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+        if not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={"error": {"message": "Not found (mock)"}}), 0.0
+
+        body = request.read()
+        status_code, payload, headers, latency = self.responder.respond(
+            json.loads(body or b"{}"), request_bytes=len(body)
+        )
+        return httpx.Response(status_code, json=payload, headers=headers), latency
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response, latency = self._dispatch(request)
+        if self.sleep and latency > 0:
+            time.sleep(latency)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response, latency = self._dispatch(request)
+        if self.sleep and latency > 0:
+            await asyncio.sleep(latency)
+        return response
+
+
+_default_responder: Optional[MockLLMResponder] = None
+
+
+def get_mock_responder() -> MockLLMResponder:
+    """Responder partage par tous les clients simules du processus"""
+    global _default_responder
+    if _default_responder is None:
+        _default_responder = MockLLMResponder.from_settings()
+    return _default_responder
+
+
+def create_mock_openai_client(
+    responder: Optional[MockLLMResponder] = None,
+    max_retries: int = 2
+) -> OpenAI:
+    """Cree un client OpenAI branche sur le transport simule"""
+    transport = MockLLMTransport(responder or get_mock_responder())
+    return OpenAI(
+        api_key="mock-key",
+        base_url="http://mock-llm.local/v1",
+        http_client=httpx.Client(transport=transport),
+        max_retries=max_retries
+    )
+
+
+def create_mock_llm_app(responder: Optional[MockLLMResponder] = None):
+    """Application FastAPI exposant /v1/chat/completions simule"""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    mock_responder = responder or MockLLMResponder.from_settings()
+    app = FastAPI(title="Mock LLM")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.body()
+        status_code, payload, headers, latency = mock_responder.respond(
+            json.loads(body or b"{}"), request_bytes=len(body)
+        )
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return JSONResponse(payload, status_code=status_code, headers=headers)
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {
+            "object": "list",
+            "data": [{"id": m, "object": "model", "owned_by": "mock"} for m in ("gpt-4o", "gpt-4o-mini")]
+        }
+
+    @app.get("/stats")
+    async def stats():
+        data = dict(mock_responder.stats)
+        latencies = sorted(data.pop("latencies_ms"))
+        data["latency_mean_ms"] = data["latency_total_ms"] / data["latency_count"] if data["latency_count"] else 0.0
+        data["latency_p50_ms"] = latencies[len(latencies) // 2] if latencies else 0.0
+        data["latency_p95_ms"] = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        return data
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serveur LLM simule compatible OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=settings.LLM_MOCK_SEED)
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default=settings.LLM_MOCK_LATENCY_DISTRIBUTION)
+    parser.add_argument("--latency-ms", type=float, default=settings.LLM_MOCK_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=settings.LLM_MOCK_LATENCY_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=settings.LLM_MOCK_ERROR_RATE)
+    parser.add_argument("--rate-limit-rate", type=float, default=settings.LLM_MOCK_RATE_LIMIT_RATE)
+    parser.add_argument("--ms-per-token", type=float, default=settings.LLM_MOCK_MS_PER_COMPLETION_TOKEN)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_mock_llm_app(MockLLMResponder(
+            seed=args.seed,
+            latency_distribution=args.distribution,
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            ms_per_completion_token=args.ms_per_token
+        )),
+        host=args.host,
+        port=args.port
+    )
@@ -0,0 +1,182 @@
+"""
+services/ocr_cache.py
+=====================
+Cache disque des transcriptions OCR, indexe par le hash de l'image de page
+
+Cle : (hash de l'image rendue, matiere, version du prompt, modele).
+Chaque evaluation dispose de son propre espace de noms ; la taille totale
+est bornee avec eviction LRU (date d'acces = mtime du fichier).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..config import settings
+
+DEFAULT_NAMESPACE = "_global"
+
+
+def build_cache_key(image_bytes: bytes, matiere: str, prompt_version: str, model: str) -> str:
+    """Cle de cache d'une page"""
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    return hashlib.sha256(
+        f"{image_hash}|{matiere.lower()}|{prompt_version}|{model}".encode("utf-8")
+    ).hexdigest()
+
+
+class OCRTranscriptionCache:
+    """Cache LRU persistant des transcriptions par page"""
+
+    def __init__(self, root: Optional[Path] = None, max_size_mb: Optional[float] = None):
+        self.root = Path(root or Path(settings.DATA_DIR) / "cache" / "ocr")
+        self.max_size_bytes = int((max_size_mb or settings.OCR_CACHE_MAX_MB) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[Path, int]"] = None
+        self._total_size = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Dict]:
+        """Retourne l'entree en cache (et la marque comme recemment utilisee)"""
+        namespace = self._namespace(namespace)
+        path = self._entry_path(key, namespace)
+
+        with self._lock:
+            self._load_index()
+            if path not in self._index:
+                self._count(namespace, "misses")
+                return None
+
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, json.JSONDecodeError):
+                self._forget(path)
+                self._count(namespace, "misses")
+                return None
+
+            self._index.move_to_end(path)
+            self._count(namespace, "hits")
+            return entry
+
+    def put(self, key: str, entry: Dict, namespace: Optional[str] = None):
+        """Enregistre une transcription puis applique la borne de taille"""
+        namespace = self._namespace(namespace)
+        path = self._entry_path(key, namespace)
+        data = json.dumps(
+            {**entry, "cached_at": datetime.now().isoformat()}, ensure_ascii=False
+        ).encode("utf-8")
+
+        with self._lock:
+            self._load_index()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._forget(path)
+            self._index[path] = len(data)
+            self._total_size += len(data)
+            self._count(namespace, "writes")
+            self._evict()
+
+    def clear(self, namespace: Optional[str] = None):
+        """Vide un espace de noms (ou tout le cache)"""
+        with self._lock:
+            self._load_index()
+            prefix = self.root / self._namespace(namespace) if namespace else self.root
+            for path in [p for p in self._index if prefix in p.parents]:
+                path.unlink(missing_ok=True)
+                self._forget(path)
+
+    def get_stats(self, namespace: Optional[str] = None) -> Dict:
+        """Statistiques hits/miss (processus courant) et occupation disque"""
+        with self._lock:
+            self._load_index()
+            if namespace:
+                namespace = self._namespace(namespace)
+                prefix = self.root / namespace
+                sizes = [size for path, size in self._index.items() if prefix in path.parents]
+                counters = dict(self.stats.get(namespace, {}))
+            else:
+                sizes = list(self._index.values())
+                counters = {}
+                for ns_counters in self.stats.values():
+                    for name, value in ns_counters.items():
+                        counters[name] = counters.get(name, 0) + value
+
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "namespace": namespace or "*",
+            "entries": len(sizes),
+            "size_bytes": sum(sizes),
+            "max_size_bytes": self.max_size_bytes,
+            "hits": hits,
+            "misses": misses,
+            "writes": counters.get("writes", 0),
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }
+
+    def _namespace(self, namespace: Optional[str]) -> str:
+        if not namespace:
+            return DEFAULT_NAMESPACE
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in namespace)
+
+    def _entry_path(self, key: str, namespace: str) -> Path:
+        return self.root / namespace / key[:2] / f"{key}.json"
+
+    def _count(self, namespace: str, counter: str, amount: int = 1):
+        ns_stats = self.stats.setdefault(namespace, {})
+        ns_stats[counter] = ns_stats.get(counter, 0) + amount
+
+    def _load_index(self):
+        """Charge l'index LRU depuis le disque au premier acces"""
+        if self._index is not None:
+            return
+
+        entries = []
+        if self.root.exists():
+            for path in self.root.rglob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+
+        entries.sort(key=lambda e: e[0])
+        self._index = OrderedDict((path, size) for _, path, size in entries)
+        self._total_size = sum(size for _, _, size in entries)
+
+    def _forget(self, path: Path):
+        size = self._index.pop(path, None)
+        if size is not None:
+            self._total_size -= size
+
+    def _evict(self):
+        """Supprime les entrees les moins recemment utilisees au-dela de la borne"""
+        while self._total_size > self.max_size_bytes and self._index:
+            path, size = self._index.popitem(last=False)
+            self._total_size -= size
+            path.unlink(missing_ok=True)
+            self._count(path.parent.parent.name, "evictions")
+
+
+_default_cache: Optional[OCRTranscriptionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> OCRTranscriptionCache:
+    """Cache partage par le processus"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = OCRTranscriptionCache()
+        return _default_cache
@@ -0,0 +1,217 @@
+"""
+services/ocr_engines.py
+=======================
+Moteurs OCR interchangeables et routage entre moteurs
+
+- VisionOCREngine : gpt-4o vision (manuscrit, cout par page), avec une
+  premiere passe economique optionnelle (OCR_DRAFT_PASS)
+- TesseractOCREngine : Tesseract local sur CPU (imprime, hors ligne)
+- OCREngineRouter : choisit le moteur selon le mode (vision, local,
+  local_first) ; en local_first, les pages dont la confiance locale est
+  insuffisante sont retranscrites par le moteur vision
+"""
+
+import csv
+import io
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+from ..config import settings
+from .ocr_preprocessing import estimate_vision_tokens
+
+ENGINE_MODES = ("vision", "local", "local_first")
+
+
+class OCREngine:
+    """Interface d'un moteur OCR de page"""
+
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    def transcribe(self, image: Dict, matiere: str, detailed: bool) -> Dict:
+        """
+        Transcrit une image de page preparee ({"image_bytes", "mime_type", ...})
+
+        Retourne au minimum transcribed_text et confidence (0 a 1).
+        """
+        raise NotImplementedError
+
+
+class VisionOCREngine(OCREngine):
+    """
+    OCR par le modele vision (prompt, cache et limites de l'OCRProcessor)
+
+    Si la page porte une image de premiere passe (image["draft"], rendue en
+    basse resolution), elle est transcrite d'abord en detail reduit ; seules
+    les pages dont la confiance est inferieure a draft_min_confidence sont
+    retranscrites avec l'image pleine resolution. Les deux tentatives sont
+    decrites dans result["attempts"], le resultat retenu est celui de plus
+    forte confiance.
+    """
+
+    name = "vision"
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    def transcribe(self, image: Dict, matiere: str, detailed: bool) -> Dict:
+        draft = image.get("draft")
+        if not draft:
+            return self._transcribe(image, matiere, detailed)
+
+        draft_detail = self.processor.draft_detail
+        first = self._transcribe(draft, matiere, detailed, draft_detail)
+        attempts = [self._attempt("brouillon", draft, draft_detail, first)]
+        if not first.get("error") and first.get("confidence", 0.0) >= self.processor.draft_min_confidence:
+            return {**first, "resolution": "brouillon", "attempts": attempts}
+
+        # Confiance insuffisante : reprise avec l'image pleine resolution
+        second = self._transcribe(image, matiere, detailed)
+        attempts.append(self._attempt("pleine", image, None, second))
+        if second.get("error") or (not first.get("error") and first["confidence"] > second["confidence"]):
+            chosen, resolution = first, "brouillon"
+        else:
+            chosen, resolution = second, "pleine"
+        return {**chosen, "resolution": resolution, "retried": True, "attempts": attempts}
+
+    def _transcribe(self, image: Dict, matiere: str, detailed: bool, detail: Optional[str] = None) -> Dict:
+        return self.processor._transcribe_image_bytes(
+            image["image_bytes"], matiere, detailed, image.get("mime_type", "image/png"), detail
+        )
+
+    def _attempt(self, resolution: str, image: Dict, detail: Optional[str], result: Dict) -> Dict:
+        """Resume d'une tentative de transcription (taille, detail, confiance, cout)"""
+        detail = detail or settings.OCR_IMAGE_DETAIL
+        width, height = image.get("width", 0), image.get("height", 0)
+        attempt = {
+            "resolution": resolution,
+            "width": width,
+            "height": height,
+            "detail": detail,
+            "estimated_tokens": estimate_vision_tokens(width, height, detail),
+            "confidence": result.get("confidence", 0.0),
+            "cache_hit": result.get("cache_hit", False)
+        }
+        if result.get("error"):
+            attempt["error"] = result["error"]
+        return attempt
+
+
+class TesseractOCREngine(OCREngine):
+    """
+    OCR local avec l'executable Tesseract (aucune dependance Python)
+
+    Utilise l'image haute resolution de la page (local_image_bytes, rendue a
+    OCR_LOCAL_DPI) si elle existe ; la confiance est la moyenne des
+    confiances par mot rapportees par Tesseract.
+    """
+
+    name = "tesseract"
+
+    def __init__(self, command: Optional[str] = None, lang: Optional[str] = None, timeout: float = 60.0):
+        self.command = command or settings.TESSERACT_CMD
+        self.lang = lang or settings.TESSERACT_LANG
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        return shutil.which(self.command) is not None
+
+    def transcribe(self, image: Dict, matiere: str, detailed: bool) -> Dict:
+        img_bytes = image.get("local_image_bytes") or image["image_bytes"]
+        completed = subprocess.run(
+            [self.command, "stdin", "stdout", "-l", self.lang, "--psm", "6", "tsv"],
+            input=img_bytes,
+            capture_output=True,
+            timeout=self.timeout,
+            check=True
+        )
+        text, confidence = self._parse_tsv(completed.stdout.decode("utf-8", errors="replace"))
+        return {
+            "transcribed_text": text,
+            "confidence": confidence,
+            "matiere": matiere,
+            "word_count": len(text.split()),
+            "character_count": len(text),
+            "model_used": f"tesseract-{self.lang}"
+        }
+
+    def _parse_tsv(self, tsv: str):
+        """Reconstitue le texte ligne par ligne et la confiance moyenne des mots"""
+        lines: Dict[tuple, List[str]] = {}
+        confidences = []
+        for row in csv.DictReader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE):
+            word = (row.get("text") or "").strip()
+            try:
+                conf = float(row.get("conf", -1))
+            except ValueError:
+                conf = -1
+            if not word or conf < 0:
+                continue
+            key = (row["page_num"], row["block_num"], row["par_num"], row["line_num"])
+            lines.setdefault(key, []).append(word)
+            confidences.append(conf)
+
+        text = "\n".join(" ".join(words) for words in lines.values())
+        confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+        return text, round(confidence, 2)
+
+
+class OCREngineRouter:
+    """Choix du moteur OCR par page"""
+
+    def __init__(
+        self,
+        vision_engine: OCREngine,
+        local_engine: Optional[OCREngine] = None,
+        mode: Optional[str] = None,
+        min_local_confidence: Optional[float] = None
+    ):
+        self.vision_engine = vision_engine
+        self.local_engine = local_engine if local_engine is not None else TesseractOCREngine()
+        self.mode = (mode or settings.OCR_ENGINE).lower()
+        self.min_local_confidence = (
+            settings.OCR_LOCAL_MIN_CONFIDENCE if min_local_confidence is None else min_local_confidence
+        )
+
+        if self.mode not in ENGINE_MODES:
+            raise ValueError(f"Mode OCR inconnu: {self.mode}")
+
+    @property
+    def uses_local(self) -> bool:
+        """Le moteur local sera sollicite (rendu haute resolution necessaire)"""
+        return self.mode != "vision" and self.local_engine.available()
+
+    def transcribe(self, image: Dict, matiere: str, detailed: bool) -> Dict:
+        """Transcrit une page avec le moteur adapte et indique le(s) moteur(s) utilise(s)"""
+        if self.mode == "vision":
+            return self._run(self.vision_engine, image, matiere, detailed)
+
+        if not self.local_engine.available():
+            if self.mode == "local":
+                raise RuntimeError(f"Moteur OCR local indisponible: {self.local_engine.name}")
+            # local_first sans moteur local : vision directement
+            return self._run(self.vision_engine, image, matiere, detailed)
+
+        try:
+            local_result = self._run(self.local_engine, image, matiere, detailed)
+        except Exception as e:
+            if self.mode == "local":
+                raise
+            local_result = {"confidence": 0.0, "error": str(e)}
+
+        if self.mode == "local" or local_result.get("confidence", 0.0) >= self.min_local_confidence:
+            return local_result
+
+        # Confiance locale insuffisante : escalade vers le moteur vision
+        result = self._run(self.vision_engine, image, matiere, detailed)
+        result["escalated"] = True
+        result["local_confidence"] = local_result.get("confidence", 0.0)
+        return result
+
+    def _run(self, engine: OCREngine, image: Dict, matiere: str, detailed: bool) -> Dict:
+        result = engine.transcribe(image, matiere, detailed)
+        result.setdefault("engine", engine.name)
+        return result
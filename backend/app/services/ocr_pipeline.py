@@ -0,0 +1,203 @@
+"""
+services/ocr_pipeline.py
+========================
+Pipeline OCR asynchrone : rendu des copies dans un pool de processus,
+transcription vision en parallele, sans bloquer la boucle d'evenements
+
+Le rendu (get_pixmap, pretraitement, encodage) est limite par le CPU : il
+est confie a un ProcessPoolExecutor dimensionne sur la machine, par lots de
+OCR_RENDER_PAGE_BATCH pages. Chaque copie en cours de transcription garde au
+plus RENDER_PREFETCH_BATCHES lots rendus d'avance : si l'OCR prend du
+retard, le rendu s'arrete. Les copies sont transcrites au plus
+OCR_CONCURRENT_DOCUMENTS a la fois ; une copie n'est ouverte qu'a son tour.
+
+Pages rendues en memoire, quel que soit le nombre de copies ou de pages :
+au plus OCR_CONCURRENT_DOCUMENTS x (RENDER_PREFETCH_BATCHES x
+OCR_RENDER_PAGE_BATCH pages d'avance + 2 x OCR_MAX_CONCURRENT_PAGES pages en
+cours de transcription, voir OCRProcessor.transcribe_prepared).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import fitz  # PyMuPDF
+
+from ..config import settings
+from .ai_ocr_service import OCRProcessor, PageRenderer
+
+# Lots rendus d'avance par copie en cours de transcription
+RENDER_PREFETCH_BATCHES = 2
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def render_pdf_pages(
+    source: Union[str, bytes],
+    options: Optional[Dict] = None,
+    start: int = 0,
+    stop: Optional[int] = None
+) -> List[Dict]:
+    """
+    Prepare les pages start a stop (exclue) d'un PDF (execute dans un
+    processus de rendu)
+
+    options : parametres du PageRenderer de l'OCRProcessor (PageRenderer.options())
+    """
+    return list(PageRenderer(**(options or {})).iter_pages(source, start, stop))
+
+
+def pdf_page_count(path: Union[str, Path]) -> int:
+    """Nombre de pages d'un PDF (sans rendu)"""
+    with fitz.open(str(path)) as doc:
+        return doc.page_count
+
+
+def render_workers() -> int:
+    """Nombre de processus de rendu (OCR_RENDER_WORKERS, 0 = un par coeur)"""
+    return settings.OCR_RENDER_WORKERS or os.cpu_count() or 1
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de rendu partage par le processus (None si un seul worker)
+
+    Les processus sont demarres en mode spawn : l'application tourne avec des
+    threads (serveur, pools OCR) et un fork pourrait heriter de verrous pris.
+    """
+    global _render_pool
+    if render_workers() <= 1:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=render_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _render_pool
+
+
+def shutdown_render_pool():
+    """Arrete le pool de rendu (arret de l'application)"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+class OCRPipeline:
+    """Rendu des copies en processus separes, OCR asynchrone borne"""
+
+    def __init__(
+        self,
+        processor: Optional[OCRProcessor] = None,
+        ocr_workers: Optional[int] = None
+    ):
+        self.processor = processor or OCRProcessor()
+        self.ocr_workers = max(1, ocr_workers or settings.OCR_CONCURRENT_DOCUMENTS)
+        self.page_batch = max(1, settings.OCR_RENDER_PAGE_BATCH)
+        # Lots de pages rendus en processus / dans le thread de la copie, copies en echec
+        self.stats = {"copies": 0, "rendu_processus": 0, "rendu_thread": 0, "erreurs_rendu": 0}
+        self._stats_lock = threading.Lock()
+
+    async def transcribe_files(
+        self,
+        paths: Sequence[Union[str, Path]],
+        matiere: str = "general",
+        detailed: bool = True
+    ) -> List[Dict]:
+        """
+        Transcrit des copies ; les resultats sont retournes dans l'ordre des
+        chemins. Les images (non PDF) sont transcrites directement.
+        """
+        loop = asyncio.get_running_loop()
+        results: List[Optional[Dict]] = [None] * len(paths)
+        # Iterateur partage : chaque transcription prend la copie suivante
+        remaining = iter(enumerate(paths))
+
+        async def consume():
+            for index, path in remaining:
+                results[index] = await loop.run_in_executor(None, self._transcribe, Path(path), matiere, detailed)
+
+        self.stats["copies"] += len(paths)
+        await asyncio.gather(*(consume() for _ in range(self.ocr_workers)))
+        return results
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _submit_batch(self, path: Path, options: Dict, start: int) -> Optional[Future]:
+        """Confie un lot de pages au pool de rendu (None : rendu dans le thread)"""
+        pool = get_render_pool()
+        if pool is None:
+            return None
+        try:
+            return pool.submit(render_pdf_pages, str(path), options, start, start + self.page_batch)
+        except (BrokenProcessPool, RuntimeError):
+            shutdown_render_pool()
+            return None
+
+    def _batch_pages(self, future: Optional[Future], path: Path, options: Dict, start: int) -> List[Dict]:
+        """Pages d'un lot : resultat du pool, ou rendu dans le thread si indisponible"""
+        if future is not None:
+            try:
+                pages = future.result()
+                self._count("rendu_processus")
+                return pages
+            except BrokenProcessPool:
+                shutdown_render_pool()
+        pages = render_pdf_pages(str(path), options, start, start + self.page_batch)
+        self._count("rendu_thread")
+        return pages
+
+    def _iter_rendered_pages(self, path: Path) -> Iterator[Dict]:
+        """
+        Pages preparees d'une copie, rendues par lots dans le pool de
+        processus avec au plus RENDER_PREFETCH_BATCHES lots d'avance
+        """
+        options = self.processor.renderer.options()
+        starts = deque(range(0, pdf_page_count(path), self.page_batch))
+        pending = deque()
+        try:
+            while starts or pending:
+                while starts and len(pending) < RENDER_PREFETCH_BATCHES:
+                    start = starts.popleft()
+                    pending.append((start, self._submit_batch(path, options, start)))
+                start, future = pending.popleft()
+                yield from self._batch_pages(future, path, options, start)
+        except Exception:
+            self._count("erreurs_rendu")
+            raise
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _transcribe(self, path: Path, matiere: str, detailed: bool) -> Dict:
+        """Etape OCR d'une copie (executee dans un thread), rendu au fil des pages"""
+        if path.suffix.lower() != ".pdf":
+            return self.processor.transcribe_file(str(path), matiere, detailed)
+        try:
+            return self.processor.transcribe_prepared(self._iter_rendered_pages(path), matiere, detailed)
+        except Exception as e:
+            return self.processor._error_result(str(e))
+
+
+# Interface simple
+async def transcribe_manuscripts_async(
+    paths: Sequence[Union[str, Path]],
+    matiere: str = "general",
+    evaluation_id: Optional[str] = None
+) -> List[Dict]:
+    """Transcrit un lot de copies sans bloquer la boucle d'evenements"""
+    pipeline = OCRPipeline(OCRProcessor(cache_namespace=evaluation_id))
+    return await pipeline.transcribe_files(paths, matiere)
@@ -0,0 +1,283 @@
+"""
+services/ocr_preprocessing.py
+=============================
+Pretraitement des pages avant l'OCR vision : niveaux de gris, normalisation
+du contraste, redressement, rognage des marges, resolution adaptee aux tuiles
+du modele et encodage JPEG/WebP
+"""
+
+import io
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+import fitz  # PyMuPDF
+
+from ..config import settings
+
+
+# gpt-4o (detail high) : image ramenee dans 2048x2048, petit cote a 768 px,
+# puis decoupee en tuiles de 512 px (170 tokens chacune + 85 tokens de base)
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+VISION_TILE_SIZE = 512
+VISION_BASE_TOKENS = 85
+VISION_TILE_TOKENS = 170
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+
+def estimate_vision_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Tokens factures pour une image selon les regles de redimensionnement OpenAI"""
+    if detail == "low" or width <= 0 or height <= 0:
+        return VISION_BASE_TOKENS
+
+    scale = min(1.0, VISION_MAX_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, VISION_SHORT_SIDE / min(width, height))
+    width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / VISION_TILE_SIZE) * math.ceil(height / VISION_TILE_SIZE)
+    return VISION_BASE_TOKENS + VISION_TILE_TOKENS * tiles
+
+
+def page_ink_metrics(gray: np.ndarray, margin: float = 0.05) -> Dict[str, float]:
+    """
+    Mesures d'encre d'une page rendue en niveaux de gris (HxW)
+
+    Calculees sur une vignette, hors d'une bande de marge (bords de scan,
+    ombre de reliure, trous de perforation) :
+    - ink_density : part des pixels nettement plus sombres que le fond local
+      (filtre maximum) ; les ombres et le fond gris d'une photo ne comptent
+      pas, l'ecriture et le quadrillage comptent
+    - ink_std : ecart-type des niveaux de gris (eclairage, fond de photo...)
+    """
+    small = Image.fromarray(gray)
+    small.thumbnail((400, 400))
+    pixels = np.asarray(small, dtype=np.int16)
+    background = np.asarray(small.filter(ImageFilter.MaxFilter(7)), dtype=np.int16)
+
+    height, width = pixels.shape
+    dy, dx = int(height * margin), int(width * margin)
+    inner = (slice(dy, height - dy or None), slice(dx, width - dx or None))
+    return {
+        "ink_density": round(float(((background - pixels)[inner] > 40).mean()), 6),
+        "ink_std": round(float(pixels[inner].std()), 2)
+    }
+
+
+def is_blank_page(metrics: Dict[str, float]) -> bool:
+    """
+    Page blanche : (quasi) aucun pixel d'encre sur un fond regulier
+
+    La borne sur l'ecart-type evite de declarer blanche une photo dont le
+    fond (bureau, ombre portee) masquerait une ecriture peu contrastee.
+    """
+    return (
+        metrics.get("ink_density", 1.0) <= settings.OCR_BLANK_MAX_INK_DENSITY
+        and metrics.get("ink_std", 255.0) <= settings.OCR_BLANK_MAX_STD
+    )
+
+
+class ImagePreprocessor:
+    """Prepare des images de pages compactes et lisibles pour l'OCR vision"""
+
+    def __init__(
+        self,
+        target_short_side: Optional[int] = None,
+        image_format: Optional[str] = None,
+        quality: Optional[int] = None,
+        grayscale: bool = True,
+        normalize_contrast: bool = True,
+        deskew: bool = True,
+        trim_margins: bool = True,
+        tile_snap: float = 0.1
+    ):
+        self.target_short_side = target_short_side or settings.OCR_TARGET_SHORT_SIDE
+        self.image_format = (image_format or settings.OCR_IMAGE_FORMAT).lower()
+        self.quality = quality or settings.OCR_IMAGE_QUALITY
+        self.grayscale = grayscale
+        self.normalize_contrast = normalize_contrast
+        self.deskew = deskew
+        self.trim_margins = trim_margins
+        self.tile_snap = tile_snap
+
+        if self.image_format not in MIME_TYPES:
+            raise ValueError(f"Format d'image non supporte: {self.image_format}")
+
+    def render_page(
+        self,
+        page: "fitz.Page",
+        scale: float = 1.0,
+        draft_short_side: Optional[int] = None
+    ) -> Dict:
+        """
+        Rend une page PDF a une resolution adaptee puis la pretraite
+
+        La page est rendue juste au-dessus de la resolution utile (le rognage
+        des marges retire jusqu'a ~20 % de la largeur), puis reduite a
+        target_short_side * scale. Avec draft_short_side, une version reduite
+        (premiere passe OCR economique) est tiree de la meme pixmap et
+        placee dans result["draft"].
+        """
+        short_side_pt = min(page.rect.width, page.rect.height) or 1
+        target = self.target_short_side * scale
+        zoom = max(0.5, target * 1.25 / short_side_pt)
+
+        colorspace = fitz.csGRAY if self.grayscale else fitz.csRGB
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+        mode = "L" if pix.n == 1 else "RGB"
+        pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        if mode == "L":
+            pixels = pixels[:, :, 0]
+        pixels = pixels.copy()
+        del pix
+
+        result = self.preprocess_array(pixels, target)
+        result["zoom"] = round(zoom, 3)
+        if draft_short_side and draft_short_side < target:
+            result["draft"] = self.preprocess_array(pixels, draft_short_side)
+        return result
+
+    def preprocess_bytes(
+        self,
+        img_bytes: bytes,
+        scale: float = 1.0,
+        draft_short_side: Optional[int] = None
+    ) -> Dict:
+        """Pretraite une image deja encodee (upload photo/scan)"""
+        with Image.open(io.BytesIO(img_bytes)) as img:
+            img = img.convert("L" if self.grayscale else "RGB")
+            pixels = np.asarray(img).copy()
+        target = self.target_short_side * scale
+        result = self.preprocess_array(pixels, target)
+        if draft_short_side and draft_short_side < target:
+            result["draft"] = self.preprocess_array(pixels, draft_short_side)
+        return result
+
+    def preprocess_array(self, pixels: np.ndarray, target_short_side: float) -> Dict:
+        """Applique la chaine de pretraitement a un tableau HxW (ou HxWx3)"""
+        gray = pixels if pixels.ndim == 2 else self._to_gray(pixels)
+        angle = 0.0
+        metrics = page_ink_metrics(gray)
+
+        if self.normalize_contrast:
+            gray = self._normalize_contrast(gray)
+            if pixels.ndim == 2:
+                pixels = gray
+
+        image = Image.fromarray(pixels)
+
+        if self.deskew:
+            angle = self._estimate_skew(gray)
+            if angle:
+                image = image.rotate(angle, resample=Image.BILINEAR, fillcolor=255 if image.mode == "L" else (255, 255, 255))
+                gray = np.asarray(image if image.mode == "L" else image.convert("L"))
+
+        if self.trim_margins:
+            box = self._content_box(gray)
+            if box:
+                image = image.crop(box)
+
+        ratio = min(1.0, target_short_side / min(image.size))
+        ratio *= self._tile_snap_ratio(image.width * ratio, image.height * ratio)
+        if ratio < 1.0:
+            image = image.resize(
+                (max(1, round(image.width * ratio)), max(1, round(image.height * ratio))),
+                Image.LANCZOS
+            )
+
+        image_bytes = self._encode(image)
+        return {
+            "image_bytes": image_bytes,
+            "mime_type": MIME_TYPES[self.image_format],
+            "width": image.width,
+            "height": image.height,
+            "bytes": len(image_bytes),
+            "estimated_tokens": estimate_vision_tokens(image.width, image.height),
+            "skew_angle": angle,
+            **metrics
+        }
+
+    def _tile_snap_ratio(self, width: float, height: float) -> float:
+        """
+        Reduction supplementaire (au plus tile_snap) qui economise une rangee
+        ou une colonne de tuiles de 512 px, par exemple 768x1087 -> 724x1024
+        (6 -> 4 tuiles)
+        """
+        tokens = estimate_vision_tokens(int(width), int(height))
+        best = 0.0
+        for side in (width, height):
+            count = math.ceil(side / VISION_TILE_SIZE)
+            if count <= 1:
+                continue
+            ratio = (count - 1) * VISION_TILE_SIZE / side
+            if 1 - self.tile_snap <= ratio and ratio > best:
+                if estimate_vision_tokens(int(width * ratio), int(height * ratio)) < tokens:
+                    best = ratio
+        return best or 1.0
+
+    def _to_gray(self, pixels: np.ndarray) -> np.ndarray:
+        weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        return (pixels[..., :3].astype(np.float32) @ weights).astype(np.uint8)
+
+    def _normalize_contrast(self, gray: np.ndarray) -> np.ndarray:
+        """Etirement lineaire entre les percentiles 1 et 99"""
+        low, high = np.percentile(gray, (1, 99))
+        if high - low < 10:
+            return gray
+        stretched = (gray.astype(np.float32) - low) * (255.0 / (high - low))
+        return np.clip(stretched, 0, 255).astype(np.uint8)
+
+    def _estimate_skew(self, gray: np.ndarray, max_angle: float = 5.0, step: float = 0.5) -> float:
+        """
+        Angle de redressement par profil de projection
+
+        L'angle retenu maximise la variance des sommes d'encre par ligne
+        (les lignes d'ecriture deviennent horizontales).
+        """
+        small = Image.fromarray(gray)
+        small.thumbnail((400, 400))
+        ink = np.asarray(small) < 128
+        if ink.mean() < 0.002:
+            return 0.0
+
+        ink_image = Image.fromarray((ink * 255).astype(np.uint8))
+        best_angle, best_score = 0.0, -1.0
+        for angle in np.arange(-max_angle, max_angle + step / 2, step):
+            rotated = np.asarray(ink_image.rotate(float(angle), resample=Image.NEAREST))
+            score = float(np.var(rotated.sum(axis=1, dtype=np.int64)))
+            if score > best_score:
+                best_angle, best_score = float(angle), score
+
+        return best_angle if abs(best_angle) >= step else 0.0
+
+    def _content_box(self, gray: np.ndarray, padding: int = 12) -> Optional[Tuple[int, int, int, int]]:
+        """Boite englobant l'encre (les lignes/colonnes quasi vides sont rognees)"""
+        ink = gray < 160
+        rows = np.flatnonzero(ink.mean(axis=1) > 0.002)
+        cols = np.flatnonzero(ink.mean(axis=0) > 0.002)
+        if rows.size == 0 or cols.size == 0:
+            return None
+
+        height, width = gray.shape
+        box = (
+            max(0, int(cols[0]) - padding),
+            max(0, int(rows[0]) - padding),
+            min(width, int(cols[-1]) + padding + 1),
+            min(height, int(rows[-1]) + padding + 1)
+        )
+        if (box[2] - box[0]) * (box[3] - box[1]) >= 0.95 * width * height:
+            return None
+        return box
+
+    def _encode(self, image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        if self.image_format == "jpeg":
+            image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        elif self.image_format == "webp":
+            image.save(buffer, format="WEBP", quality=self.quality, method=4)
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
@@ -2,8 +2,14 @@
 services/pdf_report_service.py
 ==============================
 Generateur de rapports PDF personnalises pour les etudiants
+
+Les elements communs a tous les rapports (feuille de styles, styles de
+tableaux, paragraphes et tableaux statiques) sont construits une seule fois
+par processus dans un ReportTemplate ; seuls les elements propres a
+l'etudiant sont assembles a chaque rapport.
 """
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -11,16 +17,172 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from datetime import datetime
+import copy
 import io
-from typing import Dict, List
-
-
-class StudentReportGenerator:
-    """Generateur de rapports PDF personnalises pour etudiants"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# A incrementer a chaque modification du contenu ou de la mise en page des
+# rapports : invalide les PDF deja generes (voir services/report_generation.py)
+REPORT_GENERATOR_VERSION = "2"
+
+# Champs de l'evaluation affiches dans le rapport (les autres n'invalident pas le cache)
+REPORT_EVAL_FIELDS = ("classe", "matiere", "titre", "date", "enseignant")
+
+
+def use_binary_streams():
+    """
+    Flux compresses ecrits en binaire plutot qu'en ASCII85 : encodage plus
+    rapide et PDF ~15 % plus legers
+
+    Reglage global de reportlab : applique uniquement a l'initialisation des
+    processus de generation (report_generation.get_report_pool), pour ne pas
+    modifier les autres PDF produits par l'application.
+    """
+    rl_config.useA85 = 0
+
+
+def _grid_style(
+    font_size: int,
+    grid_color: str,
+    padding: Tuple[int, int],
+    align: str = 'LEFT',
+    valign: str = 'MIDDLE'
+) -> List[tuple]:
+    """Commandes communes des tableaux : police, alignement, grille, marges"""
+    horizontal, vertical = padding
+    return [
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('VALIGN', (0, 0), (-1, -1), valign),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor(grid_color)),
+        ('LEFTPADDING', (0, 0), (-1, -1), horizontal),
+        ('RIGHTPADDING', (0, 0), (-1, -1), horizontal),
+        ('TOPPADDING', (0, 0), (-1, -1), vertical),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), vertical),
+    ]
+
+
+def _header_style(background: str) -> List[tuple]:
+    """En-tete colore d'un tableau (texte blanc en gras)"""
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(background)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ]
+
+
+# Tableau de resultats (page de garde) : le fond depend de la performance
+RESULTS_TABLE_STYLE = [
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 14),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 2, colors.white),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+]
+
+PLANNING_DATA = [
+    ['Periode', 'Objectif', 'Actions'],
+    ['Semaine 1', 'Revisions urgentes', 'Focus sur priorite 1'],
+    ['Semaine 2', 'Approfondissements', 'Travail sur priorite 2'],
+    ['Semaine 3', 'Consolidation', 'Renforcement priorite 3'],
+    ['Semaine 4', 'Evaluation', 'Tests et auto-evaluation']
+]
+
+RESSOURCES_RECOMMANDEES = [
+    "Revoir les cours et exercices corriges en classe",
+    "Utiliser des ressources en ligne (Khan Academy, Coursera, etc.)",
+    "Former des groupes d'etude avec vos camarades",
+    "Faire des exercices supplementaires sur vos points faibles",
+    "Ne pas hesiter a demander de l'aide a votre professeur"
+]
+
+
+class ReportTemplate:
+    """
+    Elements des rapports independants de l'etudiant, construits une fois :
+    feuille de styles, styles de tableaux et paragraphes au texte fixe
+
+    Les paragraphes fixes sont analyses une seule fois puis copies (copie
+    superficielle) a chaque utilisation : reportlab annote les flowables
+    pendant la mise en page (mesures, report en page suivante) et un meme
+    objet ne doit pas apparaitre dans deux documents ni deux fois dans un
+    document.
+    """
 
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.table_styles = self._build_table_styles()
+        self._paragraphs: Dict[Tuple[str, str], Paragraph] = {}
+
+    def paragraph(self, text: str, style: str) -> Paragraph:
+        """Paragraphe au texte fixe (balisage analyse une seule fois)"""
+        key = (text, style)
+        prototype = self._paragraphs.get(key)
+        if prototype is None:
+            prototype = Paragraph(text, self.styles[style])
+            self._paragraphs[key] = prototype
+        return copy.copy(prototype)
+
+    def planning_table(self) -> Table:
+        """Tableau PLANNING SUGGERE (style deja compile)"""
+        table = Table(PLANNING_DATA, colWidths=[3*cm, 5*cm, 7*cm])
+        table.setStyle(self.table_styles['planning'])
+        return table
+
+    def resources(self) -> List[Paragraph]:
+        """Liste des ressources recommandees"""
+        return [self.paragraph(f"* {ressource}", 'Normal') for ressource in RESSOURCES_RECOMMANDEES]
+
+    def _build_table_styles(self) -> Dict[str, TableStyle]:
+        """Styles des tableaux (le fond du tableau de resultats depend de la note)"""
+        return {
+            'etudiant': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F5F5F5')),
+                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2E86AB')),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+                *_grid_style(12, '#CCCCCC', (12, 8)),
+            ]),
+            'points': TableStyle([
+                ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#E8F5E8')),
+                ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#FFF3E0')),
+                ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor('#2E7D32')),
+                ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#F57C00')),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                *_grid_style(10, '#CCCCCC', (10, 8), valign='TOP'),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ]),
+            'question': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F8F9FA')),
+                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#495057')),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+                *_grid_style(10, '#DEE2E6', (8, 6), valign='TOP'),
+            ]),
+            'scores': TableStyle([
+                *_header_style('#2E86AB'),
+                *_grid_style(10, '#CCCCCC', (8, 6), align='CENTER'),
+            ]),
+            'planning': TableStyle([
+                *_header_style('#4CAF50'),
+                *_grid_style(10, '#CCCCCC', (8, 6)),
+            ]),
+            'classement': TableStyle([
+                *_header_style('#2E86AB'),
+                *_grid_style(9, '#CCCCCC', (6, 3), align='CENTER'),
+                ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5F5')]),
+            ]),
+        }
 
     def _setup_custom_styles(self):
         """Configure les styles personnalises"""
@@ -78,6 +240,26 @@ class StudentReportGenerator:
             fontName='Helvetica-Bold'
         ))
 
+
+_templates = threading.local()
+
+
+def get_report_template() -> ReportTemplate:
+    """Template du thread courant (construit au premier rapport du processus/thread)"""
+    template = getattr(_templates, "template", None)
+    if template is None:
+        template = ReportTemplate()
+        _templates.template = template
+    return template
+
+
+class StudentReportGenerator:
+    """Generateur de rapports PDF personnalises pour etudiants"""
+
+    def __init__(self, template: Optional[ReportTemplate] = None):
+        self.template = template or get_report_template()
+        self.styles = self.template.styles
+
     def generate_student_report(
         self,
         eval_result: Dict,
@@ -147,7 +329,7 @@ class StudentReportGenerator:
         """Cree la page de garde"""
         elements = []
 
-        elements.append(Paragraph("RAPPORT DE CORRECTION PERSONNALISE", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("RAPPORT DE CORRECTION PERSONNALISE", 'CustomTitle'))
         elements.append(Spacer(1, 30))
 
         # Informations etudiant
@@ -161,20 +343,7 @@ class StudentReportGenerator:
         ]
 
         student_table = Table(student_data, colWidths=[4*cm, 8*cm])
-        student_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F5F5F5')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2E86AB')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        student_table.setStyle(self.template.table_styles['etudiant'])
 
         elements.append(student_table)
         elements.append(Spacer(1, 40))
@@ -211,16 +380,7 @@ class StudentReportGenerator:
         results_table = Table(results_data, colWidths=[6*cm, 6*cm])
         results_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, -1), perf_color),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 14),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 2, colors.white),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            *RESULTS_TABLE_STYLE
         ]))
 
         elements.append(results_table)
@@ -228,7 +388,7 @@ class StudentReportGenerator:
 
         # Diagnostic IA
         if eval_result.get('diagnostic_performance'):
-            elements.append(Paragraph("DIAGNOSTIC IA", self.styles['Subtitle']))
+            elements.append(self.template.paragraph("DIAGNOSTIC IA", 'Subtitle'))
             elements.append(Paragraph(eval_result['diagnostic_performance'], self.styles['AIComment']))
 
         elements.append(Spacer(1, 40))
@@ -243,12 +403,12 @@ class StudentReportGenerator:
         """Cree le resume executif"""
         elements = []
 
-        elements.append(Paragraph("RESUME EXECUTIF", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("RESUME EXECUTIF", 'CustomTitle'))
         elements.append(Spacer(1, 20))
 
         # Commentaire general
         if eval_result.get('commentaires_generaux'):
-            elements.append(Paragraph("Commentaire General", self.styles['Subtitle']))
+            elements.append(self.template.paragraph("Commentaire General", 'Subtitle'))
             elements.append(Paragraph(eval_result['commentaires_generaux'], self.styles['Normal']))
             elements.append(Spacer(1, 15))
 
@@ -266,23 +426,7 @@ class StudentReportGenerator:
                 points_data.append([fort, amelioration])
 
             points_table = Table(points_data, colWidths=[8*cm, 8*cm])
-            points_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#E8F5E8')),
-                ('BACKGROUND', (1, 0), (1, 0), colors.HexColor('#FFF3E0')),
-                ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor('#2E7D32')),
-                ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#F57C00')),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
+            points_table.setStyle(self.template.table_styles['points'])
 
             elements.append(points_table)
             elements.append(Spacer(1, 20))
@@ -290,7 +434,7 @@ class StudentReportGenerator:
         # Conseils personnalises
         conseils = eval_result.get('conseils_personnalises', [])
         if conseils:
-            elements.append(Paragraph("Conseils Personnalises", self.styles['Subtitle']))
+            elements.append(self.template.paragraph("Conseils Personnalises", 'Subtitle'))
             for conseil in conseils:
                 elements.append(Paragraph(f"* {conseil}", self.styles['Conseil']))
             elements.append(Spacer(1, 15))
@@ -301,13 +445,13 @@ class StudentReportGenerator:
         """Cree l'analyse detaillee par question"""
         elements = []
 
-        elements.append(Paragraph("ANALYSE DETAILLEE PAR QUESTION", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("ANALYSE DETAILLEE PAR QUESTION", 'CustomTitle'))
         elements.append(Spacer(1, 20))
 
         questions = eval_result.get('questions', [])
 
         if not questions:
-            elements.append(Paragraph("Aucune donnee detaillee disponible.", self.styles['Normal']))
+            elements.append(self.template.paragraph("Aucune donnee detaillee disponible.", 'Normal'))
             return elements
 
         for i, question in enumerate(questions):
@@ -336,20 +480,7 @@ class StudentReportGenerator:
             ]
 
             question_table = Table(question_details, colWidths=[3*cm, 12*cm])
-            question_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F8F9FA')),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#495057')),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6')),
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            question_table.setStyle(self.template.table_styles['question'])
 
             elements.append(question_table)
             elements.append(Spacer(1, 10))
@@ -357,14 +488,14 @@ class StudentReportGenerator:
             # Commentaire intelligent
             commentaire = question.get('commentaire_intelligent', '')
             if commentaire:
-                elements.append(Paragraph("Analyse IA", self.styles['Heading3']))
+                elements.append(self.template.paragraph("Analyse IA", 'Heading3'))
                 elements.append(Paragraph(commentaire, self.styles['AIComment']))
                 elements.append(Spacer(1, 10))
 
             # Conseil personnalise
             conseil = question.get('conseil_personnalise', '')
             if conseil:
-                elements.append(Paragraph("Conseil", self.styles['Heading3']))
+                elements.append(self.template.paragraph("Conseil", 'Heading3'))
                 elements.append(Paragraph(conseil, self.styles['Conseil']))
 
         return elements
@@ -373,13 +504,13 @@ class StudentReportGenerator:
         """Cree la section performance"""
         elements = []
 
-        elements.append(Paragraph("PERFORMANCE PAR QUESTION", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("PERFORMANCE PAR QUESTION", 'CustomTitle'))
         elements.append(Spacer(1, 20))
 
         questions = eval_result.get('questions', [])
 
         if not questions:
-            elements.append(Paragraph("Aucune donnee disponible.", self.styles['Normal']))
+            elements.append(self.template.paragraph("Aucune donnee disponible.", 'Normal'))
             return elements
 
         # Tableau des scores
@@ -398,20 +529,7 @@ class StudentReportGenerator:
             chart_data.append([f"Q{q.get('numero', i+1)}", f"{pourcentage:.1f}%", niveau])
 
         chart_table = Table(chart_data, colWidths=[3*cm, 4*cm, 6*cm])
-        chart_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        chart_table.setStyle(self.template.table_styles['scores'])
 
         elements.append(chart_table)
         elements.append(Spacer(1, 20))
@@ -429,7 +547,7 @@ class StudentReportGenerator:
         """Cree le plan de revision"""
         elements = []
 
-        elements.append(Paragraph("PLAN DE REVISION PERSONNALISE", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("PLAN DE REVISION PERSONNALISE", 'CustomTitle'))
         elements.append(Spacer(1, 20))
 
         matiere = eval_info.get('matiere', 'Matiere')
@@ -458,53 +576,29 @@ class StudentReportGenerator:
         elements.append(Spacer(1, 15))
 
         if questions_urgentes:
-            elements.append(Paragraph("PRIORITE 1 - REVISIONS URGENTES", self.styles['Heading2']))
+            elements.append(self.template.paragraph("PRIORITE 1 - REVISIONS URGENTES", 'Heading2'))
             for q in questions_urgentes:
                 conseil = q.get('conseil_personnalise', f"Revoir la question {q.get('numero')}")
                 elements.append(Paragraph(f"* Q{q.get('numero')} : {conseil}", self.styles['Normal']))
             elements.append(Spacer(1, 15))
 
         if questions_amelioration:
-            elements.append(Paragraph("PRIORITE 2 - APPROFONDISSEMENTS", self.styles['Heading2']))
+            elements.append(self.template.paragraph("PRIORITE 2 - APPROFONDISSEMENTS", 'Heading2'))
             for q in questions_amelioration:
                 conseil = q.get('conseil_personnalise', f"Approfondir la question {q.get('numero')}")
                 elements.append(Paragraph(f"* Q{q.get('numero')} : {conseil}", self.styles['Normal']))
             elements.append(Spacer(1, 15))
 
         if questions_consolidation:
-            elements.append(Paragraph("PRIORITE 3 - CONSOLIDATION", self.styles['Heading2']))
+            elements.append(self.template.paragraph("PRIORITE 3 - CONSOLIDATION", 'Heading2'))
             for q in questions_consolidation:
                 conseil = q.get('conseil_personnalise', f"Consolider la question {q.get('numero')}")
                 elements.append(Paragraph(f"* Q{q.get('numero')} : {conseil}", self.styles['Normal']))
             elements.append(Spacer(1, 15))
 
         # Planning suggere
-        elements.append(Paragraph("PLANNING SUGGERE", self.styles['Subtitle']))
-        planning_data = [
-            ['Periode', 'Objectif', 'Actions'],
-            ['Semaine 1', 'Revisions urgentes', 'Focus sur priorite 1'],
-            ['Semaine 2', 'Approfondissements', 'Travail sur priorite 2'],
-            ['Semaine 3', 'Consolidation', 'Renforcement priorite 3'],
-            ['Semaine 4', 'Evaluation', 'Tests et auto-evaluation']
-        ]
-
-        planning_table = Table(planning_data, colWidths=[3*cm, 5*cm, 7*cm])
-        planning_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-
-        elements.append(planning_table)
+        elements.append(self.template.paragraph("PLANNING SUGGERE", 'Subtitle'))
+        elements.append(self.template.planning_table())
 
         return elements
 
@@ -512,45 +606,36 @@ class StudentReportGenerator:
         """Cree les conseils personnalises"""
         elements = []
 
-        elements.append(Paragraph("CONSEILS PERSONNALISES", self.styles['CustomTitle']))
+        elements.append(self.template.paragraph("CONSEILS PERSONNALISES", 'CustomTitle'))
         elements.append(Spacer(1, 20))
 
         # Conseils generaux
         conseils_generaux = eval_result.get('conseils_personnalises', [])
         if conseils_generaux:
-            elements.append(Paragraph("Conseils Generaux", self.styles['Subtitle']))
+            elements.append(self.template.paragraph("Conseils Generaux", 'Subtitle'))
             for conseil in conseils_generaux:
                 elements.append(Paragraph(f"* {conseil}", self.styles['Normal']))
             elements.append(Spacer(1, 20))
 
         # Conseils methodologiques
-        elements.append(Paragraph("Conseils Methodologiques", self.styles['Subtitle']))
+        elements.append(self.template.paragraph("Conseils Methodologiques", 'Subtitle'))
 
         matiere = eval_info.get('matiere', 'General')
         pourcentage = eval_result.get('pourcentage', 0)
         conseils_methodo = self._get_subject_advice(matiere, pourcentage)
 
         for conseil in conseils_methodo:
-            elements.append(Paragraph(f"* {conseil}", self.styles['Normal']))
+            elements.append(self.template.paragraph(f"* {conseil}", 'Normal'))
 
         elements.append(Spacer(1, 20))
 
         # Ressources recommandees
-        elements.append(Paragraph("Ressources Recommandees", self.styles['Subtitle']))
-        ressources = [
-            "Revoir les cours et exercices corriges en classe",
-            "Utiliser des ressources en ligne (Khan Academy, Coursera, etc.)",
-            "Former des groupes d'etude avec vos camarades",
-            "Faire des exercices supplementaires sur vos points faibles",
-            "Ne pas hesiter a demander de l'aide a votre professeur"
-        ]
-
-        for ressource in ressources:
-            elements.append(Paragraph(f"* {ressource}", self.styles['Normal']))
+        elements.append(self.template.paragraph("Ressources Recommandees", 'Subtitle'))
+        elements.extend(self.template.resources())
 
         # Message d'encouragement
         elements.append(Spacer(1, 30))
-        elements.append(Paragraph("MESSAGE D'ENCOURAGEMENT", self.styles['Subtitle']))
+        elements.append(self.template.paragraph("MESSAGE D'ENCOURAGEMENT", 'Subtitle'))
 
         if pourcentage >= 80:
             message = "Excellent travail ! Continue sur cette lancee."
@@ -559,7 +644,7 @@ class StudentReportGenerator:
         else:
             message = "Ne te decourage pas ! Avec de la motivation et du travail regulier, tu peux ameliorer tes resultats."
 
-        elements.append(Paragraph(message, self.styles['AIComment']))
+        elements.append(self.template.paragraph(message, 'AIComment'))
 
         return elements
 
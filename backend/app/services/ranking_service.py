@@ -0,0 +1,202 @@
+"""
+services/ranking_service.py
+===========================
+Classement des etudiants d'une evaluation par note totale, ramenee au
+bareme de l'evaluation comme dans les statistiques (scaled_score)
+
+Les rangs sont calcules par un tri NumPy sur toutes les notes : rang
+"competition" (1, 2, 2, 4) et rang dense (1, 2, 2, 3) des ex aequo, et
+rang centile (part des copies moins bien notees, ex aequo comptes pour
+moitie). Le rang retenu (CORRECTION_RANKING_METHOD) est ecrit dans
+rang_classe et rang de chaque correction_detaillee.json, avec les autres
+rangs et l'effectif. Les resultats en erreur (necessite_revision_humaine)
+sont hors classement : leurs champs de rang valent None et ils ne comptent
+pas dans l'effectif.
+
+L'index evaluations/<id>/classement.json garde la note et les rangs de
+chaque etudiant : quand une seule note change, le classement est recalcule
+depuis l'index sans relire les copies, et seuls les resultats dont le rang
+a change (les notes comprises entre l'ancienne et la nouvelle) sont
+reecrits. Les resultats sont relus et reecrits sous le verrou de
+l'evaluation (result_locks), partage avec leur enregistrement.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from .result_locks import evaluation_lock
+from .statistics_service import scaled_score
+
+RANKING_FILENAME = "classement.json"
+RANKING_METHODS = ("competition", "dense")
+RANK_FIELDS = ("rang_classe", "rang", "rang_dense", "percentile", "effectif_classe")
+
+def compute_ranks(notes: np.ndarray) -> Dict[str, np.ndarray]:
+    """Rangs competition et dense, rang centile (0-100) de chaque note (meilleure note : rang 1)"""
+    notes = np.asarray(notes, dtype=float)
+    count = len(notes)
+    if count == 0:
+        return {"competition": np.empty(0, dtype=int), "dense": np.empty(0, dtype=int), "percentile": np.empty(0)}
+
+    ascending = np.sort(notes)
+    below = np.searchsorted(ascending, notes, side="left")
+    not_above = np.searchsorted(ascending, notes, side="right")
+    distinct, inverse = np.unique(notes, return_inverse=True)
+    return {
+        "competition": count - not_above + 1,
+        "dense": len(distinct) - inverse,
+        "percentile": np.round(100 * (below + 0.5 * (not_above - below)) / count, 1),
+    }
+
+
+def ranking_method() -> str:
+    """Rang retenu pour les ex aequo (CORRECTION_RANKING_METHOD : competition ou dense)"""
+    method = settings.CORRECTION_RANKING_METHOD
+    return method if method in RANKING_METHODS else "competition"
+
+
+def is_ranked(result: Dict) -> bool:
+    """Faux pour un resultat en erreur, a corriger a la main (hors classement)"""
+    return not result.get("necessite_revision_humaine")
+
+
+def _rank_entries(names: List[str], notes: np.ndarray, excluded: Iterable[str] = ()) -> Dict[str, Dict]:
+    """Champs de rang de chaque etudiant (None pour les etudiants hors classement)"""
+    ranks = compute_ranks(notes)
+    retained = ranks[ranking_method()]
+    entries = {
+        name: {
+            "note": float(notes[i]),
+            "rang_classe": int(retained[i]),
+            "rang": int(retained[i]),
+            "rang_dense": int(ranks["dense"][i]),
+            "percentile": float(ranks["percentile"][i]),
+            "effectif_classe": len(names),
+        }
+        for i, name in enumerate(names)
+    }
+    for name in excluded:
+        entries[name] = {"note": None, **{field: None for field in RANK_FIELDS}}
+    return entries
+
+
+def _result_file(eval_dir: Path, student_name: str) -> Path:
+    return Path(eval_dir) / "resultats" / student_name / "correction_detaillee.json"
+
+
+def _write_json(path: Path, data: Dict, **dump_options):
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str, **dump_options)
+    os.replace(tmp_path, path)
+
+
+def _persist(eval_dir: Path, note_max: float, entries: Dict[str, Dict], previous: Dict[str, Dict],
+             loaded: Optional[Dict[str, Dict]] = None) -> int:
+    """
+    Ecrit les rangs dans les resultats dont le rang a change (ou dont le
+    fichier ne les contient plus, pour les resultats de loaded), puis
+    l'index ; retourne le nombre de resultats reecrits
+    """
+    written = 0
+    for name, entry in entries.items():
+        result_file = _result_file(eval_dir, name)
+        if loaded and name in loaded:
+            # Resultats deja lus : leurs rangs sont compares au fichier, qu'un
+            # nouvel enregistrement a pu reecrire sans rangs a note inchangee
+            result = loaded[name]
+        elif previous.get(name) == entry:
+            continue
+        else:
+            try:
+                with open(result_file, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+        if all(result.get(field) == entry[field] for field in RANK_FIELDS):
+            continue
+        result.update({field: entry[field] for field in RANK_FIELDS})
+        _write_json(result_file, result, indent=2)
+        written += 1
+
+    _write_json(Path(eval_dir) / RANKING_FILENAME, {
+        "methode": ranking_method(), "note_max": note_max, "etudiants": entries
+    })
+    return written
+
+
+def _load_index(eval_dir: Path, note_max: float) -> Optional[Dict[str, Dict]]:
+    """Notes et rangs enregistres (None si absents ou calcules avec une autre methode ou un autre bareme)"""
+    path = Path(eval_dir) / RANKING_FILENAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if index.get("methode") != ranking_method() or index.get("note_max") != note_max:
+        return None
+    return index.get("etudiants", {})
+
+
+def rank_evaluation(eval_dir: Path, note_max: float) -> Dict:
+    """
+    Classement complet d'une evaluation (apres une correction par lot) :
+    lecture de tous les resultats, un tri, ecriture des seuls rangs modifies
+    """
+    eval_dir = Path(eval_dir)
+    results_dir = eval_dir / "resultats"
+    with evaluation_lock(eval_dir):
+        loaded: Dict[str, Dict] = {}
+        if results_dir.exists():
+            for student_dir in sorted(results_dir.iterdir()):
+                result_file = student_dir / "correction_detaillee.json"
+                if not result_file.exists():
+                    continue
+                try:
+                    with open(result_file, "r", encoding="utf-8") as f:
+                        loaded[student_dir.name] = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+
+        names = [name for name, result in loaded.items() if is_ranked(result)]
+        excluded = [name for name, result in loaded.items() if not is_ranked(result)]
+        notes = np.fromiter((scaled_score(loaded[name], note_max) for name in names), dtype=float, count=len(names))
+        entries = _rank_entries(names, notes, excluded)
+        written = _persist(eval_dir, note_max, entries, _load_index(eval_dir, note_max) or {}, loaded)
+    return {"effectif": len(names), "resultats_mis_a_jour": written}
+
+
+def update_student_rank(eval_dir: Path, student_name: str, result: Dict, note_max: float) -> Dict:
+    """
+    Classement apres l'enregistrement du resultat d'un etudiant (deja ecrit)
+
+    Seuls les etudiants dont le rang change sont reecrits : pour une note
+    modifiee, ceux dont la note est comprise entre l'ancienne et la nouvelle.
+    Sans index valide, le classement complet est recalcule.
+    """
+    eval_dir = Path(eval_dir)
+    with evaluation_lock(eval_dir):
+        index = _load_index(eval_dir, note_max)
+        if index is not None:
+            notes_by_name = {name: entry["note"] for name, entry in index.items() if entry["note"] is not None}
+            excluded = {name for name, entry in index.items() if entry["note"] is None}
+            notes_by_name.pop(student_name, None)
+            excluded.discard(student_name)
+            if is_ranked(result):
+                notes_by_name[student_name] = scaled_score(result, note_max)
+            else:
+                excluded.add(student_name)
+            names = list(notes_by_name)
+            notes = np.fromiter(notes_by_name.values(), dtype=float, count=len(names))
+            # Le resultat enregistre vient d'etre ecrit sans ses rangs : toujours reecrit
+            previous = {name: entry for name, entry in index.items() if name != student_name}
+            written = _persist(eval_dir, note_max, _rank_entries(names, notes, excluded), previous)
+            return {"effectif": len(names), "resultats_mis_a_jour": written}
+        return rank_evaluation(eval_dir, note_max)
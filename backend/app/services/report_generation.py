@@ -0,0 +1,544 @@
+"""
+services/report_generation.py
+=============================
+Generation des rapports PDF d'une evaluation en tache de fond, et cache
+disque des rapports individuels
+
+reportlab est du Python pur, limite par le CPU : chaque rapport est construit
+dans un pool de processus (lecture du resultat, generation, ecriture du PDF
+dans le processus de travail ; seuls des chemins transitent). Les PDF sont
+ecrits au fur et a mesure et l'avancement est enregistre dans
+evaluations/<id>/generation_rapports.json.
+
+Chaque PDF (rapports/<etudiant>_rapport.pdf) est accompagne de sa cle
+(rapports/.cache/<etudiant>_rapport.pdf.json) : hash du resultat, des champs
+de l'evaluation affiches et de la version du generateur. Un rapport n'est
+regenere que si sa cle a change.
+
+stream_reports_zip produit une archive ZIP de tous les rapports au fil de
+l'eau (rapports a jour d'abord, rapports regeneres ensuite).
+
+Les commentaires differes (CORRECTION_LAZY_FEEDBACK) d'un etudiant sont
+generes avant la construction de son rapport.
+
+Le rapport de synthese de la classe (rapports/synthese_classe.pdf) suit le
+meme principe : sa cle couvre tous les resultats, il est regenere des que
+l'un d'eux change. L'analyse des items (evaluations/<id>/analyse_items.json)
+est calculee sur l'instantane en colonnes des resultats (results_snapshot)
+et mise en cache avec la signature de cet instantane.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from ..utils.helpers import write_atomic
+from .class_report_service import CLASS_REPORT_EVAL_FIELDS, CLASS_REPORT_VERSION, generate_class_pdf_report
+from .feedback_service import ensure_student_feedback
+from .item_analysis_service import ITEM_ANALYSIS_VERSION, compute_item_analysis
+from .pdf_report_service import (
+    REPORT_EVAL_FIELDS, REPORT_GENERATOR_VERSION, generate_student_pdf_report, use_binary_streams
+)
+from .results_snapshot import load_snapshot, refresh_snapshot, snapshot_scores, snapshot_signature
+
+STATUS_FILENAME = "generation_rapports.json"
+CLASS_REPORT_FILENAME = "synthese_classe.pdf"
+ITEM_ANALYSIS_FILENAME = "analyse_items.json"
+ZIP_CHUNK_SIZE = 64 * 1024
+
+_report_pool: Optional[ProcessPoolExecutor] = None
+_report_pool_lock = threading.Lock()
+_running_jobs: Set[str] = set()
+_pending_reports: Dict[str, "asyncio.Future"] = {}
+
+
+def report_workers() -> int:
+    """Nombre de processus de generation (REPORT_WORKERS, 0 = un par coeur)"""
+    return settings.REPORT_WORKERS or os.cpu_count() or 1
+
+
+def get_report_pool() -> ProcessPoolExecutor:
+    """
+    Pool de generation partage par le processus (demarre en mode spawn)
+
+    Meme avec un seul coeur, la generation reste dans un processus separe :
+    un thread garderait le GIL et ralentirait la boucle d'evenements.
+    """
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ProcessPoolExecutor(
+                max_workers=report_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=use_binary_streams
+            )
+        return _report_pool
+
+
+def shutdown_report_pool():
+    """Arrete le pool de generation (arret de l'application)"""
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is not None:
+            _report_pool.shutdown(wait=False, cancel_futures=True)
+            _report_pool = None
+
+
+def student_report_path(eval_dir: Path, student_name: str) -> Path:
+    return Path(eval_dir) / "rapports" / f"{student_name}_rapport.pdf"
+
+
+def student_result_path(eval_dir: Path, student_name: str) -> Path:
+    return Path(eval_dir) / "resultats" / student_name / "correction_detaillee.json"
+
+
+def class_report_path(eval_dir: Path) -> Path:
+    return Path(eval_dir) / "rapports" / CLASS_REPORT_FILENAME
+
+
+def _eval_fields_json(eval_data: Dict, fields) -> bytes:
+    return json.dumps(
+        {field: eval_data.get(field) for field in fields},
+        sort_keys=True, ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def report_cache_key(result_bytes: bytes, eval_data: Dict) -> str:
+    """Cle d'un rapport : resultat, champs de l'evaluation affiches, version du generateur"""
+    digest = hashlib.sha256()
+    digest.update(REPORT_GENERATOR_VERSION.encode("utf-8"))
+    digest.update(hashlib.sha256(result_bytes).digest())
+    digest.update(_eval_fields_json(eval_data, REPORT_EVAL_FIELDS))
+    return digest.hexdigest()
+
+
+def class_report_cache_key(results: List[Tuple[str, bytes]], eval_data: Dict) -> str:
+    """Cle du rapport de classe : (etudiant, resultat) de toute la classe, evaluation, version"""
+    digest = hashlib.sha256()
+    digest.update(CLASS_REPORT_VERSION.encode("utf-8"))
+    for name, result_bytes in results:
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(result_bytes).digest())
+    digest.update(_eval_fields_json(eval_data, CLASS_REPORT_EVAL_FIELDS))
+    return digest.hexdigest()
+
+
+def item_analysis_cache_key(manifest: Dict) -> str:
+    """Cle de l'analyse des items : resultats couverts par l'instantane, version"""
+    digest = hashlib.sha256()
+    digest.update(ITEM_ANALYSIS_VERSION.encode("utf-8"))
+    digest.update(snapshot_signature(manifest).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_item_analysis(eval_dir: Path, eval_data: Dict) -> Dict:
+    """
+    Analyse des items d'une evaluation, depuis le cache si aucun resultat
+    n'a change, sinon depuis l'instantane en colonnes (execute dans un thread)
+    """
+    eval_dir = Path(eval_dir)
+    manifest = refresh_snapshot(eval_dir)
+    key = item_analysis_cache_key(manifest)
+    cache_file = eval_dir / ITEM_ANALYSIS_FILENAME
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("cle") == key:
+                return cached
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    note_max = float(eval_data.get("note_totale") or 20)
+    snapshot = load_snapshot(eval_dir)
+    analysis = {
+        "cle": key,
+        "nombre_copies": len(snapshot["etudiant"]),
+        "items": compute_item_analysis(snapshot_scores(snapshot, note_max)),
+        "date_calcul": datetime.now().isoformat(),
+    }
+
+    write_atomic(cache_file, json.dumps(analysis, ensure_ascii=False, indent=2).encode("utf-8"))
+    return analysis
+
+
+async def ensure_item_analysis(eval_dir: Path, eval_data: Dict) -> Dict:
+    """Analyse des items a jour, lue ou calculee hors de la boucle d'evenements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, load_item_analysis, eval_dir, eval_data)
+
+
+def read_class_results(eval_dir: Path) -> List[Tuple[str, bytes]]:
+    """(nom de l'etudiant, contenu de correction_detaillee.json) de toute la classe"""
+    results = []
+    for name, result_file in list_result_files(eval_dir):
+        with open(result_file, "rb") as f:
+            results.append((name, f.read()))
+    return results
+
+
+def _report_key_path(pdf_path: Path) -> Path:
+    pdf_path = Path(pdf_path)
+    return pdf_path.parent / ".cache" / f"{pdf_path.name}.json"
+
+
+def stored_report_key(pdf_path: Path) -> Optional[str]:
+    """Cle du PDF existant (None si absent ou genere sans cle)"""
+    if not Path(pdf_path).exists():
+        return None
+    try:
+        with open(_report_key_path(pdf_path), "r", encoding="utf-8") as f:
+            return json.load(f).get("cle")
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def student_report_state(eval_dir: Path, student_name: str, eval_data: Dict) -> Tuple[str, bool]:
+    """(cle attendue du rapport, le PDF existant a cette cle) - lectures bloquantes"""
+    with open(student_result_path(eval_dir, student_name), "rb") as f:
+        key = report_cache_key(f.read(), eval_data)
+    return key, stored_report_key(student_report_path(eval_dir, student_name)) == key
+
+
+def is_report_fresh(eval_dir: Path, student_name: str, eval_data: Dict) -> bool:
+    """Le PDF existant correspond au resultat et a l'evaluation actuels"""
+    return student_report_state(eval_dir, student_name, eval_data)[1]
+
+
+async def is_report_fresh_async(eval_dir: Path, student_name: str, eval_data: Dict) -> bool:
+    """is_report_fresh hors de la boucle d'evenements (dans un thread)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, is_report_fresh, eval_dir, student_name, eval_data)
+
+
+def build_student_report(result_file: str, eval_data: Dict, pdf_path: str) -> str:
+    """
+    Construit et ecrit le rapport d'un etudiant et sa cle (execute dans un
+    processus de generation) ; retourne la cle du PDF ecrit
+    """
+    with open(result_file, "rb") as f:
+        result_bytes = f.read()
+    result_data = json.loads(result_bytes)
+
+    student_info = {
+        "nom": result_data.get("etudiant_nom", ""),
+        "prenom": result_data.get("etudiant_prenom", "")
+    }
+    pdf_bytes = generate_student_pdf_report(result_data, eval_data, student_info)
+    key = report_cache_key(result_bytes, eval_data)
+    _write_report(Path(pdf_path), pdf_bytes, key)
+    return key
+
+
+def build_class_report(eval_dir: str, eval_data: Dict, pdf_path: str) -> str:
+    """
+    Construit et ecrit le rapport de synthese de la classe et sa cle
+    (execute dans un processus de generation) ; retourne la cle du PDF ecrit
+    """
+    results = read_class_results(Path(eval_dir))
+    pdf_bytes = generate_class_pdf_report([json.loads(data) for _, data in results], eval_data)
+    key = class_report_cache_key(results, eval_data)
+    _write_report(Path(pdf_path), pdf_bytes, key)
+    return key
+
+
+def _write_report(pdf_path: Path, pdf_bytes: bytes, key: str):
+    """Ecrit un PDF et sa cle dans rapports/.cache"""
+    # Ecriture atomique : un telechargement concurrent ne voit jamais un PDF partiel
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(pdf_path, pdf_bytes)
+
+    key_path = _report_key_path(pdf_path)
+    key_path.parent.mkdir(exist_ok=True)
+    write_atomic(key_path, json.dumps({"cle": key, "date_generation": datetime.now().isoformat()}).encode("utf-8"))
+
+
+async def ensure_student_report(eval_dir: Path, student_name: str, eval_data: Dict) -> Tuple[Path, str]:
+    """
+    Rapport a jour d'un etudiant : le PDF en cache si sa cle correspond,
+    sinon genere dans le pool de processus. Les demandes simultanees du meme
+    rapport partagent une seule generation. Retourne (chemin du PDF, cle).
+    """
+    await ensure_student_feedback(eval_dir, student_name, eval_data)
+    result_file = student_result_path(eval_dir, student_name)
+    pdf_path = student_report_path(eval_dir, student_name)
+    loop = asyncio.get_running_loop()
+    key, fresh = await loop.run_in_executor(None, student_report_state, eval_dir, student_name, eval_data)
+
+    if fresh:
+        return pdf_path, key
+
+    key = await _build_once(pdf_path, build_student_report, str(result_file), eval_data, str(pdf_path))
+    return pdf_path, key
+
+
+async def ensure_class_report(eval_dir: Path, eval_data: Dict) -> Tuple[Path, str]:
+    """
+    Rapport de synthese de la classe a jour : le PDF en cache si aucun
+    resultat n'a change, sinon genere dans le pool de processus. Retourne
+    (chemin du PDF, cle).
+    """
+    loop = asyncio.get_running_loop()
+    pdf_path = class_report_path(eval_dir)
+    # Lecture de tous les resultats hors de la boucle d'evenements
+    results = await loop.run_in_executor(None, read_class_results, eval_dir)
+    key = class_report_cache_key(results, eval_data)
+
+    if stored_report_key(pdf_path) == key:
+        return pdf_path, key
+
+    key = await _build_once(pdf_path, build_class_report, str(eval_dir), eval_data, str(pdf_path))
+    return pdf_path, key
+
+
+async def _build_once(pdf_path: Path, build, *args) -> str:
+    """Lance build dans le pool ; les demandes simultanees du meme PDF partagent la generation"""
+    pending = _pending_reports.get(str(pdf_path))
+    if pending is None:
+        pending = asyncio.ensure_future(_run_in_report_pool(asyncio.get_running_loop(), build, *args))
+        _pending_reports[str(pdf_path)] = pending
+        pending.add_done_callback(lambda _, path=str(pdf_path): _pending_reports.pop(path, None))
+    return await asyncio.shield(pending)
+
+
+def list_result_files(eval_dir: Path) -> List[Tuple[str, Path]]:
+    """(nom de l'etudiant, correction_detaillee.json) des resultats d'une evaluation"""
+    results_dir = Path(eval_dir) / "resultats"
+    if not results_dir.exists():
+        return []
+    return [
+        (student_dir.name, student_dir / "correction_detaillee.json")
+        for student_dir in sorted(results_dir.iterdir())
+        if student_dir.is_dir() and (student_dir / "correction_detaillee.json").exists()
+    ]
+
+
+def load_generation_status(eval_dir: Path) -> Optional[Dict]:
+    """Avancement de la derniere generation (None si jamais lancee)"""
+    status_file = Path(eval_dir) / STATUS_FILENAME
+    if not status_file.exists():
+        return None
+    try:
+        with open(status_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_generation_status(eval_dir: Path, status: Dict):
+    status_file = Path(eval_dir) / STATUS_FILENAME
+    write_atomic(status_file, json.dumps(status, ensure_ascii=False, indent=2, default=str).encode("utf-8"))
+
+
+def is_generation_running(eval_id: str) -> bool:
+    return eval_id in _running_jobs
+
+
+def start_generation(eval_id: str, eval_dir: Path) -> Dict:
+    """
+    Reserve la generation d'une evaluation et enregistre l'etat initial
+
+    Appele par la route avant de programmer generate_evaluation_reports,
+    pour refuser un second lancement pendant la generation.
+    """
+    _running_jobs.add(eval_id)
+    status = {
+        "evaluation_id": eval_id,
+        "statut": "en_cours",
+        "total": len(list_result_files(eval_dir)),
+        "rapports_generes": 0,
+        "rapports_inchanges": 0,
+        "rapports_en_erreur": 0,
+        "pourcentage_progression": 0.0,
+        "erreurs": [],
+        "date_debut": datetime.now().isoformat(),
+        "date_fin": None
+    }
+    _save_generation_status(eval_dir, status)
+    return status
+
+
+async def generate_evaluation_reports(
+    eval_id: str,
+    eval_dir: Path,
+    eval_data: Dict,
+    status: Optional[Dict] = None
+) -> Dict:
+    """
+    Tache de fond : genere les rapports PDF de tous les etudiants dans le
+    pool de processus, en enregistrant l'avancement a chaque rapport termine
+
+    status : etat retourne par start_generation (cree ici s'il est absent)
+    """
+    eval_dir = Path(eval_dir)
+    if status is None:
+        status = start_generation(eval_id, eval_dir)
+
+    try:
+        reports_dir = eval_dir / "rapports"
+        reports_dir.mkdir(exist_ok=True)
+        students = list_result_files(eval_dir)
+        status["total"] = len(students)
+
+        tasks = [
+            asyncio.ensure_future(_build_in_pool(eval_dir, name, eval_data))
+            for name, _ in students
+        ]
+
+        for task in asyncio.as_completed(tasks):
+            name, generated, error = await task
+            if error:
+                status["rapports_en_erreur"] += 1
+                status["erreurs"].append(f"{name}: {error}")
+            elif generated:
+                status["rapports_generes"] += 1
+            else:
+                status["rapports_inchanges"] += 1
+            done = status["rapports_generes"] + status["rapports_inchanges"] + status["rapports_en_erreur"]
+            status["pourcentage_progression"] = round(100 * done / max(1, status["total"]), 1)
+            _save_generation_status(eval_dir, status)
+
+        status["statut"] = "termine"
+    except Exception as e:
+        status["statut"] = "erreur"
+        status["erreurs"].append(str(e))
+    finally:
+        status["date_fin"] = datetime.now().isoformat()
+        _save_generation_status(eval_dir, status)
+        _running_jobs.discard(eval_id)
+
+    return status
+
+
+async def _build_in_pool(
+    eval_dir: Path,
+    name: str,
+    eval_data: Dict
+) -> Tuple[str, bool, Optional[str]]:
+    """Genere un rapport s'il n'est pas a jour ; retourne (nom, genere, erreur)"""
+    try:
+        await ensure_student_feedback(eval_dir, name, eval_data)
+        if await is_report_fresh_async(eval_dir, name, eval_data):
+            return name, False, None
+        pdf_path = student_report_path(eval_dir, name)
+        # Partage la generation d'un telechargement simultane du meme rapport
+        await _build_once(pdf_path, build_student_report, str(student_result_path(eval_dir, name)), eval_data, str(pdf_path))
+        return name, True, None
+    except Exception as e:
+        print(f"Erreur generation PDF pour {name}: {e}")
+        return name, False, str(e)
+
+
+async def _run_in_report_pool(loop: asyncio.AbstractEventLoop, build, *args) -> str:
+    """build_student_report / build_class_report dans le pool (dans un thread si le pool est casse)"""
+    try:
+        return await loop.run_in_executor(get_report_pool(), build, *args)
+    except BrokenProcessPool:
+        shutdown_report_pool()
+        return await loop.run_in_executor(None, build, *args)
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Sortie non positionnable de zipfile, videe apres chaque ecriture"""
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._data.extend(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+async def stream_reports_zip(eval_dir: Path, eval_data: Dict) -> AsyncIterator[bytes]:
+    """
+    Archive ZIP des rapports de tous les etudiants, produite au fil de l'eau
+
+    Les etudiants sont parcourus dans l'ordre : un rapport a jour est envoye
+    aussitot, un rapport manquant ou perime est lance dans le pool de
+    processus et envoye une fois le parcours termine, dans l'ordre ou les
+    generations se terminent. Verification des cles et lecture des PDF se
+    font dans des threads : le premier octet part apres la premiere
+    verification, sans bloquer la boucle d'evenements. Chaque PDF est
+    recopie par blocs : la memoire reste bornee quelle que soit la classe.
+    """
+    eval_dir = Path(eval_dir)
+    loop = asyncio.get_running_loop()
+    students = [name for name, _ in await loop.run_in_executor(None, list_result_files, eval_dir)]
+
+    async def build(name: str) -> Tuple[str, Optional[Path], Optional[str]]:
+        try:
+            pdf_path, _ = await ensure_student_report(eval_dir, name, eval_data)
+            return name, pdf_path, None
+        except Exception as e:
+            return name, None, str(e)
+
+    tasks = []
+    buffer = _ZipStreamBuffer()
+    errors = []
+
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name in students:
+                if not await is_report_fresh_async(eval_dir, name, eval_data):
+                    tasks.append(asyncio.ensure_future(build(name)))
+                    continue
+                async for chunk in _write_zip_entry(archive, buffer, student_report_path(eval_dir, name)):
+                    yield chunk
+
+            for task in asyncio.as_completed(tasks):
+                name, pdf_path, error = await task
+                if error:
+                    errors.append(f"{name}: {error}")
+                    continue
+                async for chunk in _write_zip_entry(archive, buffer, pdf_path):
+                    yield chunk
+
+            if errors:
+                archive.writestr("erreurs.txt", "\n".join(errors))
+        yield buffer.drain()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _copy_zip_chunk(source, entry) -> bool:
+    """Lit un bloc du PDF et le compresse dans l'entree (execute dans un thread)"""
+    chunk = source.read(ZIP_CHUNK_SIZE)
+    if chunk:
+        entry.write(chunk)
+    return bool(chunk)
+
+
+async def _write_zip_entry(archive: zipfile.ZipFile, buffer: _ZipStreamBuffer, pdf_path: Path) -> AsyncIterator[bytes]:
+    """Ajoute un PDF a l'archive par blocs et rend les octets produits"""
+    loop = asyncio.get_running_loop()
+    info = zipfile.ZipInfo.from_file(pdf_path, arcname=Path(pdf_path).name)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with open(pdf_path, "rb") as source, archive.open(info, "w") as entry:
+        while await loop.run_in_executor(None, _copy_zip_chunk, source, entry):
+            data = buffer.drain()
+            if data:
+                yield data
+    data = buffer.drain()
+    if data:
+        yield data
@@ -0,0 +1,31 @@
+"""
+services/result_locks.py
+========================
+Verrou par evaluation des correction_detaillee.json
+
+Tous les services qui relisent puis reecrivent un resultat (enregistrement
+et statistiques courantes, classement, commentaires differes) prennent le
+verrou de l'evaluation pendant toute la lecture-modification-ecriture : une
+note enregistree en meme temps n'est jamais ecrasee et les statistiques
+courantes restent conformes aux fichiers.
+
+Verrou reentrant : une mise a jour du classement peut relancer le
+classement complet sous le meme verrou.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def evaluation_lock(eval_dir: Path) -> threading.RLock:
+    """Verrou des resultats d'une evaluation (le meme objet pour un meme dossier)"""
+    key = str(Path(eval_dir).resolve())
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.RLock()
+        return lock
@@ -0,0 +1,301 @@
+"""
+services/results_snapshot.py
+============================
+Instantane en colonnes des resultats d'une evaluation
+(evaluations/<id>/instantane/)
+
+Chaque colonne est un fichier .npy lu en memoire partagee (mmap) :
+
+- une ligne par etudiant : nom, notes, bareme, pourcentage, performance,
+  profil et modele de correction, date de correction ;
+- une ligne par etudiant et par question : indice de l'etudiant, numero,
+  note, points ;
+- une ligne par etudiant et par critere : indice, critere, note.
+
+Le manifeste (manifeste.json) garde la signature (mtime, taille) de chaque
+correction_detaillee.json : refresh_snapshot ne relit que les resultats
+ajoutes ou modifies, les lignes des autres etudiants sont reprises de
+l'instantane precedent. Chaque mise a jour ecrit une nouvelle generation de
+colonnes puis le manifeste et supprime les precedentes ; les colonnes sont
+ouvertes sous le meme verrou, un lecteur garde une generation coherente.
+
+Format : .npy plutot que Parquet/Arrow, pyarrow ne faisant pas partie des
+dependances ; NumPy donne les memes lectures en colonnes et le mmap.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .statistics_service import total_score
+
+SNAPSHOT_DIRNAME = "instantane"
+MANIFEST_FILENAME = "manifeste.json"
+
+# A incrementer si les colonnes changent : les instantanes sont reconstruits
+SNAPSHOT_VERSION = 1
+
+STUDENT_COLUMNS = {
+    "etudiant": str, "nom": str, "prenom": str,
+    "note_totale": float, "note_maximale": float,
+    "performance": str, "profil": str, "modele": str, "date_correction": str,
+}
+QUESTION_COLUMNS = {"question_etudiant": int, "question_numero": str, "question_note": float, "question_note_max": float}
+CRITERE_COLUMNS = {"critere_etudiant": int, "critere_nom": str, "critere_note": float}
+
+_lock = threading.Lock()
+
+
+def _snapshot_dir(eval_dir: Path) -> Path:
+    return Path(eval_dir) / SNAPSHOT_DIRNAME
+
+
+def _scan_sources(results_dir: Path) -> Dict[str, List[int]]:
+    """Signature [mtime_ns, taille] du correction_detaillee.json de chaque etudiant"""
+    sources = {}
+    try:
+        entries = list(os.scandir(results_dir))
+    except FileNotFoundError:
+        return sources
+    # os.scandir / os.stat : un seul appel systeme par resultat, sans objets Path
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        try:
+            stat = os.stat(os.path.join(entry.path, "correction_detaillee.json"))
+        except FileNotFoundError:
+            continue
+        sources[entry.name] = [stat.st_mtime_ns, stat.st_size]
+    return sources
+
+
+def _result_rows(name: str, result: Dict) -> Dict[str, list]:
+    """Lignes de l'instantane pour un resultat (indice d'etudiant 0, decale a l'assemblage)"""
+    qualite = result.get("qualite_correction") or {}
+    maximum = result.get("note_maximale") or result.get("note_max")
+    rows = {
+        "etudiant": [name],
+        "nom": [result.get("etudiant_nom", "")],
+        "prenom": [result.get("etudiant_prenom", "")],
+        "note_totale": [total_score(result)],
+        "note_maximale": [float(maximum) if maximum else np.nan],
+        "performance": [result.get("performance") or ""],
+        "profil": [qualite.get("profil_utilise", "")],
+        "modele": [qualite.get("modele_ia", "")],
+        "date_correction": [str(result.get("date_correction") or "")],
+        **{column: [] for column in (*QUESTION_COLUMNS, *CRITERE_COLUMNS)},
+    }
+    for position, question in enumerate(result.get("questions", [])):
+        rows["question_etudiant"].append(0)
+        rows["question_numero"].append(str(question.get("numero", position + 1)))
+        rows["question_note"].append(float(question.get("note", 0) or 0))
+        rows["question_note_max"].append(float(question.get("note_max", 0) or 0))
+    for critere, note in (result.get("notes_par_critere") or {}).items():
+        rows["critere_etudiant"].append(0)
+        rows["critere_nom"].append(critere)
+        rows["critere_note"].append(float(note or 0))
+    return rows
+
+
+def _as_array(values, kind) -> np.ndarray:
+    if kind is str:
+        return np.array(values, dtype=str) if len(values) else np.empty(0, dtype="<U1")
+    return np.asarray(values, dtype=np.int64 if kind is int else np.float64)
+
+
+def _assemble(previous: Optional[Dict[str, np.ndarray]], kept: List[str], parsed: Dict[str, Dict]) -> Dict[str, np.ndarray]:
+    """
+    Colonnes du nouvel instantane : lignes reprises (etudiants de kept) et
+    lignes des resultats relus, triees par etudiant
+    """
+    columns: Dict[str, List[np.ndarray]] = {c: [] for c in (*STUDENT_COLUMNS, *QUESTION_COLUMNS, *CRITERE_COLUMNS)}
+    offset = 0
+
+    if previous is not None and kept:
+        keep = np.isin(previous["etudiant"], kept)
+        new_index = np.cumsum(keep) - 1
+        for column in STUDENT_COLUMNS:
+            columns[column].append(np.asarray(previous[column][keep]))
+        for prefix, table in (("question", QUESTION_COLUMNS), ("critere", CRITERE_COLUMNS)):
+            rows = keep[previous[f"{prefix}_etudiant"]]
+            for column in table:
+                values = np.asarray(previous[column][rows])
+                columns[column].append(new_index[values] if column == f"{prefix}_etudiant" else values)
+        offset = int(keep.sum())
+
+    for rows in parsed.values():
+        for column, kind in {**STUDENT_COLUMNS, **QUESTION_COLUMNS, **CRITERE_COLUMNS}.items():
+            values = _as_array(rows[column], kind)
+            columns[column].append(values + offset if column.endswith("_etudiant") else values)
+        offset += 1
+
+    kinds = {**STUDENT_COLUMNS, **QUESTION_COLUMNS, **CRITERE_COLUMNS}
+    snapshot = {
+        column: np.concatenate(parts) if parts else _as_array([], kinds[column])
+        for column, parts in columns.items()
+    }
+
+    # Ordre des etudiants par nom (meme ordre que les dossiers de resultats)
+    order = np.argsort(snapshot["etudiant"], kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    for column in STUDENT_COLUMNS:
+        snapshot[column] = snapshot[column][order]
+    for prefix, table in (("question", QUESTION_COLUMNS), ("critere", CRITERE_COLUMNS)):
+        students = rank[snapshot[f"{prefix}_etudiant"]]
+        row_order = np.argsort(students, kind="stable")
+        snapshot[f"{prefix}_etudiant"] = students
+        for column in table:
+            snapshot[column] = snapshot[column][row_order]
+    return snapshot
+
+
+def _read_manifest(eval_dir: Path) -> Optional[Dict]:
+    path = _snapshot_dir(eval_dir) / MANIFEST_FILENAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == SNAPSHOT_VERSION else None
+
+
+def _load_columns(eval_dir: Path, manifest: Dict, mmap: bool = True) -> Dict[str, np.ndarray]:
+    generation_dir = _snapshot_dir(eval_dir) / str(manifest["generation"])
+    return {
+        column: np.load(generation_dir / f"{column}.npy", mmap_mode="r" if mmap else None)
+        for column in (*STUDENT_COLUMNS, *QUESTION_COLUMNS, *CRITERE_COLUMNS)
+    }
+
+
+def snapshot_signature(manifest: Dict) -> str:
+    """Empreinte des resultats couverts par un instantane (cles de cache des analyses)"""
+    digest = hashlib.sha256(str(SNAPSHOT_VERSION).encode("utf-8"))
+    digest.update(json.dumps(manifest["sources"], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _refresh(eval_dir: Path) -> Dict:
+    """Mise a jour de l'instantane (appelee sous _lock)"""
+    results_dir = eval_dir / "resultats"
+    manifest = _read_manifest(eval_dir)
+    old_sources = manifest["sources"] if manifest else {}
+
+    sources = _scan_sources(results_dir)
+
+    if manifest is not None and sources == old_sources:
+        return manifest
+
+    kept = [name for name, signature in sources.items() if old_sources.get(name) == signature]
+    kept_names = set(kept)
+    parsed: Dict[str, Dict] = {}
+    for name in sources:
+        if name in kept_names:
+            continue
+        # Un resultat illisible garde sa signature : il n'est relu qu'une fois modifie
+        try:
+            with open(results_dir / name / "correction_detaillee.json", "r", encoding="utf-8") as f:
+                parsed[name] = _result_rows(name, json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Erreur lecture {name}: {e}")
+
+    previous = _load_columns(eval_dir, manifest) if manifest and kept else None
+    snapshot = _assemble(previous, kept, parsed)
+
+    generation = (manifest["generation"] + 1) if manifest else 1
+    generation_dir = _snapshot_dir(eval_dir) / str(generation)
+    generation_dir.mkdir(parents=True, exist_ok=True)
+    for column, values in snapshot.items():
+        np.save(generation_dir / f"{column}.npy", values)
+
+    new_manifest = {
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "etudiants": len(snapshot["etudiant"]),
+        "resultats_relus": len(parsed),
+        "sources": sources,
+    }
+    manifest_path = _snapshot_dir(eval_dir) / MANIFEST_FILENAME
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(new_manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+    # Les generations precedentes restent lisibles par les mmap deja ouverts
+    # (fichiers supprimes mais toujours projetes en memoire)
+    for old_dir in _snapshot_dir(eval_dir).iterdir():
+        if old_dir.is_dir() and old_dir.name != str(generation):
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return new_manifest
+
+
+def refresh_snapshot(eval_dir: Path) -> Dict:
+    """
+    Met a jour l'instantane d'une evaluation (ne relit que les resultats
+    ajoutes ou modifies) et retourne son manifeste
+    """
+    with _lock:
+        return _refresh(Path(eval_dir))
+
+
+def load_snapshot(eval_dir: Path) -> Dict[str, np.ndarray]:
+    """Colonnes a jour de l'instantane (lecture mmap)"""
+    eval_dir = Path(eval_dir)
+    # Les colonnes sont ouvertes sous le verrou : une mise a jour concurrente
+    # ne peut pas supprimer la generation entre la lecture du manifeste et
+    # l'ouverture des fichiers
+    with _lock:
+        return _load_columns(eval_dir, _refresh(eval_dir))
+
+
+def _pivot(student_index: np.ndarray, keys: np.ndarray, values: np.ndarray, count: int):
+    """Matrice etudiants x cles (NaN si absente), cles dans l'ordre de premiere apparition"""
+    if len(keys) == 0:
+        return [], np.full((count, 0), np.nan), None
+    distinct, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    columns = position[inverse]
+    matrix = np.full((count, len(distinct)), np.nan)
+    matrix[student_index, columns] = values
+    return [str(key) for key in distinct[order]], matrix, columns
+
+
+def snapshot_scores(snapshot: Dict[str, np.ndarray], note_max: float) -> Dict:
+    """Tableaux de notes de l'instantane (memes cles que statistics_service.extract_scores)"""
+    count = len(snapshot["etudiant"])
+    totals = np.asarray(snapshot["note_totale"], dtype=float)
+    maxima = np.asarray(snapshot["note_maximale"], dtype=float)
+    maxima = np.where(np.isnan(maxima), note_max, maxima)
+    pourcentages = np.divide(100 * totals, maxima, out=np.zeros(count), where=maxima > 0)
+
+    question_index = np.asarray(snapshot["question_etudiant"])
+    questions, question_notes, columns = _pivot(
+        question_index, np.asarray(snapshot["question_numero"]), np.asarray(snapshot["question_note"]), count
+    )
+    question_max = np.full(question_notes.shape, np.nan)
+    if columns is not None:
+        question_max[question_index, columns] = np.asarray(snapshot["question_note_max"])
+
+    criteres, critere_notes, _ = _pivot(
+        np.asarray(snapshot["critere_etudiant"]), np.asarray(snapshot["critere_nom"]),
+        np.asarray(snapshot["critere_note"]), count
+    )
+    return {
+        "notes": pourcentages * note_max / 100,
+        "pourcentages": pourcentages,
+        "questions": [int(q) if q.isdigit() else q for q in questions],
+        "question_notes": question_notes,
+        "question_max": question_max,
+        "criteres": criteres,
+        "critere_notes": critere_notes,
+    }
@@ -0,0 +1,260 @@
+"""
+services/running_statistics.py
+==============================
+Statistiques courantes d'une evaluation, tenues a jour a chaque
+enregistrement de resultat (evaluations/<id>/statistiques_courantes.json)
+
+Pour la note totale (ramenee au bareme de l'evaluation) : effectif, somme,
+somme des carres, copies reussies et histogramme au centieme de point.
+L'histogramme sert d'esquisse de quantiles : il se fusionne par addition,
+accepte le retrait d'une note (resultat remplace) et donne les quantiles
+exacts des notes arrondies au centieme, avec une taille bornee par le
+bareme (2001 cases sur 20) quel que soit l'effectif. Memes sommes par
+question.
+
+Ajouter ou remplacer un resultat ne relit que l'ancien resultat de
+l'etudiant ; l'endpoint /statistics ne lit que ce fichier.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.helpers import write_atomic
+from .result_locks import evaluation_lock
+from .statistics_service import DISTRIBUTION_EDGES_20, QUANTILES, total_score
+
+RUNNING_STATISTICS_FILENAME = "statistiques_courantes.json"
+
+# A incrementer si le format change : les fichiers existants sont recalcules
+RUNNING_STATISTICS_VERSION = 1
+
+# Resolution de l'histogramme (centiemes de point)
+HISTOGRAM_SCALE = 100
+
+def _empty_sums() -> Dict:
+    return {"copies": 0, "somme": 0.0, "somme_carres": 0.0, "reussies": 0}
+
+
+def _add(sums: Dict, note: float, reussie: bool, sign: int):
+    sums["copies"] += sign
+    sums["somme"] += sign * note
+    sums["somme_carres"] += sign * note * note
+    sums["reussies"] += sign * int(reussie)
+
+
+def _mean_std(sums: Dict):
+    count = sums["copies"]
+    if count <= 0:
+        return 0.0, 0.0
+    mean = sums["somme"] / count
+    return mean, math.sqrt(max(sums["somme_carres"] / count - mean * mean, 0.0))
+
+
+class RunningStatistics:
+    """Agregats courants d'une evaluation (etat JSON serialisable dans self.data)"""
+
+    def __init__(self, note_max: float, data: Optional[Dict] = None):
+        self.data = data or {
+            "version": RUNNING_STATISTICS_VERSION,
+            "bareme": note_max,
+            **_empty_sums(),
+            "histogramme": {},
+            "questions": {},
+        }
+        self.note_max = float(self.data["bareme"])
+
+    def add(self, result: Dict, sign: int = 1):
+        """Ajoute (sign=1) ou retire (sign=-1) la contribution d'un resultat"""
+        maximum = float(result.get("note_maximale") or result.get("note_max") or self.note_max)
+        pourcentage = 100 * total_score(result) / maximum if maximum > 0 else 0.0
+        note = round(pourcentage * self.note_max / 100, 2)
+        _add(self.data, note, pourcentage >= 50, sign)
+
+        histogram = self.data["histogramme"]
+        bucket = str(int(round(note * HISTOGRAM_SCALE)))
+        histogram[bucket] = histogram.get(bucket, 0) + sign
+        if histogram[bucket] <= 0:
+            del histogram[bucket]
+
+        for position, question in enumerate(result.get("questions", [])):
+            numero = str(question.get("numero", position + 1))
+            points = float(question.get("note_max", 0) or 0)
+            q_note = float(question.get("note", 0) or 0)
+            sums = self.data["questions"].setdefault(numero, {**_empty_sums(), "note_max": points})
+            sums["note_max"] = max(sums["note_max"], points)
+            _add(sums, q_note, points > 0 and q_note >= points / 2, sign)
+            if sums["copies"] <= 0:
+                del self.data["questions"][numero]
+
+    def merge(self, other: "RunningStatistics"):
+        """Ajoute les agregats d'un autre ensemble de copies (meme bareme)"""
+        for field in _empty_sums():
+            self.data[field] += other.data[field]
+        for bucket, count in other.data["histogramme"].items():
+            self.data["histogramme"][bucket] = self.data["histogramme"].get(bucket, 0) + count
+        for numero, sums in other.data["questions"].items():
+            target = self.data["questions"].setdefault(numero, {**_empty_sums(), "note_max": sums["note_max"]})
+            target["note_max"] = max(target["note_max"], sums["note_max"])
+            for field in _empty_sums():
+                target[field] += sums[field]
+
+    def _sorted_buckets(self):
+        return sorted((int(bucket), count) for bucket, count in self.data["histogramme"].items())
+
+    def quantile(self, q: float) -> float:
+        """Quantile q (0-100) par interpolation lineaire, comme numpy.percentile"""
+        count = self.data["copies"]
+        if count <= 0:
+            return 0.0
+        position = q / 100 * (count - 1)
+        low_rank, high_rank = math.floor(position), math.ceil(position)
+        low = high = None
+        seen = 0
+        for bucket, bucket_count in self._sorted_buckets():
+            seen += bucket_count
+            if low is None and low_rank < seen:
+                low = bucket / HISTOGRAM_SCALE
+            if high_rank < seen:
+                high = bucket / HISTOGRAM_SCALE
+                break
+        return low + (high - low) * (position - low_rank)
+
+    def distribution(self) -> Dict[str, int]:
+        """Effectifs par tranche (memes tranches que compute_class_statistics)"""
+        edges = [edge * self.note_max / 20 for edge in DISTRIBUTION_EDGES_20]
+        counts = [0] * (len(edges) - 1)
+        for bucket, count in self._sorted_buckets():
+            note = min(max(bucket / HISTOGRAM_SCALE, 0), self.note_max)
+            index = next((i for i in range(len(counts)) if note < edges[i + 1]), len(counts) - 1)
+            counts[index] += count
+        return {f"{low:g}-{high:g}": n for low, high, n in zip(edges[:-1], edges[1:], counts)}
+
+    def summary(self, eval_id: str) -> Dict:
+        """Statistiques de l'evaluation ({} sans resultat), sans relire les copies"""
+        count = self.data["copies"]
+        if count <= 0:
+            return {}
+        buckets = self._sorted_buckets()
+        mean, std = _mean_std(self.data)
+
+        questions = []
+        for numero, sums in self.data["questions"].items():
+            q_mean, q_std = _mean_std(sums)
+            questions.append({
+                "numero": int(numero) if numero.isdigit() else numero,
+                "copies": sums["copies"],
+                "note_max": sums["note_max"],
+                "moyenne": round(q_mean, 2),
+                "ecart_type": round(q_std, 2),
+                "pourcentage_moyen": round(100 * q_mean / sums["note_max"], 1) if sums["note_max"] > 0 else 0.0,
+                "taux_reussite": round(100 * sums["reussies"] / sums["copies"], 1),
+            })
+
+        return {
+            "evaluation_id": eval_id,
+            "nombre_copies": count,
+            "nombre_corriges": count,
+            "bareme": self.note_max,
+            "moyenne_generale": round(mean, 2),
+            "mediane": round(self.quantile(50), 2),
+            "ecart_type": round(std, 2),
+            "note_min": buckets[0][0] / HISTOGRAM_SCALE,
+            "note_max": buckets[-1][0] / HISTOGRAM_SCALE,
+            "quantiles": {f"p{q}": round(self.quantile(q), 2) for q in QUANTILES},
+            "taux_reussite": round(100 * self.data["reussies"] / count, 1),
+            "distribution_notes": self.distribution(),
+            "questions": questions,
+            "date_calcul": self.data.get("date_maj", datetime.now().isoformat()),
+        }
+
+
+def _stats_path(eval_dir: Path) -> Path:
+    return Path(eval_dir) / RUNNING_STATISTICS_FILENAME
+
+
+def _save(eval_dir: Path, stats: RunningStatistics):
+    stats.data["date_maj"] = datetime.now().isoformat()
+    path = _stats_path(eval_dir)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats.data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _compute_from_results(eval_dir: Path, note_max: float) -> RunningStatistics:
+    stats = RunningStatistics(note_max)
+    results_dir = Path(eval_dir) / "resultats"
+    if results_dir.exists():
+        for result_file in sorted(results_dir.glob("*/correction_detaillee.json")):
+            try:
+                with open(result_file, "r", encoding="utf-8") as f:
+                    stats.add(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+    return stats
+
+
+def _load_saved(eval_dir: Path, note_max: float) -> Optional[RunningStatistics]:
+    """Statistiques enregistrees (None si absentes, d'un autre format ou d'un autre bareme)"""
+    path = _stats_path(eval_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == RUNNING_STATISTICS_VERSION and float(data.get("bareme", 0)) == note_max:
+            return RunningStatistics(note_max, data)
+    except (OSError, json.JSONDecodeError, TypeError, ValueError):
+        pass
+    return None
+
+
+def load_running_statistics(eval_dir: Path, note_max: float) -> RunningStatistics:
+    """Statistiques courantes d'une evaluation (calculees une fois si absentes)"""
+    note_max = float(note_max)
+    with evaluation_lock(eval_dir):
+        stats = _load_saved(eval_dir, note_max)
+        if stats is None:
+            stats = _compute_from_results(eval_dir, note_max)
+            _save(eval_dir, stats)
+        return stats
+
+
+def save_result_with_statistics(eval_dir: Path, student_name: str, result: Dict, note_max: float):
+    """
+    Enregistre le resultat d'un etudiant et le reporte sur les statistiques :
+    retire l'ancien resultat de l'etudiant (s'il en avait un), ajoute le
+    nouveau. Lecture de l'ancien resultat, ecriture et mise a jour sous le
+    verrou de l'evaluation (result_locks), partage avec le classement et les
+    commentaires differes : aucun autre enregistrement ne s'intercale. Sans statistiques
+    valides, elles sont recalculees depuis les fichiers, qui incluent deja
+    le nouveau resultat.
+    """
+    note_max = float(note_max)
+    result_dir = Path(eval_dir) / "resultats" / student_name
+    result_file = result_dir / "correction_detaillee.json"
+    with evaluation_lock(eval_dir):
+        previous = None
+        if result_file.exists():
+            try:
+                with open(result_file, "r", encoding="utf-8") as f:
+                    previous = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                # Resultat illisible : absent des statistiques recalculees
+                previous = None
+
+        result_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(result_file, json.dumps(result, ensure_ascii=False, indent=2, default=str).encode("utf-8"))
+
+        stats = _load_saved(eval_dir, note_max)
+        if stats is None:
+            stats = _compute_from_results(eval_dir, note_max)
+        else:
+            if previous is not None:
+                stats.add(previous, -1)
+            stats.add(result)
+        _save(eval_dir, stats)
@@ -0,0 +1,208 @@
+"""
+services/statistics_service.py
+==============================
+Statistiques de classe vectorisees (NumPy)
+
+Les notes sont extraites des resultats en un seul parcours Python, dans des
+tableaux NumPy : notes totales, matrice etudiants x questions et matrice
+etudiants x criteres (NaN quand une copie n'a pas la question ou le
+critere). Tous les indicateurs sont ensuite calcules sur ces tableaux :
+moyenne, mediane, ecart type, quantiles, taux de reussite, repartition par
+tranches proportionnelles au bareme, agregats par question et par critere.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+QUANTILES = (10, 25, 50, 75, 90)
+
+# Bornes des tranches de la repartition pour un bareme sur 20, mises a
+# l'echelle du bareme de l'evaluation (0-5, 5-10, 10-12, ... sur 20)
+DISTRIBUTION_EDGES_20 = (0, 5, 10, 12, 14, 16, 20)
+
+
+def total_score(result: Dict) -> float:
+    """Note totale d'un resultat : note_totale, sinon note_globale, sinon somme des notes des questions"""
+    for field in ("note_totale", "note_globale"):
+        if result.get(field) is not None:
+            return float(result[field])
+    return float(sum(q.get("note", 0) or 0 for q in result.get("questions", [])))
+
+
+def scaled_score(result: Dict, note_max: float) -> float:
+    """Note totale ramenee au bareme note_max (comme les notes de extract_scores)"""
+    maximum = float(result.get("note_maximale") or result.get("note_max") or note_max)
+    return total_score(result) * note_max / maximum if maximum > 0 else 0.0
+
+
+def extract_scores(results: List[Dict], note_max: float) -> Dict:
+    """
+    Tableaux de notes d'une classe (un seul parcours des resultats)
+
+    Returns:
+        notes : notes totales ramenees au bareme note_max
+        pourcentages : notes totales en pourcentage
+        questions / question_notes / question_max : numeros des questions,
+            matrices etudiants x questions des notes et des points (NaN si absente)
+        criteres / critere_notes : noms des criteres, matrice etudiants x criteres
+    """
+    count = len(results)
+    totals = np.empty(count)
+    maxima = np.empty(count)
+    question_index: Dict = {}
+    critere_index: Dict[str, int] = {}
+    question_cells = ([], [], [], [])
+    critere_cells = ([], [], [])
+
+    for row, result in enumerate(results):
+        totals[row] = total_score(result)
+        maxima[row] = float(result.get("note_maximale") or result.get("note_max") or note_max)
+        for position, question in enumerate(result.get("questions", [])):
+            column = question_index.setdefault(question.get("numero", position + 1), len(question_index))
+            question_cells[0].append(row)
+            question_cells[1].append(column)
+            question_cells[2].append(question.get("note", 0) or 0)
+            question_cells[3].append(question.get("note_max", 0) or 0)
+        for name, note in (result.get("notes_par_critere") or {}).items():
+            critere_cells[0].append(row)
+            critere_cells[1].append(critere_index.setdefault(name, len(critere_index)))
+            critere_cells[2].append(note or 0)
+
+    pourcentages = np.divide(100 * totals, maxima, out=np.zeros(count), where=maxima > 0)
+
+    question_notes = np.full((count, len(question_index)), np.nan)
+    question_max = np.full((count, len(question_index)), np.nan)
+    if question_cells[0]:
+        rows, columns = np.array(question_cells[0]), np.array(question_cells[1])
+        question_notes[rows, columns] = question_cells[2]
+        question_max[rows, columns] = question_cells[3]
+
+    critere_notes = np.full((count, len(critere_index)), np.nan)
+    if critere_cells[0]:
+        critere_notes[np.array(critere_cells[0]), np.array(critere_cells[1])] = critere_cells[2]
+
+    return {
+        "notes": pourcentages * note_max / 100,
+        "pourcentages": pourcentages,
+        "questions": list(question_index),
+        "question_notes": question_notes,
+        "question_max": question_max,
+        "criteres": list(critere_index),
+        "critere_notes": critere_notes,
+    }
+
+
+def _rounded(value, digits: int = 2) -> float:
+    return round(float(value), digits)
+
+
+def score_distribution(notes: np.ndarray, note_max: float) -> Dict[str, int]:
+    """Effectifs par tranche (bornes de DISTRIBUTION_EDGES_20 a l'echelle de note_max)"""
+    edges = np.array(DISTRIBUTION_EDGES_20, dtype=float) * note_max / 20
+    counts, _ = np.histogram(np.clip(notes, 0, note_max), bins=edges)
+    return {f"{low:g}-{high:g}": int(n) for low, high, n in zip(edges[:-1], edges[1:], counts)}
+
+
+def question_statistics(scores: Dict) -> List[Dict]:
+    """Moyenne, ecart type, min, max et taux de reussite (>= 50 % des points) par question"""
+    notes, maxima = scores["question_notes"], scores["question_max"]
+    if not scores["questions"]:
+        return []
+
+    answered = ~np.isnan(notes)
+    copies = answered.sum(axis=0)
+    pourcentages = np.divide(100 * notes, maxima, out=np.zeros(notes.shape), where=maxima > 0)
+    pourcentages[~answered] = np.nan
+    reussies = (pourcentages >= 50).sum(axis=0)
+
+    moyenne = np.nanmean(notes, axis=0)
+    ecart_type = np.nanstd(notes, axis=0)
+    note_min, note_max = np.nanmin(notes, axis=0), np.nanmax(notes, axis=0)
+    points = np.nanmax(maxima, axis=0)
+    pourcentage_moyen = np.nanmean(pourcentages, axis=0)
+
+    return [
+        {
+            "numero": numero,
+            "copies": int(copies[j]),
+            "note_max": float(points[j]),
+            "moyenne": _rounded(moyenne[j]),
+            "ecart_type": _rounded(ecart_type[j]),
+            "note_min": _rounded(note_min[j]),
+            "note_max_obtenue": _rounded(note_max[j]),
+            "pourcentage_moyen": _rounded(pourcentage_moyen[j], 1),
+            "taux_reussite": _rounded(100 * reussies[j] / copies[j], 1),
+        }
+        for j, numero in enumerate(scores["questions"])
+    ]
+
+
+def critere_statistics(scores: Dict) -> List[Dict]:
+    """Moyenne, ecart type, min et max par critere (notes_par_critere des resultats)"""
+    notes = scores["critere_notes"]
+    if not scores["criteres"]:
+        return []
+
+    copies = (~np.isnan(notes)).sum(axis=0)
+    moyenne, ecart_type = np.nanmean(notes, axis=0), np.nanstd(notes, axis=0)
+    note_min, note_max = np.nanmin(notes, axis=0), np.nanmax(notes, axis=0)
+    return [
+        {
+            "critere": name,
+            "copies": int(copies[j]),
+            "moyenne": _rounded(moyenne[j]),
+            "ecart_type": _rounded(ecart_type[j]),
+            "note_min": _rounded(note_min[j]),
+            "note_max": _rounded(note_max[j]),
+        }
+        for j, name in enumerate(scores["criteres"])
+    ]
+
+
+def compute_class_statistics(results: List[Dict], eval_id: str, note_max: Optional[float] = None) -> Dict:
+    """
+    Statistiques d'une evaluation a partir de ses correction_detaillee.json
+
+    note_max : bareme de l'evaluation (note_totale des infos de l'evaluation) ;
+    a defaut celui du premier resultat, puis 20. Les notes de chaque copie
+    sont ramenees a ce bareme ; une copie est reussie a partir de 50 %.
+    """
+    if not results:
+        return {}
+
+    if not note_max:
+        note_max = float(results[0].get("note_maximale") or results[0].get("note_max") or 20)
+    return class_statistics(extract_scores(results, note_max), eval_id, note_max)
+
+
+def class_statistics(scores: Dict, eval_id: str, note_max: float) -> Dict:
+    """
+    Statistiques d'une evaluation a partir des tableaux de notes
+    (extract_scores ou results_snapshot.snapshot_scores)
+    """
+    notes = scores["notes"]
+    if len(notes) == 0:
+        return {}
+    quantiles = np.percentile(notes, QUANTILES)
+    criteres = critere_statistics(scores)
+
+    return {
+        "evaluation_id": eval_id,
+        "nombre_copies": len(notes),
+        "nombre_corriges": len(notes),
+        "bareme": note_max,
+        "moyenne_generale": _rounded(notes.mean()),
+        "mediane": _rounded(np.median(notes)),
+        "ecart_type": _rounded(notes.std()),
+        "note_min": _rounded(notes.min()),
+        "note_max": _rounded(notes.max()),
+        "quantiles": {f"p{q}": _rounded(value) for q, value in zip(QUANTILES, quantiles)},
+        "taux_reussite": _rounded((scores["pourcentages"] >= 50).mean() * 100, 1),
+        "distribution_notes": score_distribution(notes, note_max),
+        "questions": question_statistics(scores),
+        "notes_par_critere": {c["critere"]: c["moyenne"] for c in criteres},
+        "criteres": criteres,
+        "date_calcul": datetime.now().isoformat()
+    }
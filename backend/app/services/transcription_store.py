@@ -0,0 +1,120 @@
+"""
+services/transcription_store.py
+===============================
+Transcriptions OCR des copies, calculees des le depot (en tache de fond)
+et enregistrees dans evaluations/<id>/transcriptions/<copie>.json
+
+La correction reutilise une transcription tant que la copie (hash du
+fichier) et la matiere n'ont pas change ; seules les copies manquantes
+sont transcrites au lancement de la correction.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ..config import settings
+from .ocr_pipeline import transcribe_manuscripts_async
+
+
+def transcription_path(copy_file: Path) -> Path:
+    """Fichier de transcription d'une copie (copies_soumises/x.pdf -> transcriptions/x.pdf.json)"""
+    copy_file = Path(copy_file)
+    return copy_file.parent.parent / "transcriptions" / f"{copy_file.name}.json"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_transcription(copy_file: Path, matiere: str, result: Dict, file_hash: Optional[str] = None):
+    """Enregistre la transcription d'une copie (ecriture atomique)"""
+    path = transcription_path(copy_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "fichier": Path(copy_file).name,
+        "sha256": file_hash or file_sha256(copy_file),
+        "matiere": matiere.lower(),
+        "date_transcription": datetime.now().isoformat(),
+        "resultat": result
+    }
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def is_complete(result: Dict) -> bool:
+    """Vrai si la transcription n'a ni erreur globale ni page en echec"""
+    if result.get("error"):
+        return False
+    return not any(page.get("error") for page in result.get("pages") or [])
+
+
+def load_transcription(copy_file: Path, matiere: str) -> Optional[Dict]:
+    """Transcription enregistree si elle correspond encore a la copie, sinon None"""
+    path = transcription_path(copy_file)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    result = data.get("resultat") or {}
+    if not is_complete(result) or data.get("matiere") != matiere.lower():
+        return None
+    if data.get("sha256") != file_sha256(copy_file):
+        return None
+    return result
+
+
+def delete_transcription(copy_file: Path):
+    transcription_path(copy_file).unlink(missing_ok=True)
+
+
+async def transcribe_and_store(
+    eval_id: str,
+    copy_files: Sequence[Path],
+    matiere: str
+) -> List[Dict]:
+    """Transcrit des copies et enregistre les resultats valides"""
+    copy_files = [Path(p) for p in copy_files]
+    hashes = [file_sha256(p) for p in copy_files]
+    results = await transcribe_manuscripts_async(copy_files, matiere, evaluation_id=eval_id)
+
+    for copy_file, file_hash, result in zip(copy_files, hashes, results):
+        if is_complete(result):
+            save_transcription(copy_file, matiere, result, file_hash)
+    return results
+
+
+async def prefetch_transcriptions(eval_id: str, copy_files: Sequence[Path], matiere: str):
+    """
+    Tache de fond lancee au depot des copies : transcrit les PDF qui n'ont
+    pas encore de transcription a jour. Les erreurs sont journalisees sans
+    interrompre le depot ; la correction retranscrira les copies manquantes.
+    """
+    if not settings.OCR_EAGER_TRANSCRIPTION:
+        return
+
+    pending = [
+        Path(p) for p in copy_files
+        if Path(p).suffix.lower() == ".pdf" and load_transcription(Path(p), matiere) is None
+    ]
+    if not pending:
+        return
+
+    try:
+        await transcribe_and_store(eval_id, pending, matiere)
+    except Exception as e:
+        print(f"Transcription anticipee impossible pour {eval_id}: {e}")
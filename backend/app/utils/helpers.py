@@ -2,6 +2,8 @@
 Utility helper functions
 """
 import hashlib
+import os
+import tempfile
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
@@ -23,6 +25,22 @@ def get_directory_hash(directory_path: Path) -> str:
     return hashlib.md5(hash_input.encode()).hexdigest()[:8]
 
 
+def write_atomic(path: Path, data: bytes):
+    """
+    Write a file atomically: the data goes to a uniquely named temporary file
+    in the same directory, which then replaces the target. Concurrent writers
+    never share a temporary file and readers never see a partial file.
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        os.replace(tmp.name, path)
+    except OSError:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename for safe file system use
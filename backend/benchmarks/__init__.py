@@ -0,0 +1,2 @@
+# Benchmarks Package
+# Scripts de mesure de performance executables hors ligne (LLM simule)
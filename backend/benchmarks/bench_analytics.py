@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_analytics.py
+=============================
+Agregats multi-evaluations : cout d'une mise a jour incrementale et des
+requetes (serie temporelle d'un etudiant, d'une classe, comparaison de
+cohortes), compare au recalcul complet depuis les fichiers de resultats
+
+Une annee scolaire fictive est generee dans un dossier temporaire :
+--classes classes de --students etudiants, --evaluations evaluations par
+classe reparties sur l'annee et sur trois matieres.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_analytics --classes 6 --students 30 --evaluations 24
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.common import BACKEND_DIR, Timer, print_report
+
+MATIERES = ("Mathematiques", "Francais", "Histoire")
+
+
+def write_school_year(evaluations_path: Path, args) -> list:
+    """Evaluations et resultats fictifs ; retourne [(eval_id, eval_data)]"""
+    rng = random.Random(42)
+    start = date(2024, 9, 2)
+    evaluations = []
+    for c in range(args.classes):
+        classe = f"3eme {chr(ord('A') + c)}"
+        for e in range(args.evaluations):
+            eval_id = f"EVAL_{c}_{e}"
+            eval_data = {
+                "titre": f"Controle {e + 1}",
+                "classe": classe,
+                "matiere": MATIERES[e % len(MATIERES)],
+                "date": (start + timedelta(days=e * 300 // args.evaluations)).isoformat(),
+                "note_totale": 20,
+            }
+            eval_dir = evaluations_path / eval_id
+            (eval_dir / "resultats").mkdir(parents=True)
+            (eval_dir / "infos_evaluation.json").write_text(json.dumps(eval_data), encoding="utf-8")
+            for s in range(args.students):
+                result_dir = eval_dir / "resultats" / f"ETUDIANT{c}{s:03d}_Bench"
+                result_dir.mkdir()
+                result = {"etudiant_nom": f"ETUDIANT{c}{s:03d}", "etudiant_prenom": "Bench",
+                          "note_totale": round(rng.uniform(0, 20), 1)}
+                (result_dir / "correction_detaillee.json").write_text(json.dumps(result), encoding="utf-8")
+            evaluations.append((eval_id, eval_data))
+    return evaluations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--evaluations", type=int, default=24, help="Evaluations par classe")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.analytics_service import AnalyticsStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        evaluations_path = Path(tmp) / "evaluations"
+        evaluations = write_school_year(evaluations_path, args)
+        store = AnalyticsStore(root=Path(tmp) / "analytics", evaluations_path=evaluations_path)
+
+        with Timer() as rebuild_timer:
+            store.rebuild()
+
+        eval_id, eval_data = evaluations[0]
+        result = {"etudiant_nom": "ETUDIANT0000", "etudiant_prenom": "Bench", "note_totale": 15}
+        with Timer() as update_timer:
+            for _ in range(args.repeat):
+                store.record_results(eval_id, eval_data, [result])
+
+        queries = {
+            "etudiant": lambda: store.student_timeseries("ETUDIANT0000_Bench"),
+            "classe et matiere": lambda: store.evaluation_timeseries("3eme A", "Mathematiques"),
+            "cohortes par classe": lambda: store.cohort_comparison("classe", matiere="Mathematiques"),
+        }
+        timings = {}
+        for label, query in queries.items():
+            with Timer() as query_timer:
+                for _ in range(args.repeat):
+                    query()
+            timings[f"requete {label} (ms)"] = 1000 * query_timer.elapsed / args.repeat
+
+    print_report("Agregats multi-evaluations", {
+        "evaluations": len(evaluations),
+        "resultats": len(evaluations) * args.students,
+        "recalcul complet (s)": rebuild_timer.elapsed,
+        "mise a jour d'un resultat (ms)": 1000 * update_timer.elapsed / args.repeat,
+        **timings,
+    })
+
+
+if __name__ == "__main__":
+    main()
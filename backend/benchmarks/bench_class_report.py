@@ -0,0 +1,63 @@
+"""
+benchmarks/bench_class_report.py
+================================
+Temps de calcul des indicateurs et de generation du rapport de synthese
+d'une classe (un coeur)
+
+Les resultats d'exemple sont dupliques jusqu'a la taille de classe demandee,
+avec des notes tirees au hasard (graine fixe) pour obtenir une repartition
+realiste.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_class_report --students 1000
+"""
+
+import argparse
+import random
+import sys
+
+from benchmarks.bench_reports import load_sample_class
+from benchmarks.common import BACKEND_DIR, Timer, print_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.class_report_service import ClassReportGenerator, compute_class_summary
+
+    results, eval_info = load_sample_class(args.students)
+    if not results:
+        print("Aucun resultat d'exemple trouve", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(42)
+    for result in results:
+        result["questions"] = [
+            {**q, "note": round(rng.uniform(0, q.get("note_max", 10)), 1)} for q in result.get("questions", [])
+        ]
+        result["note_totale"] = round(sum(q["note"] for q in result["questions"]), 1)
+
+    # Echauffement (imports reportlab, polices)
+    ClassReportGenerator().generate_class_report(compute_class_summary(results[:10], eval_info), eval_info)
+
+    with Timer() as stats_timer:
+        summary = compute_class_summary(results, eval_info)
+    with Timer() as pdf_timer:
+        pdf = ClassReportGenerator().generate_class_report(summary, eval_info)
+
+    print_report("Rapport de synthese de la classe", {
+        "etudiants": len(results),
+        "questions": len(summary["questions"]),
+        "indicateurs (ms)": 1000 * stats_timer.elapsed,
+        "PDF (s)": pdf_timer.elapsed,
+        "total (s)": stats_timer.elapsed + pdf_timer.elapsed,
+        "taille (Ko)": len(pdf) / 1024,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+benchmarks/bench_lazy_feedback.py
+=================================
+Correction avec commentaires immediats ou differes : temps jusqu'aux notes,
+tokens generes, et cout total quand une partie seulement des etudiants
+consulte son resultat detaille
+
+La latence du LLM simule croit avec la longueur de la reponse
+(--ms-per-token) : la passe de notation, tres courte, est plus rapide.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_lazy_feedback --copies 20 --open-rate 0.3
+"""
+
+import argparse
+import random
+
+from benchmarks.common import (
+    Timer, add_mock_arguments, enable_mock_llm_from_args, print_report, sample_bareme
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--open-rate", type=float, default=0.3,
+                        help="Part des etudiants qui consultent leur resultat detaille ou leur PDF")
+    add_mock_arguments(parser)
+    parser.set_defaults(ms_per_token=10.0, latency_ms=200.0, jitter_ms=50.0)
+    args = parser.parse_args()
+
+    enable_mock_llm_from_args(args)
+    from app.services.ai_correction_service import AICorrectionEngine
+    from app.services.llm_mock import get_mock_responder
+
+    responder = get_mock_responder()
+    evaluation_info = {"matiere": "Mathematiques", "classe": "3eme", "bareme": sample_bareme()}
+    copies_data = [
+        {
+            "transcription": f"Copie {i}: 2x + 5 = 13 donc x = 4. f(3) = 4. x^2 - 9 = (x-3)(x+3).",
+            "etudiant_nom": f"ETUDIANT{i:04d}",
+            "etudiant_prenom": "Bench"
+        }
+        for i in range(args.copies)
+    ]
+    engine = AICorrectionEngine()
+
+    for label, lazy in (("commentaires immediats", False), ("commentaires differes", True)):
+        responder.reset_stats()
+        with Timer() as grading_timer:
+            results = engine.process_evaluation_copies(evaluation_info, copies_data, "equilibre", lazy)
+        grading_tokens = responder.stats["completion_tokens"]
+
+        opened = random.Random(args.seed).sample(results, round(len(results) * args.open_rate)) if lazy else []
+        with Timer() as feedback_timer:
+            for result in opened:
+                engine.generate_feedback(result, evaluation_info)
+
+        print_report(f"Correction, {label}", {
+            "copies": len(results),
+            "temps jusqu'aux notes (s)": grading_timer.elapsed,
+            "tokens generes a la correction": grading_tokens,
+            "resultats consultes": len(opened),
+            "commentaires a la demande (s)": feedback_timer.elapsed,
+            "tokens generes au total": responder.stats["completion_tokens"],
+            "tokens prompt au total": responder.stats["prompt_tokens"],
+        })
+
+    print("\nNote : les commentaires du LLM simule sont courts ; avec le modele reel, "
+          "la part des commentaires dans les tokens generes est bien plus grande.")
+
+
+if __name__ == "__main__":
+    main()
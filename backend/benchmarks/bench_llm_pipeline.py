@@ -0,0 +1,228 @@
+"""
+benchmarks/bench_llm_pipeline.py
+================================
+Benchmark de debit de la correction, de l'OCR et de l'API de bout en bout
+avec le LLM simule (aucune cle API requise)
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_llm_pipeline --scenario all --copies 30
+    python -m benchmarks.bench_llm_pipeline --scenario correction --min-throughput 5
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks.common import (
+    Timer, add_mock_arguments, enable_mock_llm_from_args, mock_stats_rows,
+    percentile, print_report, sample_bareme, sample_copies
+)
+
+
+def bench_correction(copies: int) -> float:
+    """Mesure process_evaluation_copies sur des transcriptions synthetiques"""
+    from app.services.ai_correction_service import AICorrectionEngine
+    from app.services.llm_mock import get_mock_responder
+
+    responder = get_mock_responder()
+    responder.reset_stats()
+
+    evaluation_info = {"matiere": "Mathematiques", "classe": "3eme", "bareme": sample_bareme()}
+    copies_data = [
+        {
+            "transcription": f"Copie {i}: 2x + 5 = 13 donc x = 4. f(3) = 4. x^2 - 9 = (x-3)(x+3).",
+            "etudiant_nom": f"ETUDIANT{i:04d}",
+            "etudiant_prenom": "Bench"
+        }
+        for i in range(copies)
+    ]
+
+    engine = AICorrectionEngine()
+    with Timer() as timer:
+        results = engine.process_evaluation_copies(evaluation_info, copies_data, "equilibre")
+
+    rows = {
+        "copies": len(results),
+        "temps total (s)": timer.elapsed,
+        "copies/s": len(results) / timer.elapsed if timer.elapsed else 0.0,
+        "copies en erreur": sum(1 for r in results if r.get("necessite_revision_humaine")),
+    }
+    rows.update(mock_stats_rows(responder, timer.elapsed))
+    print_report("Correction (process_evaluation_copies)", rows)
+    return rows["copies/s"]
+
+
+def bench_ocr(copies: int) -> float:
+    """Mesure le pipeline OCR sur les copies d'exemple du depot"""
+    from app.services.ai_ocr_service import OCRProcessor
+    from app.services.llm_mock import get_mock_responder
+
+    responder = get_mock_responder()
+    responder.reset_stats()
+
+    files = sample_copies()
+    if not files:
+        print("Aucune copie d'exemple trouvee", file=sys.stderr)
+        return 0.0
+    files = [files[i % len(files)] for i in range(copies)]
+
+    processor = OCRProcessor()
+    pages = 0
+    with Timer() as timer:
+        for file_path in files:
+            result = processor.transcribe_file(str(file_path), "mathematiques")
+            pages += result.get("page_count", 1)
+
+    rows = {
+        "copies": len(files),
+        "pages": pages,
+        "temps total (s)": timer.elapsed,
+        "copies/s": len(files) / timer.elapsed if timer.elapsed else 0.0,
+        "pages/s": pages / timer.elapsed if timer.elapsed else 0.0,
+    }
+    rows.update(mock_stats_rows(responder, timer.elapsed))
+    print_report("OCR (OCRProcessor.transcribe_file)", rows)
+    return rows["copies/s"]
+
+
+def bench_ocr_pipeline(copies: int) -> float:
+    """Pipeline asynchrone (rendu en processus) et reactivite de la boucle d'evenements"""
+    from app.services.llm_mock import get_mock_responder
+    from app.services.ocr_pipeline import OCRPipeline, render_workers, shutdown_render_pool
+
+    responder = get_mock_responder()
+    responder.reset_stats()
+
+    files = sample_copies()
+    if not files:
+        print("Aucune copie d'exemple trouvee", file=sys.stderr)
+        return 0.0
+    files = [files[i % len(files)] for i in range(copies)]
+
+    async def run():
+        lags = []
+        done = asyncio.Event()
+
+        async def heartbeat():
+            while not done.is_set():
+                start = asyncio.get_running_loop().time()
+                await asyncio.sleep(0.01)
+                lags.append(1000 * (asyncio.get_running_loop().time() - start - 0.01))
+
+        pipeline = OCRPipeline()
+        task = asyncio.create_task(heartbeat())
+        with Timer() as timer:
+            results = await pipeline.transcribe_files(files, "mathematiques")
+        done.set()
+        await task
+        return results, timer.elapsed, lags, pipeline.stats
+
+    try:
+        results, elapsed, lags, stats = asyncio.run(run())
+    finally:
+        shutdown_render_pool()
+
+    rows = {
+        "copies": len(results),
+        "processus de rendu": render_workers(),
+        "rendus en processus": stats["rendu_processus"],
+        "temps total (s)": elapsed,
+        "copies/s": len(results) / elapsed if elapsed else 0.0,
+        "latence boucle p95 (ms)": percentile(lags, 95),
+        "latence boucle max (ms)": max(lags, default=0.0),
+    }
+    rows.update(mock_stats_rows(responder, elapsed))
+    print_report("OCR asynchrone (OCRPipeline)", rows)
+    return rows["copies/s"]
+
+
+def bench_api(copies: int) -> float:
+    """Soumissions + lancement de la correction via l'API (TestClient)"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.core.security import create_access_token
+    from app.services.llm_mock import get_mock_responder
+
+    responder = get_mock_responder()
+    client = TestClient(app)
+    prof_headers = {"Authorization": f"Bearer {create_access_token('prof', 'professor')}"}
+
+    evaluation = client.post("/api/v1/evaluations/", headers=prof_headers, json={
+        "titre": "Benchmark", "matiere": "Mathematiques", "classe": "3eme"
+    }).json()
+    eval_id = evaluation["id"]
+    client.post(f"/api/v1/evaluations/{eval_id}/open", headers=prof_headers)
+
+    files = sample_copies()
+    with Timer() as submit_timer:
+        for i in range(copies):
+            nom, prenom = f"ETUDIANT{i:04d}", "Bench"
+            token = create_access_token(nom, "student", additional_claims={"nom": nom, "prenom": prenom})
+            with open(files[i % len(files)], "rb") as f:
+                client.post(
+                    "/api/v1/submissions/",
+                    headers={"Authorization": f"Bearer {token}"},
+                    data={"evaluation_id": eval_id, "nom": nom, "prenom": prenom,
+                          "type_soumission": "fichier_scanne"},
+                    files=[("files", ("copie.pdf", f.read(), "application/pdf"))]
+                )
+
+    client.post(f"/api/v1/evaluations/{eval_id}/close", headers=prof_headers)
+
+    responder.reset_stats()
+    with Timer() as correction_timer:
+        response = client.post("/api/v1/corrections/process", headers=prof_headers,
+                               json={"evaluation_id": eval_id, "profile": "equilibre"})
+    statistics = client.get(f"/api/v1/corrections/evaluation/{eval_id}/statistics",
+                            headers=prof_headers).json()
+
+    rows = {
+        "statut lancement": response.status_code,
+        "copies soumises": copies,
+        "temps soumissions (s)": submit_timer.elapsed,
+        "temps correction (s)": correction_timer.elapsed,
+        "copies/s": copies / correction_timer.elapsed if correction_timer.elapsed else 0.0,
+        "copies corrigees": statistics.get("nombre_corriges", 0),
+    }
+    rows.update(mock_stats_rows(responder, correction_timer.elapsed))
+    print_report("API de bout en bout", rows)
+    return rows["copies/s"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["correction", "ocr", "ocr_pipeline", "api", "all"], default="all")
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--min-throughput", type=float, default=0.0,
+                        help="Echec (code 1) si un scenario descend sous ce debit (copies/s)")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    enable_mock_llm_from_args(args)
+    data_dir = tempfile.mkdtemp(prefix="bench_data_")
+    os.environ["DATA_DIR"] = data_dir
+
+    scenarios = {"correction": bench_correction, "ocr": bench_ocr,
+                 "ocr_pipeline": bench_ocr_pipeline, "api": bench_api}
+    selected = list(scenarios) if args.scenario == "all" else [args.scenario]
+
+    failed = []
+    try:
+        for name in selected:
+            throughput = scenarios[name](args.copies)
+            if throughput < args.min_throughput:
+                failed.append(f"{name}: {throughput:.2f} < {args.min_throughput:.2f} copies/s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if failed:
+        print("\nREGRESSION DE DEBIT:\n  " + "\n  ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+benchmarks/bench_ocr_draft.py
+=============================
+Compare l'OCR en une passe (pleine resolution) et l'OCR en deux passes
+(premiere passe economique, reprise en pleine resolution des pages peu
+fiables) sur les copies d'exemple : appels vision, tokens image factures,
+pages reprises et confiance moyenne
+
+Les tokens image sont recalcules a partir des dimensions reelles des images
+envoyees et du niveau de detail de chaque appel.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_ocr_draft --thresholds 0.7 0.85 0.95
+    OPENAI_API_KEY=... python -m benchmarks.bench_ocr_draft --live
+"""
+
+import argparse
+import io
+import os
+import sys
+import threading
+
+from benchmarks.common import (
+    BACKEND_DIR, Timer, add_mock_arguments, enable_mock_llm_from_args,
+    print_report, sample_copies
+)
+
+
+def make_metered_processor(base_class):
+    """OCRProcessor qui compte ses appels vision et les tokens image envoyes"""
+    from PIL import Image
+    from app.config import settings
+    from app.services.ocr_preprocessing import estimate_vision_tokens
+
+    class MeteredOCRProcessor(base_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.calls = 0
+            self.image_tokens = 0
+            self._meter_lock = threading.Lock()
+
+        def _image_part(self, img_bytes, mime_type, detail=None):
+            with Image.open(io.BytesIO(img_bytes)) as img:
+                width, height = img.size
+            with self._meter_lock:
+                self.calls += 1
+                self.image_tokens += estimate_vision_tokens(width, height, detail or settings.OCR_IMAGE_DETAIL)
+            return super()._image_part(img_bytes, mime_type, detail)
+
+    return MeteredOCRProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.85, 0.95],
+                        help="Confiances minimales de la premiere passe a comparer")
+    parser.add_argument("--live", action="store_true", help="Utilise l'API reelle au lieu du LLM simule")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    if args.live:
+        if str(BACKEND_DIR) not in sys.path:
+            sys.path.insert(0, str(BACKEND_DIR))
+    else:
+        enable_mock_llm_from_args(args)
+    os.environ["OCR_CACHE_ENABLED"] = "False"
+
+    from app.config import settings
+    from app.services.ai_ocr_service import OCRProcessor
+
+    files = sample_copies()
+    if not files:
+        print("Aucune copie d'exemple trouvee", file=sys.stderr)
+        sys.exit(1)
+
+    processor_class = make_metered_processor(OCRProcessor)
+    runs = [("une passe", None)] + [(f"deux passes (seuil {t})", t) for t in args.thresholds]
+
+    for label, threshold in runs:
+        processor = processor_class(draft_pass=threshold is not None)
+        if threshold is not None:
+            processor.draft_min_confidence = threshold
+
+        with Timer() as timer:
+            results = [processor.transcribe_file(str(f), "mathematiques", detailed=False) for f in files]
+
+        pages = [page for result in results for page in result.get("pages", [])]
+        page_count = max(1, len(pages))
+        print_report(f"OCR {label}", {
+            "pages": len(pages),
+            "pages acceptees en premiere passe": sum(r.get("draft_pages", 0) for r in results),
+            "pages reprises en pleine resolution": sum(r.get("retried_pages", 0) for r in results),
+            "appels vision": processor.calls,
+            "tokens image": processor.image_tokens,
+            "tokens image par page": processor.image_tokens / page_count,
+            "confiance moyenne": sum(p.get("confidence", 0) for p in pages) / page_count,
+            "temps total (s)": timer.elapsed,
+        })
+
+    print(f"\nPremiere passe : petit cote {settings.OCR_DRAFT_SHORT_SIDE} px, detail {settings.OCR_DRAFT_DETAIL}.")
+    if not args.live:
+        print("Note : la confiance du LLM simule ne depend pas de la resolution ; "
+              "utiliser --live pour mesurer le taux de reprise reel.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+benchmarks/bench_ocr_preprocessing.py
+=====================================
+Compare, page par page, le rendu historique (zoom 2x, PNG) et le rendu
+pretraite (niveaux de gris, redressement, rognage, JPEG/WebP) : octets
+envoyes, tokens vision estimes et, avec --live, accord des transcriptions
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_ocr_preprocessing
+    python -m benchmarks.bench_ocr_preprocessing --format webp --quality 70
+    OPENAI_API_KEY=... python -m benchmarks.bench_ocr_preprocessing --live
+"""
+
+import argparse
+import base64
+import difflib
+import sys
+
+from benchmarks.common import BACKEND_DIR, Timer, print_report, sample_copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["jpeg", "webp", "png"], default=None)
+    parser.add_argument("--quality", type=int, default=None)
+    parser.add_argument("--short-side", type=int, default=None)
+    parser.add_argument("--live", action="store_true",
+                        help="Transcrit les deux variantes avec l'API reelle et mesure leur accord")
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import fitz
+    from app.services.ocr_preprocessing import ImagePreprocessor, estimate_vision_tokens
+
+    preprocessor = ImagePreprocessor(
+        target_short_side=args.short_side, image_format=args.format, quality=args.quality
+    )
+    processor = None
+    if args.live:
+        from app.services.ai_ocr_service import OCRProcessor
+        processor = OCRProcessor(preprocessor=preprocessor)
+
+    totals = {"pages": 0, "bytes_before": 0, "bytes_after": 0, "tokens_before": 0,
+              "tokens_after": 0, "time_before": 0.0, "time_after": 0.0}
+    agreements = []
+
+    print(f"{'page':48} {'octets avant':>13} {'octets apres':>13} {'tokens':>13} {'accord':>7}")
+    for copy_file in sample_copies():
+        doc = fitz.open(str(copy_file))
+        for page in doc:
+            with Timer() as before_timer:
+                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                before_bytes = pix.tobytes("png")
+            before_tokens = estimate_vision_tokens(pix.width, pix.height)
+
+            with Timer() as after_timer:
+                after = preprocessor.render_page(page)
+
+            agreement = ""
+            if processor:
+                before_text = processor._transcribe_image_bytes(before_bytes, "general", False)["transcribed_text"]
+                after_text = processor._transcribe_image_bytes(
+                    after["image_bytes"], "general", False, after["mime_type"]
+                )["transcribed_text"]
+                ratio = difflib.SequenceMatcher(None, before_text, after_text).ratio()
+                agreements.append(ratio)
+                agreement = f"{ratio:.2f}"
+
+            totals["pages"] += 1
+            totals["bytes_before"] += len(base64.b64encode(before_bytes))
+            totals["bytes_after"] += len(base64.b64encode(after["image_bytes"]))
+            totals["tokens_before"] += before_tokens
+            totals["tokens_after"] += after["estimated_tokens"]
+            totals["time_before"] += before_timer.elapsed
+            totals["time_after"] += after_timer.elapsed
+
+            label = f"{copy_file.parent.parent.name[:30]}/{copy_file.stem}#{page.number + 1}"
+            print(f"{label[:48]:48} {len(before_bytes):>13,} {after['bytes']:>13,} "
+                  f"{before_tokens:>5} -> {after['estimated_tokens']:<5} {agreement:>7}")
+        doc.close()
+
+    pages = totals["pages"] or 1
+    rows = {
+        "pages": totals["pages"],
+        "octets base64/page avant": totals["bytes_before"] / pages,
+        "octets base64/page apres": totals["bytes_after"] / pages,
+        "reduction octets (%)": 100 * (1 - totals["bytes_after"] / max(1, totals["bytes_before"])),
+        "tokens/page avant": totals["tokens_before"] / pages,
+        "tokens/page apres": totals["tokens_after"] / pages,
+        "rendu ms/page avant": 1000 * totals["time_before"] / pages,
+        "rendu ms/page apres": 1000 * totals["time_after"] / pages,
+        "accord moyen": (sum(agreements) / len(agreements)) if agreements else "n/a (utiliser --live)",
+    }
+    print_report("Pretraitement des images OCR", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+benchmarks/bench_ocr_tiling.py
+==============================
+Compare l'OCR page par page et l'OCR groupe (plusieurs pages peu denses par
+requete vision) sur un PDF assemble a partir des copies d'exemple : nombre
+d'allers-retours, latence, tokens et accord des transcriptions par page
+
+Les copies d'exemple sont des pages pleines ; --max-ink-density 1.0 (defaut
+du benchmark) force le regroupement de toutes les pages. La colonne
+"pages regroupables" indique combien le seraient avec le seuil configure.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_ocr_tiling --group-sizes 1 2 4
+    OPENAI_API_KEY=... python -m benchmarks.bench_ocr_tiling --live
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import threading
+
+from benchmarks.common import (
+    BACKEND_DIR, Timer, add_mock_arguments, enable_mock_llm_from_args,
+    print_report, sample_copies
+)
+
+
+def build_sample_pdf(copies: int) -> bytes:
+    """Assemble les copies d'exemple en un seul PDF de `copies` pages"""
+    import fitz
+
+    files = sample_copies()
+    output = fitz.open()
+    for i in range(copies):
+        source = fitz.open(str(files[i % len(files)]))
+        if source.is_pdf:
+            output.insert_pdf(source, from_page=0, to_page=0)
+        else:
+            # Image deguisee en PDF : reconvertie en page PDF
+            output.insert_pdf(fitz.open("pdf", source.convert_to_pdf()), from_page=0, to_page=0)
+        source.close()
+    data = output.tobytes()
+    output.close()
+    return data
+
+
+def make_counting_processor(base_class):
+    """OCRProcessor qui compte ses allers-retours vision"""
+
+    class CountingOCRProcessor(base_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.round_trips = 0
+            self._counter_lock = threading.Lock()
+
+        def _request_transcription(self, content):
+            with self._counter_lock:
+                self.round_trips += 1
+            return super()._request_transcription(content)
+
+    return CountingOCRProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=12, help="Nombre de pages du PDF assemble")
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-ink-density", type=float, default=1.0)
+    parser.add_argument("--live", action="store_true", help="Utilise l'API reelle au lieu du LLM simule")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    if args.live:
+        if str(BACKEND_DIR) not in sys.path:
+            sys.path.insert(0, str(BACKEND_DIR))
+    else:
+        enable_mock_llm_from_args(args)
+    os.environ["OCR_CACHE_ENABLED"] = "False"
+
+    import fitz
+    from app.config import settings
+    from app.services.ai_ocr_service import OCRProcessor
+    from app.services.ocr_preprocessing import ImagePreprocessor
+
+    if not sample_copies():
+        print("Aucune copie d'exemple trouvee", file=sys.stderr)
+        sys.exit(1)
+
+    pdf_bytes = build_sample_pdf(args.pages)
+    preprocessor = ImagePreprocessor()
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    densities = [preprocessor.render_page(page)["ink_density"] for page in doc]
+    doc.close()
+
+    processor_class = make_counting_processor(OCRProcessor)
+    reference = None
+
+    for group_size in args.group_sizes:
+        if not args.live:
+            from app.services.llm_mock import get_mock_responder
+            get_mock_responder().reset_stats()
+        processor = processor_class(
+            preprocessor=preprocessor,
+            tiling_max_pages=group_size,
+            tiling_max_ink_density=args.max_ink_density
+        )
+        with Timer() as timer:
+            result = processor.transcribe_bytes(pdf_bytes, "copie.pdf", "mathematiques", detailed=False)
+
+        texts = [page["text"] for page in result.get("pages", [])]
+        if reference is None:
+            reference = texts
+        agreements = [
+            difflib.SequenceMatcher(None, before, after).ratio()
+            for before, after in zip(reference, texts)
+        ]
+
+        rows = {
+            "pages": result.get("page_count", 0),
+            "pages regroupees": result.get("tiled_pages", 0),
+            f"pages regroupables (seuil {settings.OCR_TILING_MAX_INK_DENSITY})": sum(
+                1 for d in densities if d <= settings.OCR_TILING_MAX_INK_DENSITY
+            ),
+            "densite d'encre moyenne": sum(densities) / len(densities),
+            "allers-retours vision": processor.round_trips,
+            "temps total (s)": timer.elapsed,
+            "latence par page (ms)": 1000 * timer.elapsed / max(1, result.get("page_count", 0)),
+            "confiance moyenne": result.get("confidence", 0.0),
+            "pages en erreur": sum(1 for t in texts if t.startswith("[ERREUR")),
+            "accord avec 1 page/requete": (sum(agreements) / len(agreements)) if agreements else 0.0,
+        }
+        if not args.live:
+            stats = get_mock_responder().stats
+            rows["tokens prompt"] = stats["prompt_tokens"]
+            rows["tokens completion"] = stats["completion_tokens"]
+        print_report(f"OCR groupe : {group_size} page(s) par requete", rows)
+
+    if not args.live:
+        print("\nNote : avec le LLM simule, l'accord mesure seulement la coherence du "
+              "decoupage ; utiliser --live pour mesurer l'impact reel sur la qualite.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+benchmarks/bench_reports.py
+===========================
+Debit de generation des rapports PDF etudiants sur un coeur (rapports/s)
+
+Compare un template reconstruit a chaque rapport (styles, styles de tableaux
+et paragraphes fixes recrees, flux en ASCII85 : comportement d'origine) et
+le template partage par le processus avec les flux binaires. Les resultats
+sont tires des evaluations d'exemple et dupliques jusqu'a la taille de
+classe demandee. Le debit depend fortement de l'extension C rl_accel
+(encodage des nombres et des flux) : son etat est affiche.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_reports --students 300
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.common import BACKEND_DIR, SAMPLE_EVALUATIONS_PATH, Timer, print_report
+
+
+def load_sample_class(students: int):
+    """(resultats, infos de l'evaluation) d'une classe de `students` etudiants"""
+    result_files = sorted(SAMPLE_EVALUATIONS_PATH.glob("*/resultats/*/correction_detaillee.json"))
+    if not result_files:
+        return [], {}
+
+    with open(result_files[0].parent.parent.parent / "infos_evaluation.json", "r", encoding="utf-8") as f:
+        eval_info = json.load(f)
+
+    samples = []
+    for path in result_files:
+        with open(path, "r", encoding="utf-8") as f:
+            samples.append(json.load(f))
+
+    results = []
+    for i in range(students):
+        result = dict(samples[i % len(samples)])
+        result["etudiant_nom"] = f"{result.get('etudiant_nom', 'Etudiant')}{i}"
+        results.append(result)
+    return results, eval_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=300)
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from reportlab import rl_config
+    from reportlab.lib import rl_accel
+    from app.services.pdf_report_service import ReportTemplate, StudentReportGenerator
+
+    results, eval_info = load_sample_class(args.students)
+    if not results:
+        print("Aucun resultat d'exemple trouve", file=sys.stderr)
+        sys.exit(1)
+
+    use_a85 = rl_config.useA85
+    runs = [
+        ("template reconstruit a chaque rapport", lambda: StudentReportGenerator(ReportTemplate()), 1),
+        ("template partage par le processus", StudentReportGenerator, 0),
+    ]
+
+    # Echauffement (imports reportlab, polices)
+    StudentReportGenerator().generate_student_report(results[0], eval_info, {})
+
+    reference = None
+    for label, make_generator, a85 in runs:
+        rl_config.useA85 = a85
+        total_bytes = 0
+        with Timer() as timer:
+            for result in results:
+                student = {"nom": result.get("etudiant_nom", ""), "prenom": result.get("etudiant_prenom", "")}
+                total_bytes += len(make_generator().generate_student_report(result, eval_info, student))
+
+        rate = len(results) / timer.elapsed
+        reference = reference or rate
+        print_report(f"Rapports PDF : {label}", {
+            "rapports": len(results),
+            "temps total (s)": timer.elapsed,
+            "rapports/s (1 coeur)": rate,
+            "ms par rapport": 1000 * timer.elapsed / len(results),
+            "acceleration": rate / reference,
+            "taille moyenne (Ko)": total_bytes / len(results) / 1024,
+        })
+
+    rl_config.useA85 = use_a85
+    accelerated = rl_accel.fp_str.__module__ == "_rl_accel"
+    print(f"\nExtension C rl_accel : {'active' if accelerated else 'absente (pip install rl_accel)'}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+benchmarks/bench_snapshot.py
+============================
+Lecture des resultats d'une evaluation : relecture de tous les
+correction_detaillee.json compare a l'instantane en colonnes
+(results_snapshot) - construction complete, mise a jour apres la
+modification d'un resultat, lecture mmap et extraction des notes
+
+Les resultats d'exemple sont dupliques jusqu'au nombre demande et ecrits
+dans un dossier temporaire.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_snapshot --results 10000
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_reports import load_sample_class
+from benchmarks.common import BACKEND_DIR, Timer, print_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.results_snapshot import load_snapshot, refresh_snapshot, snapshot_scores
+    from app.services.statistics_service import extract_scores
+
+    results, eval_info = load_sample_class(args.results)
+    if not results:
+        print("Aucun resultat d'exemple trouve", file=sys.stderr)
+        sys.exit(1)
+    note_max = float(eval_info.get("note_totale") or 20)
+
+    eval_dir = Path(tempfile.mkdtemp(prefix="bench_snapshot_"))
+    try:
+        result_files = []
+        for i, result in enumerate(results):
+            student_dir = eval_dir / "resultats" / f"Etudiant_{i:06d}"
+            student_dir.mkdir(parents=True)
+            result_files.append(student_dir / "correction_detaillee.json")
+            with open(result_files[-1], "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+
+        with Timer() as json_timer:
+            for _ in range(args.repeat):
+                loaded = []
+                for path in result_files:
+                    with open(path, "r", encoding="utf-8") as f:
+                        loaded.append(json.load(f))
+                extract_scores(loaded, note_max)
+
+        with Timer() as build_timer:
+            refresh_snapshot(eval_dir)
+
+        with Timer() as update_timer:
+            for i in range(args.repeat):
+                with open(result_files[i], "w", encoding="utf-8") as f:
+                    json.dump({**results[i], "note_totale": i}, f, ensure_ascii=False, indent=2)
+                refresh_snapshot(eval_dir)
+
+        with Timer() as read_timer:
+            for _ in range(args.repeat):
+                scores = snapshot_scores(load_snapshot(eval_dir), note_max)
+
+        size = sum(path.stat().st_size for path in (eval_dir / "instantane").rglob("*.npy"))
+        print_report("Instantane en colonnes des resultats", {
+            "resultats": len(results),
+            "questions": len(scores["questions"]),
+            "taille de l'instantane (Ko)": size / 1024,
+            "lecture JSON + extraction (ms)": 1000 * json_timer.elapsed / args.repeat,
+            "construction de l'instantane (ms)": 1000 * build_timer.elapsed,
+            "mise a jour, 1 resultat modifie (ms)": 1000 * update_timer.elapsed / args.repeat,
+            "lecture mmap + extraction (ms)": 1000 * read_timer.elapsed / args.repeat,
+        })
+    finally:
+        shutil.rmtree(eval_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
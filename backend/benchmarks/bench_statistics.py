@@ -0,0 +1,101 @@
+"""
+benchmarks/bench_statistics.py
+==============================
+Temps de calcul des statistiques de classe (endpoint /statistics), de
+l'analyse des items et du classement : lecture des JSON de resultats, extraction des notes et
+indicateurs NumPy, compares aux statistiques courantes (mise a jour d'un
+resultat et lecture du resume, sans relire les copies)
+
+Les resultats d'exemple sont dupliques jusqu'au nombre demande, avec des
+notes par question et par critere tirees au hasard (graine fixe).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_statistics --results 10000
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from benchmarks.bench_reports import load_sample_class
+from benchmarks.common import BACKEND_DIR, Timer, print_report
+
+CRITERES = ("comprehension", "methode", "redaction")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.item_analysis_service import compute_item_analysis
+    from app.services.ranking_service import compute_ranks
+    from app.services.running_statistics import RunningStatistics
+    from app.services.statistics_service import compute_class_statistics, extract_scores
+
+    results, eval_info = load_sample_class(args.results)
+    if not results:
+        print("Aucun resultat d'exemple trouve", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(42)
+    for result in results:
+        result["questions"] = [
+            {**q, "note": round(rng.uniform(0, q.get("note_max", 10)), 1)} for q in result.get("questions", [])
+        ]
+        result["note_totale"] = round(sum(q["note"] for q in result["questions"]), 1)
+        result["notes_par_critere"] = {c: round(rng.uniform(0, 20), 1) for c in CRITERES}
+    note_max = float(eval_info.get("note_totale") or 20)
+
+    # Lecture des correction_detaillee.json (en memoire, sans acces disque)
+    documents = [json.dumps(result, ensure_ascii=False) for result in results]
+    with Timer() as parse_timer:
+        results = [json.loads(document) for document in documents]
+
+    with Timer() as extract_timer:
+        for _ in range(args.repeat):
+            scores = extract_scores(results, note_max)
+    with Timer() as stats_timer:
+        for _ in range(args.repeat):
+            stats = compute_class_statistics(results, "bench", note_max)
+    with Timer() as items_timer:
+        for _ in range(args.repeat):
+            compute_item_analysis(scores)
+
+    with Timer() as ranks_timer:
+        for _ in range(args.repeat):
+            compute_ranks(scores["notes"])
+
+    running = RunningStatistics(note_max)
+    for result in results:
+        running.add(result)
+    with Timer() as update_timer:
+        for _ in range(args.repeat):
+            running.add(results[0], -1)
+            running.add(results[0])
+    with Timer() as summary_timer:
+        for _ in range(args.repeat):
+            running.summary("bench")
+
+    print_report("Statistiques de classe", {
+        "resultats": len(results),
+        "questions": len(stats["questions"]),
+        "criteres": len(stats["criteres"]),
+        "lecture JSON (ms)": 1000 * parse_timer.elapsed,
+        "extraction des notes (ms)": 1000 * extract_timer.elapsed / args.repeat,
+        "statistiques completes (ms)": 1000 * stats_timer.elapsed / args.repeat,
+        "analyse des items, hors extraction (ms)": 1000 * items_timer.elapsed / args.repeat,
+        "classement, rangs et centiles (ms)": 1000 * ranks_timer.elapsed / args.repeat,
+        "statistiques courantes, mise a jour (ms)": 1000 * update_timer.elapsed / args.repeat,
+        "statistiques courantes, resume (ms)": 1000 * summary_timer.elapsed / args.repeat,
+        "moyenne": stats["moyenne_generale"],
+        "mediane": stats["mediane"],
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+benchmarks/common.py
+====================
+Utilitaires partages par les benchmarks
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = BACKEND_DIR.parent
+SAMPLE_EVALUATIONS_PATH = REPO_DIR / "evaluations"
+
+
+def enable_mock_llm(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    distribution: str = "constant",
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: int = 42,
+    ms_per_token: float = 0.0
+):
+    """
+    Active le LLM simule via l'environnement
+
+    Doit etre appele avant le premier import de app.config.
+    """
+    os.environ["LLM_MOCK"] = "True"
+    os.environ["LLM_MOCK_SEED"] = str(seed)
+    os.environ["LLM_MOCK_LATENCY_DISTRIBUTION"] = distribution
+    os.environ["LLM_MOCK_LATENCY_MS"] = str(latency_ms)
+    os.environ["LLM_MOCK_LATENCY_JITTER_MS"] = str(jitter_ms)
+    os.environ["LLM_MOCK_ERROR_RATE"] = str(error_rate)
+    os.environ["LLM_MOCK_RATE_LIMIT_RATE"] = str(rate_limit_rate)
+    os.environ["LLM_MOCK_MS_PER_COMPLETION_TOKEN"] = str(ms_per_token)
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+
+def add_mock_arguments(parser):
+    """Options communes de configuration du LLM simule"""
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=["constant", "uniform", "normal", "lognormal"])
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ms-per-token", type=float, default=0.0,
+                        help="Latence ajoutee par token genere (reponses longues plus lentes)")
+
+
+def enable_mock_llm_from_args(args):
+    """Active le LLM simule depuis les options argparse"""
+    enable_mock_llm(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+        ms_per_token=args.ms_per_token
+    )
+
+
+def sample_copies() -> List[Path]:
+    """Copies PDF d'exemple du depot (evaluations/*/copies_soumises)"""
+    return sorted(SAMPLE_EVALUATIONS_PATH.glob("*/copies_soumises/*.pdf"))
+
+
+def sample_bareme() -> Dict:
+    """Bareme d'exemple (premiere evaluation qui en possede un)"""
+    for bareme_file in sorted(SAMPLE_EVALUATIONS_PATH.glob("*/bareme_evaluation.json")):
+        with open(bareme_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {
+        "note_totale": 20,
+        "questions": [{"numero": 1, "intitule": "Question", "points_total": 20, "type": "ouverte"}]
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile par interpolation lineaire (q entre 0 et 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Timer:
+    """Chronometre utilisable en context manager"""
+
+    def __init__(self):
+        self.start = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
+
+
+def print_report(title: str, rows: Dict, stream=None):
+    """Affiche un bloc de resultats aligne"""
+    stream = stream or sys.stdout
+    print(f"\n=== {title} ===", file=stream)
+    width = max((len(str(k)) for k in rows), default=0)
+    for key, value in rows.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        print(f"  {str(key).ljust(width)} : {value}", file=stream)
+
+
+def mock_stats_rows(responder, elapsed: Optional[float] = None) -> Dict:
+    """Resume des statistiques du LLM simule"""
+    stats = responder.stats
+    latencies = stats["latencies_ms"]
+    rows = {
+        "requetes": stats["requests"],
+        "requetes vision": stats["vision_requests"],
+        "images envoyees": stats["images"],
+        "erreurs 5xx": stats["errors"],
+        "429": stats["rate_limited"],
+        "octets envoyes": stats["request_bytes"],
+        "tokens prompt": stats["prompt_tokens"],
+        "tokens completion": stats["completion_tokens"],
+        "latence p50 (ms)": percentile(latencies, 50),
+        "latence p95 (ms)": percentile(latencies, 95),
+    }
+    if elapsed:
+        rows["requetes/s"] = stats["requests"] / elapsed
+    return rows
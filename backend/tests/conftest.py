@@ -0,0 +1,39 @@
+"""
+Configuration commune des tests : LLM simule, donnees dans un dossier
+temporaire, cache OCR desactive (doit preceder tout import de app.config)
+"""
+import os
+import tempfile
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="tests_data_")
+os.environ["LLM_MOCK"] = "True"
+os.environ["OCR_CACHE_ENABLED"] = "False"
+os.environ["CORRECTION_LAZY_FEEDBACK"] = "False"
+
+import pytest  # noqa: E402
+
+from app.services.llm_mock import MockLLMResponder  # noqa: E402
+
+
+class ScriptedResponder(MockLLMResponder):
+    """Responder simule qui renvoie d'abord les statuts d'erreur demandes (429, 500)"""
+
+    def __init__(self, failures=(), **kwargs):
+        super().__init__(**kwargs)
+        self.failures = list(failures)
+
+    def respond(self, payload, request_bytes=0):
+        if self.failures:
+            status_code = self.failures.pop(0)
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["rate_limited" if status_code == 429 else "errors"] += 1
+            code = "rate_limit_exceeded" if status_code == 429 else "server_error"
+            # retry-after-ms : nouvel essai immediat du client OpenAI
+            return status_code, self._error_body("Scripted failure", code), {"retry-after-ms": "1"}, 0.0
+        return super().respond(payload, request_bytes)
+
+
+@pytest.fixture
+def scripted_responder():
+    return ScriptedResponder
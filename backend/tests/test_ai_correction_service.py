@@ -0,0 +1,93 @@
+"""
+Correction IA de bout en bout avec le LLM simule (aucune cle API)
+"""
+import pytest
+
+from app.services.ai_correction_service import AICorrectionEngine
+from app.services.llm_mock import MockLLMResponder, create_mock_openai_client
+
+EVALUATION = {
+    "titre": "Controle equations",
+    "matiere": "Mathematiques",
+    "bareme": {
+        "note_totale": 20,
+        "questions": [
+            {"numero": 1, "intitule": "Resoudre 2x + 5 = 13", "points_total": 8},
+            {"numero": 2, "intitule": "Calculer f(3)", "points_total": 12},
+        ],
+    },
+}
+
+COPIES = [
+    {"etudiant_nom": "DUPONT", "etudiant_prenom": "Marie", "transcription": "Question 1 : x = 4"},
+    {"etudiant_nom": "MARTIN", "etudiant_prenom": "Paul", "transcription": "Question 2 : f(3) = 4"},
+]
+
+
+def _engine(responder, max_retries=2):
+    return AICorrectionEngine(client=create_mock_openai_client(responder, max_retries=max_retries))
+
+
+def test_scores_are_parsed_from_the_response():
+    results = _engine(MockLLMResponder(seed=7)).process_evaluation_copies(EVALUATION, COPIES, lazy_feedback=False)
+
+    assert [r["etudiant_nom"] for r in results] == ["DUPONT", "MARTIN"]
+    for result in results:
+        assert not result.get("necessite_revision_humaine")
+        assert result["note_maximale"] == 20
+        assert [q["note_max"] for q in result["questions"]] == [8, 12]
+        notes = [q["note"] for q in result["questions"]]
+        assert all(0 <= q["note"] <= q["note_max"] for q in result["questions"])
+        # NOTE_FINALE du LLM simule : somme des notes par question
+        assert result["note_totale"] == pytest.approx(round(sum(notes), 1))
+        assert result["pourcentage"] == pytest.approx(round(100 * result["note_totale"] / 20, 1))
+        assert all(q["commentaire_intelligent"] for q in result["questions"])
+        assert result["points_forts"]
+
+
+def test_responses_are_deterministic():
+    first = _engine(MockLLMResponder(seed=3)).process_evaluation_copies(EVALUATION, COPIES, lazy_feedback=False)
+    second = _engine(MockLLMResponder(seed=3)).process_evaluation_copies(EVALUATION, COPIES, lazy_feedback=False)
+    assert [r["questions"] for r in first] == [r["questions"] for r in second]
+
+
+def test_lazy_feedback_grades_without_comments():
+    result = _engine(MockLLMResponder(seed=7)).correct_single_copy(
+        "Question 1 : x = 4", EVALUATION, "DUPONT", "Marie", lazy_feedback=True
+    )
+    assert result["feedback_statut"] == "en_attente"
+    assert not any(q["commentaire_intelligent"] for q in result["questions"])
+
+
+@pytest.mark.parametrize("failures", [[429], [500], [429, 500]])
+def test_transient_errors_are_retried(scripted_responder, failures):
+    responder = scripted_responder(failures, seed=7)
+    result = _engine(responder).correct_single_copy("Question 1 : x = 4", EVALUATION, "DUPONT", "Marie", lazy_feedback=False)
+
+    assert responder.stats["requests"] == len(failures) + 1
+    assert responder.stats["chat_requests"] == 1
+    assert result["questions"][0]["commentaire_intelligent"]
+    assert result["note_totale"] == pytest.approx(round(sum(q["note"] for q in result["questions"]), 1))
+
+
+def test_exhausted_retries_give_a_zero_score(scripted_responder):
+    responder = scripted_responder([429, 429, 429], seed=7)
+    result = _engine(responder, max_retries=2).correct_single_copy(
+        "Question 1 : x = 4", EVALUATION, "DUPONT", "Marie", lazy_feedback=False
+    )
+
+    assert responder.stats["requests"] == 3
+    assert result["note_totale"] == 0.0
+    assert result["commentaires_generaux"].startswith("Erreur correction IA")
+
+
+def test_configured_error_rates_are_counted():
+    responder = MockLLMResponder(seed=1, error_rate=0.3, rate_limit_rate=0.3)
+    engine = _engine(responder, max_retries=0)
+    copies = [dict(COPIES[0], etudiant_nom=f"E{i}") for i in range(20)]
+    engine.process_evaluation_copies(EVALUATION, copies, lazy_feedback=True)
+
+    stats = responder.stats
+    assert stats["requests"] == 20
+    assert stats["errors"] > 0 and stats["rate_limited"] > 0
+    assert stats["errors"] + stats["rate_limited"] + stats["chat_requests"] == 20
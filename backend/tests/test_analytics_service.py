@@ -0,0 +1,40 @@
+"""
+Agregats multi-evaluations : enregistrements simultanes hors de la boucle d'evenements
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services import analytics_service
+from app.services.analytics_service import AGGREGATES_FILENAME, AnalyticsStore
+
+EVALUATION = {"classe": "3A", "matiere": "Mathematiques", "date_examen": "2024-10-07", "note_totale": 20}
+
+
+def test_concurrent_saves_are_written_together(tmp_path, monkeypatch):
+    store = AnalyticsStore(root=tmp_path / "analytics", evaluations_path=tmp_path / "evaluations")
+    writes = []
+    write_atomic = analytics_service.write_atomic
+    monkeypatch.setattr(analytics_service, "write_atomic", lambda path, data: (writes.append(path), write_atomic(path, data)))
+
+    async def save_all():
+        await asyncio.gather(*(
+            store.record_results_async("eval", EVALUATION, [{"etudiant_nom": f"E{i}", "note_totale": i, "note_maximale": 20}])
+            for i in range(20)
+        ))
+
+    asyncio.run(save_all())
+
+    assert 1 <= len(writes) <= 20
+    saved = json.loads((tmp_path / "analytics" / AGGREGATES_FILENAME).read_text(encoding="utf-8"))
+    assert saved["evaluations"]["eval"]["copies"] == 20
+    assert saved["evaluations"]["eval"]["somme"] == sum(range(20))
+
+
+def test_shared_store_is_created_once(monkeypatch):
+    monkeypatch.setattr(analytics_service, "_analytics_store", None)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        stores = list(executor.map(lambda _: analytics_service.get_analytics_store(), range(32)))
+
+    assert all(store is stores[0] for store in stores)
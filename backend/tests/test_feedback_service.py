@@ -0,0 +1,67 @@
+"""
+Commentaires differes : enregistrement apres une reecriture concurrente, reponses de l'API
+"""
+import json
+
+from app.services import feedback_service
+from app.services.ai_correction_service import AICorrectionEngine
+from app.services.llm_mock import MockLLMResponder, create_mock_openai_client
+
+EVALUATION = {
+    "matiere": "Mathematiques",
+    "bareme": {"note_totale": 20, "questions": [{"numero": 1, "intitule": "Resoudre 2x + 5 = 13", "points_total": 20}]},
+}
+
+
+def _pending_result(tmp_path):
+    engine = AICorrectionEngine(client=create_mock_openai_client(MockLLMResponder(seed=7)))
+    result = engine.correct_single_copy("Question 1 : x = 4", EVALUATION, "DUPONT", "Marie", lazy_feedback=True)
+    result_file = tmp_path / "correction_detaillee.json"
+    result_file.write_text(json.dumps(result), encoding="utf-8")
+    return result_file
+
+
+def _rewrite_during_generation(monkeypatch, result_file, **changes):
+    generate_feedback = AICorrectionEngine.generate_feedback
+
+    def generate_then_rewrite(self, result, evaluation_info):
+        completed = generate_feedback(self, result, evaluation_info)
+        saved = json.loads(result_file.read_text(encoding="utf-8"))
+        result_file.write_text(json.dumps({**saved, **changes}), encoding="utf-8")
+        return completed
+
+    monkeypatch.setattr(AICorrectionEngine, "generate_feedback", generate_then_rewrite)
+
+
+def test_feedback_is_merged_into_a_result_rewritten_meanwhile(tmp_path, monkeypatch):
+    result_file = _pending_result(tmp_path)
+    _rewrite_during_generation(monkeypatch, result_file, rang=3, rang_classe=3)
+
+    completed = feedback_service.complete_feedback(result_file, EVALUATION)
+
+    saved = json.loads(result_file.read_text(encoding="utf-8"))
+    assert saved == completed
+    assert saved["feedback_statut"] == "genere"
+    assert saved["rang"] == 3
+    assert all(q["commentaire_intelligent"] for q in saved["questions"])
+    assert "transcription_copie" not in saved
+
+
+def test_regraded_result_is_kept(tmp_path, monkeypatch):
+    result_file = _pending_result(tmp_path)
+    _rewrite_during_generation(monkeypatch, result_file, note_totale=19.5)
+
+    completed = feedback_service.complete_feedback(result_file, EVALUATION)
+
+    assert completed["note_totale"] == 19.5
+    assert completed["feedback_statut"] == "en_attente"
+    assert json.loads(result_file.read_text(encoding="utf-8")) == completed
+
+
+def test_api_results_omit_the_transcription(tmp_path):
+    result = json.loads(_pending_result(tmp_path).read_text(encoding="utf-8"))
+
+    assert result["transcription_copie"]
+    public = feedback_service.public_result(result)
+    assert "transcription_copie" not in public
+    assert public["note_totale"] == result["note_totale"]
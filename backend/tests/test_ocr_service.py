@@ -0,0 +1,208 @@
+"""
+OCR vision de bout en bout avec le LLM simule (aucune cle API)
+"""
+import asyncio
+import io
+
+import fitz
+import pytest
+
+from app.services.ai_ocr_service import OCRProcessor
+from app.services.llm_mock import MockLLMResponder, create_mock_openai_client
+from app.config import settings
+from app.services.ocr_cache import OCRTranscriptionCache
+from app.services.ocr_engines import OCREngine
+from app.services.transcription_store import load_transcription, save_transcription
+
+
+def _handwritten_pdf(pages: int = 2) -> bytes:
+    """PDF de pages manuscrites simulees (traits, sans couche texte)"""
+    document = fitz.open()
+    for index in range(pages):
+        page = document.new_page(width=595, height=842)
+        for line in range(12 + index):
+            y = 80 + 40 * line
+            page.draw_line((60, y), (520 - 13 * line, y + 6), width=1.5)
+            page.draw_circle((80 + 30 * line, y + 15), 6)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def _processor(responder, tmp_path, max_retries=2, **options):
+    return OCRProcessor(
+        client=create_mock_openai_client(responder, max_retries=max_retries),
+        cache=OCRTranscriptionCache(tmp_path / "cache"),
+        tiling_max_pages=1,
+        engine_mode="vision",
+        draft_pass=False,
+        **options
+    )
+
+
+def test_pdf_pages_are_transcribed(tmp_path):
+    responder = MockLLMResponder(seed=5)
+    result = _processor(responder, tmp_path).transcribe_bytes(_handwritten_pdf(3), "copie.pdf", "mathematiques")
+
+    assert result["page_count"] == 3
+    assert [page["page"] for page in result["pages"]] == [1, 2, 3]
+    assert all(page["source"] == "vision" and page["text"] for page in result["pages"])
+    assert result["word_count"] > 0
+    assert 0.5 <= result["confidence"] <= 1.0
+    assert responder.stats["vision_requests"] == 3
+
+
+def test_cached_pages_are_not_sent_again(tmp_path):
+    responder = MockLLMResponder(seed=5)
+    processor = _processor(responder, tmp_path)
+    pdf = _handwritten_pdf(2)
+
+    first = processor.transcribe_bytes(pdf, "copie.pdf")
+    second = processor.transcribe_bytes(pdf, "copie.pdf")
+
+    assert responder.stats["vision_requests"] == 2
+    assert second["cache_hits"] == 2
+    assert second["transcribed_text"] == first["transcribed_text"]
+
+
+@pytest.mark.parametrize("failures", [[429], [500], [500, 429]])
+def test_transient_errors_are_retried(scripted_responder, tmp_path, failures):
+    responder = scripted_responder(failures, seed=5)
+    result = _processor(responder, tmp_path, max_concurrent_pages=1).transcribe_bytes(_handwritten_pdf(1), "copie.pdf")
+
+    assert responder.stats["requests"] == len(failures) + 1
+    assert "[ERREUR" not in result["transcribed_text"]
+    assert result["pages"][0]["confidence"] > 0
+
+
+def test_exhausted_retries_mark_the_page_as_failed(scripted_responder, tmp_path):
+    responder = scripted_responder([500, 500, 500], seed=5)
+    result = _processor(responder, tmp_path, max_retries=2, max_concurrent_pages=1).transcribe_bytes(
+        _handwritten_pdf(1), "copie.pdf"
+    )
+
+    assert responder.stats["requests"] == 3
+    assert result["pages"][0]["text"].startswith("[ERREUR")
+    assert result["pages"][0]["confidence"] == 0
+    assert result["failed_pages"] == 1
+    assert result["error"].startswith("page 1:")
+
+
+def test_incomplete_transcriptions_are_not_reused(tmp_path):
+    copy_file = tmp_path / "copies_soumises" / "Dupont_Jean.pdf"
+    copy_file.parent.mkdir()
+    copy_file.write_bytes(_handwritten_pdf(1))
+    failed_page = {"page": 2, "text": "[ERREUR: timeout]", "confidence": 0.0, "error": "timeout"}
+    result = {"transcribed_text": "texte", "pages": [{"page": 1, "text": "texte"}, failed_page]}
+
+    save_transcription(copy_file, "mathematiques", result)
+    assert load_transcription(copy_file, "mathematiques") is None
+
+    result["pages"].pop()
+    save_transcription(copy_file, "mathematiques", result)
+    assert load_transcription(copy_file, "mathematiques") == result
+
+
+def test_uploaded_image_is_transcribed(tmp_path):
+    document = fitz.open(stream=_handwritten_pdf(1), filetype="pdf")
+    png = document[0].get_pixmap(dpi=100).tobytes("png")
+    document.close()
+
+    responder = MockLLMResponder(seed=5)
+    result = _processor(responder, tmp_path).transcribe_bytes(png, "copie.png")
+
+    assert result["transcribed_text"]
+    assert "error" not in result
+    assert responder.stats["vision_requests"] == 1
+
+
+def test_unprocessable_upload_keeps_its_mime_type(tmp_path, monkeypatch, capsys):
+    payloads = []
+
+    class RecordingResponder(MockLLMResponder):
+        def respond(self, payload, request_bytes=0):
+            payloads.append(payload)
+            return super().respond(payload, request_bytes)
+
+    processor = _processor(RecordingResponder(seed=5), tmp_path)
+
+    def failing_preprocess(*args, **kwargs):
+        raise OSError("cannot identify image file")
+
+    monkeypatch.setattr(processor.preprocessor, "preprocess_bytes", failing_preprocess)
+    result = processor.transcribe_bytes(b"\xff\xd8\xff\xe0 jpeg data", "photo.jpg")
+
+    assert result["transcribed_text"]
+    image_url = payloads[0]["messages"][0]["content"][1]["image_url"]["url"]
+    assert image_url.startswith("data:image/jpeg;base64,")
+    assert "cannot identify image file" in capsys.readouterr().out
+
+
+def test_render_options_carry_the_preprocessor(tmp_path):
+    from PIL import Image
+    from app.services.ai_ocr_service import PageRenderer
+    from app.services.ocr_pipeline import render_pdf_pages
+    from app.services.ocr_preprocessing import ImagePreprocessor
+
+    preprocessor = ImagePreprocessor(target_short_side=300, image_format="png")
+    options = PageRenderer(preprocessor, skip_blank_pages=False).options()
+    assert options["preprocessor"] is preprocessor
+
+    path = tmp_path / "copie.pdf"
+    path.write_bytes(_handwritten_pdf(4))
+    pages = render_pdf_pages(str(path), options, start=1, stop=3)
+
+    assert [page["page"] for page in pages] == [2, 3]
+    for page in pages:
+        with Image.open(io.BytesIO(page["image"]["image_bytes"])) as image:
+            assert image.format == "PNG"
+            assert min(image.size) <= 320
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_renders_pages_by_batch(tmp_path, monkeypatch, workers):
+    from app.config import settings
+    from app.services.ocr_pipeline import OCRPipeline, shutdown_render_pool
+
+    monkeypatch.setattr(settings, "OCR_RENDER_WORKERS", workers)
+    monkeypatch.setattr(settings, "OCR_RENDER_PAGE_BATCH", 2)
+    paths = []
+    for index, pages in enumerate((5, 1)):
+        path = tmp_path / f"copie_{index}.pdf"
+        path.write_bytes(_handwritten_pdf(pages))
+        paths.append(path)
+
+    pipeline = OCRPipeline(_processor(MockLLMResponder(seed=5), tmp_path), ocr_workers=2)
+    try:
+        results = asyncio.run(pipeline.transcribe_files(paths))
+    finally:
+        shutdown_render_pool()
+
+    assert [r["page_count"] for r in results] == [5, 1]
+    assert [p["page"] for p in results[0]["pages"]] == [1, 2, 3, 4, 5]
+    rendered = pipeline.stats["rendu_processus"] + pipeline.stats["rendu_thread"]
+    assert rendered == 4  # 3 lots de 2 pages + 1 lot
+    assert pipeline.stats["rendu_processus" if workers > 1 else "rendu_thread"] == 4
+
+
+class _LocalEngine(OCREngine):
+    """Moteur local simule (Tesseract n'est pas necessaire)"""
+
+    name = "local_test"
+
+    def transcribe(self, image, matiere, detailed):
+        return {"transcribed_text": "Bulletin imprime", "confidence": 0.95}
+
+
+def test_local_mode_needs_no_api_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MOCK", False)
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "")
+    processor = OCRProcessor(
+        cache=OCRTranscriptionCache(tmp_path / "cache"), engine_mode="local", local_engine=_LocalEngine()
+    )
+
+    result = processor.transcribe_bytes(_handwritten_pdf(2), "bulletin.pdf")
+
+    assert not result.get("error")
+    assert [page["engine"] for page in result["pages"]] == ["local_test", "local_test"]
+    assert "Bulletin imprime" in result["transcribed_text"]
@@ -0,0 +1,80 @@
+"""
+Classement d'une evaluation : notes ramenees au bareme, resultats en erreur hors classement
+"""
+import json
+
+from app.services.class_report_service import compute_class_summary
+from app.services.ranking_service import rank_evaluation, update_student_rank
+
+
+def _write_result(eval_dir, name, **result):
+    student_dir = eval_dir / "resultats" / name
+    student_dir.mkdir(parents=True, exist_ok=True)
+    with open(student_dir / "correction_detaillee.json", "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def _read_result(eval_dir, name):
+    with open(eval_dir / "resultats" / name / "correction_detaillee.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_ranks_use_notes_rescaled_to_the_evaluation(tmp_path):
+    # 12/20 = 60 % devant 9/10 = 90 % en note brute, derriere une fois ramene sur 20
+    _write_result(tmp_path, "A", note_totale=12, note_maximale=20)
+    _write_result(tmp_path, "B", note_totale=9, note_maximale=10)
+
+    summary = rank_evaluation(tmp_path, 20.0)
+
+    assert summary["effectif"] == 2
+    assert _read_result(tmp_path, "B")["rang"] == 1
+    assert _read_result(tmp_path, "A")["rang"] == 2
+
+
+def test_error_results_are_left_out_of_the_ranking(tmp_path):
+    _write_result(tmp_path, "A", note_totale=12, note_maximale=20)
+    _write_result(tmp_path, "B", note_totale=8, note_maximale=20)
+    _write_result(tmp_path, "C", note_totale=0.0, note_maximale=20, necessite_revision_humaine=True)
+
+    assert rank_evaluation(tmp_path, 20.0)["effectif"] == 2
+    assert _read_result(tmp_path, "B")["rang"] == 2
+    assert _read_result(tmp_path, "B")["effectif_classe"] == 2
+    assert _read_result(tmp_path, "C").get("rang") is None
+
+    # Copie corrigee a la main : entre dans le classement
+    corrected = {"note_totale": 10, "note_maximale": 20}
+    _write_result(tmp_path, "C", **corrected)
+    assert update_student_rank(tmp_path, "C", corrected, 20.0)["effectif"] == 3
+    assert _read_result(tmp_path, "C")["rang"] == 2
+    assert _read_result(tmp_path, "B")["rang"] == 3
+
+
+def test_resaved_result_gets_its_rank_back(tmp_path):
+    _write_result(tmp_path, "A", note_totale=12, note_maximale=20)
+    _write_result(tmp_path, "B", note_totale=8, note_maximale=20)
+    rank_evaluation(tmp_path, 20.0)
+
+    # Nouvelle correction par lot, meme note : le fichier est reecrit sans ses rangs
+    _write_result(tmp_path, "B", note_totale=8, note_maximale=20)
+    assert rank_evaluation(tmp_path, 20.0)["resultats_mis_a_jour"] == 1
+    assert _read_result(tmp_path, "B")["rang"] == 2
+    assert _read_result(tmp_path, "B")["rang_classe"] == 2
+
+
+def test_class_report_ranks_match_the_result_ranks(tmp_path):
+    results = {
+        "A": {"etudiant_nom": "A", "note_totale": 12, "note_maximale": 20},
+        "B": {"etudiant_nom": "B", "note_totale": 9, "note_maximale": 10},
+        "C": {"etudiant_nom": "C", "note_totale": 0.0, "note_maximale": 20, "necessite_revision_humaine": True},
+        "D": {"etudiant_nom": "D", "note_totale": 6, "note_maximale": 20},
+    }
+    for name, result in results.items():
+        _write_result(tmp_path, name, **result)
+    rank_evaluation(tmp_path, 20.0)
+
+    summary = compute_class_summary(list(results.values()), {"note_totale": 20})
+
+    assert summary["copies_a_reviser"] == 1
+    ranking = {entry["etudiant"]: entry["rang"] for entry in summary["classement"]}
+    assert ranking == {name: _read_result(tmp_path, name).get("rang_classe") for name in results}
+    assert summary["classement"][-1]["etudiant"] == "C"
@@ -0,0 +1,59 @@
+"""
+Routes des rapports et exports (appelees directement, sans serveur)
+"""
+import asyncio
+import io
+import json
+import zipfile
+
+from app.api.v1 import reports
+from app.config import settings
+from app.services import report_generation
+
+
+def _write_evaluation(eval_id, results):
+    eval_dir = reports.EVALUATIONS_PATH / eval_id
+    for name, result in results.items():
+        student_dir = eval_dir / "resultats" / name
+        student_dir.mkdir(parents=True, exist_ok=True)
+        (student_dir / "correction_detaillee.json").write_text(json.dumps(result), encoding="utf-8")
+    (eval_dir / "infos_evaluation.json").write_text(json.dumps({"note_totale": 20}), encoding="utf-8")
+    return eval_dir
+
+
+def test_json_export_omits_the_copy_transcription():
+    _write_evaluation("export_json", {
+        "DUPONT_Marie": {
+            "etudiant_nom": "DUPONT", "note_totale": 12, "feedback_statut": "en_attente",
+            "transcription_copie": "Question 1 : x = 4",
+        },
+        "MARTIN_Paul": {"etudiant_nom": "MARTIN", "note_totale": 15, "feedback_statut": "genere"},
+    })
+
+    exported = asyncio.run(reports.export_results("export_json", format="json", current_user={}))
+
+    assert [r["etudiant_nom"] for r in exported] == ["DUPONT", "MARTIN"]
+    assert all("transcription_copie" not in r for r in exported)
+    assert exported[0]["note_totale"] == 12
+
+
+def test_reports_zip_streams_fresh_and_rebuilt_reports(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_WORKERS", 1)
+    result = {"etudiant_nom": "DUPONT", "etudiant_prenom": "Marie", "note_totale": 12, "note_maximale": 20,
+              "questions": [{"numero": 1, "note": 12, "note_max": 20}]}
+    eval_dir = _write_evaluation("export_zip", {"DUPONT_Marie": result, "MARTIN_Paul": {**result, "etudiant_nom": "MARTIN"}})
+    # Rapport deja a jour pour DUPONT : envoye sans generation
+    report_generation.build_student_report(
+        str(report_generation.student_result_path(eval_dir, "DUPONT_Marie")), {"note_totale": 20},
+        str(report_generation.student_report_path(eval_dir, "DUPONT_Marie"))
+    )
+
+    async def collect():
+        try:
+            return b"".join([chunk async for chunk in report_generation.stream_reports_zip(eval_dir, {"note_totale": 20})])
+        finally:
+            report_generation.shutdown_report_pool()
+
+    with zipfile.ZipFile(io.BytesIO(asyncio.run(collect()))) as archive:
+        assert archive.namelist() == ["DUPONT_Marie_rapport.pdf", "MARTIN_Paul_rapport.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
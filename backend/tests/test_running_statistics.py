@@ -0,0 +1,48 @@
+"""
+Statistiques courantes : enregistrements simultanes des resultats
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.ranking_service import update_student_rank
+from app.services.running_statistics import load_running_statistics, save_result_with_statistics
+
+
+def test_concurrent_saves_of_a_student_count_once(tmp_path):
+    def save(index):
+        result = {"note_totale": index % 20, "note_maximale": 20}
+        save_result_with_statistics(tmp_path, f"Etudiant_{index % 3}", result, 20)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(save, range(60)))
+
+    stats = load_running_statistics(tmp_path, 20)
+    assert stats.data["copies"] == 3
+    summary = stats.summary("eval")
+    assert summary["nombre_copies"] == 3
+    # Les notes retenues sont celles des resultats enregistres sur le disque
+    saved = [
+        json.loads(path.read_text(encoding="utf-8"))["note_totale"]
+        for path in tmp_path.glob("resultats/*/correction_detaillee.json")
+    ]
+    assert summary["moyenne_generale"] == round(sum(saved) / 3, 2)
+
+
+def test_ranking_does_not_overwrite_concurrent_saves(tmp_path):
+    def save(index):
+        name = f"Etudiant_{index % 4}"
+        result = {"note_totale": index % 20, "note_maximale": 20}
+        save_result_with_statistics(tmp_path, name, result, 20)
+        update_student_rank(tmp_path, name, result, 20)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(save, range(80)))
+
+    files = list(tmp_path.glob("resultats/*/correction_detaillee.json"))
+    saved = [json.loads(path.read_text(encoding="utf-8")) for path in files]
+    summary = load_running_statistics(tmp_path, 20).summary("eval")
+    assert summary["nombre_copies"] == 4
+    assert summary["moyenne_generale"] == round(sum(r["note_totale"] for r in saved) / 4, 2)
+    assert sorted(r["rang"] for r in saved) == sorted(
+        1 + sum(other["note_totale"] > r["note_totale"] for other in saved) for r in saved
+    )